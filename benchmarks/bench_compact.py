@@ -0,0 +1,176 @@
+"""
+History storage benchmark: the row-per-sample layout against the compact
+layout (dictionary tables plus change-only runs) on a synthetic feed with
+realistic motion: dishes following spacecraft across the sky, Doppler-
+shifted frequencies, receding ranges, noisy signal power and occasional
+data-rate changes. Reports disk footprint, bytes written per scrape, read
+speed, and the largest reconstruction error per column.
+
+Usage: python benchmarks/bench_compact.py [--days D] [--spacecraft N] [--interval S]
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from compact import DEFAULT_TOLERANCES, VALUE_COLUMNS, CompactHistoryStore  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from storage import WRITER_PRAGMAS  # noqa: E402
+
+TABLE = "communication_logs"
+START = 1718841600  # 2024-06-20 00:00 UTC
+# Latitude and east longitude of each complex, and its antennas.
+SITES = [(35.43, -116.89, ["DSS14", "DSS24", "DSS25", "DSS26"]),
+         (-35.40, 148.98, ["DSS34", "DSS35", "DSS36", "DSS43"]),
+         (40.43, -4.25, ["DSS54", "DSS55", "DSS56", "DSS63"])]
+
+
+def _pointing(ts, latitude, longitude, right_ascension, declination):
+    """Azimuth and elevation (degrees) of a fixed sky position from a station."""
+    days = ts / 86400.0 + 2440587.5 - 2451545.0
+    sidereal = 2 * math.pi * (0.7790572732640 + 1.00273781191135448 * days)
+    hour_angle = sidereal + math.radians(longitude) - right_ascension
+    lat = math.radians(latitude)
+    sin_el = math.sin(lat) * math.sin(declination) + math.cos(lat) * math.cos(declination) * math.cos(hour_angle)
+    azimuth = math.atan2(-math.sin(hour_angle) * math.cos(declination),
+                         math.cos(lat) * math.sin(declination) - math.sin(lat) * math.cos(declination) * math.cos(hour_angle))
+    return math.degrees(azimuth) % 360, math.degrees(math.asin(sin_el)), hour_angle
+
+
+def synthetic_scrapes(days, spacecraft, interval, seed=0):
+    """One list of history rows per scrape; each spacecraft is tracked from the first complex that sees it."""
+    rng = random.Random(seed)
+    craft = [dict(name=f"SC{i}", ra=rng.uniform(0, 2 * math.pi), dec=math.radians(rng.uniform(-30, 30)),
+                  range=rng.uniform(1e8, 2e10), speed=rng.uniform(-40, 40), power=rng.uniform(-160, -125),
+                  carrier=8.4e9 + rng.uniform(0, 1e8), rate=rng.choice((40, 160, 2000, 6e6)))
+             for i in range(spacecraft)]
+    for ts in range(START, START + int(days * 86400), interval):
+        rows = []
+        for i, sc in enumerate(craft):
+            for latitude, longitude, antennas in SITES:
+                azimuth, elevation, hour_angle = _pointing(ts, latitude, longitude, sc["ra"], sc["dec"])
+                if elevation >= 15:
+                    break
+            else:
+                continue
+            if rng.random() < 0.002:
+                sc["rate"] = rng.choice((40, 160, 2000, 6e6))
+            radial = sc["speed"] + 0.46 * math.cos(sc["dec"]) * math.sin(hour_angle)  # km/s
+            rows.append((
+                ts, sc["name"], antennas[i % len(antennas)],
+                round(sc["power"] + rng.gauss(0, 0.15), 4), None, float(sc["rate"]),
+                round(sc["carrier"] * (1 - radial / 299792.458), 1),
+                round(azimuth, 4), round(elevation, 4),
+                round(sc["range"] + sc["speed"] * (ts - START), -3),
+            ))
+        yield rows
+
+
+def _written_bytes():
+    try:
+        with open("/proc/self/io") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("wchar"))
+    except (OSError, StopIteration):
+        return None
+
+
+def fill(store, scrapes):
+    """Write and commit one scrape at a time, as the scraper does; returns (seconds, bytes written)."""
+    conn = sqlite3.connect(store.db_file)
+    for pragma in WRITER_PRAGMAS:
+        conn.execute(pragma)
+    store.ensure_schema(conn)
+    written, start = _written_bytes(), time.perf_counter()
+    for rows in scrapes:
+        store.write(conn, rows)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    after = _written_bytes()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return elapsed, None if written is None else after - written
+
+
+def max_errors(reference, compact, start, end):
+    """Largest absolute difference per value column between two stores' rebuilt rows."""
+    errors = [0.0] * len(VALUE_COLUMNS)
+    key = lambda row: row[:3]
+    for day in range(start, end, 86400):
+        expected_rows = sorted((r.as_row() for r in reference.records_between(day, day + 86400)), key=key)
+        actual_rows = sorted((r.as_row() for r in compact.records_between(day, day + 86400)), key=key)
+        if len(expected_rows) != len(actual_rows):
+            raise SystemExit(f"{len(actual_rows)} rows rebuilt for the day from {day}, expected {len(expected_rows)}")
+        for expected, actual in zip(expected_rows, actual_rows):
+            if key(expected) != key(actual):
+                raise SystemExit(f"row mismatch: {expected[:3]} vs {actual[:3]}")
+            for i, (x, y) in enumerate(zip(expected[3:], actual[3:])):
+                if (x is None) != (y is None):
+                    raise SystemExit(f"NULL mismatch in {VALUE_COLUMNS[i]} at {expected[:3]}")
+                if x is not None:
+                    errors[i] = max(errors[i], abs(x - y))
+    return errors
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(days, spacecraft, interval):
+    scrapes = list(synthetic_scrapes(days, spacecraft, interval))
+    rows = sum(len(s) for s in scrapes)
+    print(f"{rows} rows in {len(scrapes)} scrapes ({days} days, {spacecraft} spacecraft, every {interval} s)\n")
+    exact = {column: 0.0 for column in VALUE_COLUMNS}
+
+    with tempfile.TemporaryDirectory(prefix="dsn-compact-") as tmp:
+        layouts = [
+            ("rows", HistoryStore(os.path.join(tmp, "rows.db"), TABLE)),
+            ("compact exact", CompactHistoryStore(os.path.join(tmp, "exact.db"), TABLE, tolerances=exact)),
+            ("compact default", CompactHistoryStore(os.path.join(tmp, "default.db"), TABLE)),
+        ]
+        print(f"{'layout':<16} {'disk MB':>8} {'ratio':>6} {'runs':>8} {'KB/scrape':>10} {'write s':>8} "
+              f"{'scan rows/s':>12} {'1-day ms':>9} {'pair-day ms':>12}")
+        base_size = base_io = None
+        for name, store in layouts:
+            seconds, written = fill(store, scrapes)
+            size = os.path.getsize(store.db_file)
+            base_size = base_size or size
+            base_io = base_io or written
+            conn = sqlite3.connect(store.db_file)
+            runs = conn.execute(f"SELECT COUNT(*) FROM {store.runs}").fetchone()[0] if name != "rows" else rows
+            conn.close()
+            scanned, scan_seconds = timed(lambda: sum(len(chunk) for chunk in store.iter_chunks()))
+            if scanned != rows:
+                raise SystemExit(f"{name}: rebuilt {scanned} rows, expected {rows}")
+            day = START + int(days * 86400) - 86400
+            _, day_seconds = timed(store.records_between, day, day + 86400)
+            sample = scrapes[len(scrapes) // 2][0]
+            _, pair_seconds = timed(store.query, sample[1], sample[2], sample[0] - 43200, sample[0] + 43200)
+            io = f"{written / len(scrapes) / 1024:10.1f}" if written is not None else f"{'n/a':>10}"
+            print(f"{name:<16} {size / 1e6:8.1f} {base_size / size:5.1f}x {runs:8} {io} {seconds:8.1f} "
+                  f"{scanned / scan_seconds:12,.0f} {day_seconds * 1000:9.1f} {pair_seconds * 1000:12.2f}")
+
+        print("\nlargest reconstruction error per column (default tolerances):")
+        end = START + int(days * 86400)
+        errors = max_errors(layouts[0][1], layouts[2][1], START, end)
+        for column, error in zip(VALUE_COLUMNS, errors):
+            print(f"  {column:<24} {error:12.4f}  (tolerance {DEFAULT_TOLERANCES.get(column, 0.0)})")
+        if any(max_errors(layouts[0][1], layouts[1][1], START, end)):
+            raise SystemExit("exact compact layout did not reproduce the rows exactly")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=float, default=14)
+    parser.add_argument("--spacecraft", type=int, default=36)
+    parser.add_argument("--interval", type=int, default=300)
+    args = parser.parse_args()
+    run(args.days, args.spacecraft, args.interval)
@@ -0,0 +1,111 @@
+"""
+Bulk ETL throughput on a synthetic multi-million-row history: export to
+Parquet, Arrow and CSV, import each file back into an empty store, and
+load the training columns from each file. Every step runs in a fresh
+process so its peak RSS shows how much memory it really needs.
+
+Usage: python benchmarks/bench_etl.py [--rows N] [--chunk-rows N] [--formats parquet,arrow,csv]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from etl import export_history, import_archive, read_frame  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from storage import WRITER_PRAGMAS  # noqa: E402
+
+TABLE = "communication_logs"
+TRAINING_COLUMNS = ["signal_strength", "antenna_id", "timestamp", "communication_duration"]
+
+
+def synthetic_rows(count, start=0):
+    """Rows shaped like a year of scrapes: 40 spacecraft over 12 dishes every 300 s."""
+    for i in range(start, start + count):
+        scrape, slot = divmod(i, 40)
+        yield (
+            1704067200 + 300 * scrape,
+            f"SC{slot}",
+            f"DSS-{(slot * 7 + scrape // 48) % 12}",
+            -160.0 + (i * 37 % 400) / 10,
+            None if i % 3 else float(600 + i % 30000),
+            1000.0 * (i % 7),
+            8.4e9 + (i % 5) * 1e6,
+            float(i % 360),
+            float(i % 90),
+            1.5e9 + i,
+        )
+
+
+def build_store(db_file, rows, chunk=200000):
+    conn = sqlite3.connect(db_file)
+    for pragma in WRITER_PRAGMAS:
+        conn.execute(pragma)
+    history = HistoryStore(db_file, TABLE)
+    history.ensure_schema(conn)
+    for start in range(0, rows, chunk):
+        history.write(conn, list(synthetic_rows(min(chunk, rows - start), start)))
+        conn.commit()
+    conn.close()
+
+
+def _measured(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    return result, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def in_fresh_process(function, *args, **kwargs):
+    """(result, seconds, peak RSS in MB) of function run in a new interpreter."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_measured, function, *args, **kwargs).result()
+
+
+def _load_training_columns(path):
+    return len(read_frame(path, TRAINING_COLUMNS))
+
+
+def run(rows, chunk_rows, formats):
+    with tempfile.TemporaryDirectory(prefix="dsn-etl-") as tmp:
+        db_config = {"file": os.path.join(tmp, "source.db"), "table": TABLE}
+        start = time.perf_counter()
+        build_store(db_config["file"], rows)
+        print(f"built {rows} synthetic history rows in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(db_config['file']) / 1e6:.0f} MB SQLite)")
+        _, _, baseline = in_fresh_process(len, "")
+        print(f"idle interpreter peak RSS: {baseline:.0f} MB\n")
+
+        print(f"{'step':<16} {'rows/s':>12} {'seconds':>9} {'peak RSS MB':>12} {'file MB':>9}")
+        for fmt in formats:
+            path = os.path.join(tmp, f"history.{fmt}")
+            count, seconds, rss = in_fresh_process(export_history, db_config, path, chunk_rows=chunk_rows)
+            print(f"{'export ' + fmt:<16} {count / seconds:12,.0f} {seconds:9.2f} {rss:12.0f} "
+                  f"{os.path.getsize(path) / 1e6:9.1f}")
+
+            target = {"file": os.path.join(tmp, f"import-{fmt}.db"), "table": TABLE}
+            (imported, _), seconds, rss = in_fresh_process(import_archive, target, path, chunk_rows=chunk_rows)
+            print(f"{'import ' + fmt:<16} {imported / seconds:12,.0f} {seconds:9.2f} {rss:12.0f}")
+
+            loaded, seconds, rss = in_fresh_process(_load_training_columns, path)
+            print(f"{'train-read ' + fmt:<16} {loaded / seconds:12,.0f} {seconds:9.2f} {rss:12.0f}")
+            if imported != rows or loaded != rows:
+                raise SystemExit(f"{fmt}: round trip lost rows ({imported} imported, {loaded} loaded)")
+            os.remove(target["file"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    parser.add_argument("--formats", default="parquet,arrow,csv")
+    args = parser.parse_args()
+    run(args.rows, args.chunk_rows, args.formats.split(","))
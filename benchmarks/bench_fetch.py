@@ -0,0 +1,58 @@
+"""
+Measure FeedFetcher latency against the local stub feed server: cold and
+conditional (304) fetches, a slow primary that triggers the hedged backup
+request, and a failing primary that falls back immediately.
+
+Usage: python benchmarks/bench_fetch.py [--iterations N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fetcher import FeedFetcher  # noqa: E402
+from stub_server import StubFeedServer  # noqa: E402
+
+
+def measure(fetcher, iterations):
+    timings, sources = [], {}
+    for n in range(iterations):
+        start = time.perf_counter()
+        result = fetcher.fetch(params={"r": n})
+        timings.append(time.perf_counter() - start)
+        key = f"{result.source}{' (304)' if result.not_modified else ''}"
+        sources[key] = sources.get(key, 0) + 1
+    return timings, sources
+
+
+def report(label, timings, sources):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    print(f"{label:<34} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  {sources}")
+
+
+def run(iterations):
+    scenarios = [
+        ("unconditional", dict(conditional=False), {}),
+        ("conditional (ETag / 304)", dict(), {}),
+        ("slow primary, hedge after 0.2s", dict(primary_delay=1.0, conditional=False), dict(hedge_delay=0.2)),
+        ("failing primary", dict(primary_status=503, conditional=False), {}),
+    ]
+    for label, server_options, fetcher_options in scenarios:
+        with StubFeedServer(**server_options) as server:
+            fetcher = FeedFetcher(server.primary_url, server.backup_url, timeout=5, **fetcher_options)
+            timings, sources = measure(fetcher, iterations)
+            fetcher.close()
+        report(label, timings, sources)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -0,0 +1,90 @@
+"""
+Pass-window forecast benchmark: the vectorized PassForecaster against a
+per-spacecraft, per-complex, per-step Python loop, on recorded dsn.xml
+fixtures. Window lists from both are checked to be identical.
+
+Usage: python benchmarks/bench_forecast.py [--scale N] [--hours H] [--step S] [fixture]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bench_parse import FIXTURES, FixedClockMonitor  # noqa: E402
+from forecast import COMPLEXES, PassForecaster  # noqa: E402
+
+
+def loop_forecast(forecaster, names, right_ascension, declination, now, hours):
+    """Reference implementation: one math.* evaluation per grid point."""
+    results = []
+    steps = range(now, now + int(hours * 3600) + 1, forecaster.step_seconds)
+    for i, name in enumerate(names):
+        for site, (lat, lon) in COMPLEXES.items():
+            lat, lon = math.radians(lat), math.radians(lon)
+            windows, rise, peak, previous = [], None, None, None
+            for t in steps:
+                days = t / 86400.0 + 2440587.5 - 2451545.0
+                era = (2 * math.pi * (0.7790572732640 + 1.00273781191135448 * days)) % (2 * math.pi)
+                hour_angle = era + lon - right_ascension[i]
+                sin_el = (math.sin(lat) * math.sin(declination[i])
+                          + math.cos(lat) * math.cos(declination[i]) * math.cos(hour_angle))
+                elevation = math.degrees(math.asin(max(-1.0, min(1.0, sin_el))))
+                if elevation >= forecaster.min_elevation:
+                    if rise is None:
+                        rise, peak = t, elevation
+                    peak = max(peak, elevation)
+                elif rise is not None:
+                    windows.append((rise, previous, round(peak, 2)))
+                    rise = None
+                previous = t
+            if rise is not None:
+                windows.append((rise, previous, round(peak, 2)))
+            results.append((name, site, windows))
+    return results
+
+
+def run(fixture, scale, hours, step):
+    with open(fixture, "rb") as f:
+        records = FixedClockMonitor()._parse_xml_data(f.read())
+    # Scale up by cloning each contact as extra spacecraft at shifted azimuths.
+    records = records + [
+        replace(r, spacecraft=f"{r.spacecraft}-{k}", azimuth=(r.azimuth + 7 * k) % 360)
+        for k in range(1, scale) for r in records if r.azimuth is not None
+    ]
+    now = records[0].ts
+    forecaster = PassForecaster(horizon_hours=hours, step_seconds=step)
+
+    start = time.perf_counter()
+    vectorized = forecaster.forecast(records, now=now, hours=hours)
+    vector_time = time.perf_counter() - start
+
+    names, right_ascension, declination = forecaster.fit(records)
+    start = time.perf_counter()
+    looped = loop_forecast(forecaster, names, right_ascension.tolist(), declination.tolist(), now, hours)
+    loop_time = time.perf_counter() - start
+
+    expected = [(r["spacecraft"], r["complex"], [(w["rise"], w["set"], w["max_elevation"]) for w in r["windows"]])
+                for r in vectorized]
+    mismatches = sum(1 for a, b in zip(expected, looped) if a != b)
+    windows = sum(len(r["windows"]) for r in vectorized)
+    grid = len(names) * len(COMPLEXES) * (int(hours * 3600) // step + 1)
+
+    print(f"spacecraft: {len(names)}  grid points: {grid}  windows: {windows}  mismatches: {mismatches}")
+    print(f"python loop : {loop_time * 1000:9.1f} ms")
+    print(f"vectorized  : {vector_time * 1000:9.1f} ms  ({loop_time / vector_time:.0f}x)")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixture", nargs="?", default=os.path.join(FIXTURES, "dsn.xml"))
+    parser.add_argument("--scale", type=int, default=10, help="Copies of each spacecraft")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--step", type=int, default=60)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.fixture, args.scale, args.hours, args.step) else 1)
@@ -0,0 +1,117 @@
+"""
+Dashboard prediction under a burst of clients: every request running each
+model itself, as the dashboard used to, against the InferenceService that
+coalesces requests for the same snapshot into one batch. Reports request
+latency percentiles, model evaluations and wall time per burst.
+
+Usage: python benchmarks/bench_inference.py [--clients N] [--records N] [--bursts N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inference import InferenceService  # noqa: E402
+from records import DSNRecord  # noqa: E402
+
+START = 1718841600  # 2024-06-20 00:00 UTC
+ANTENNAS = ["DSS14", "DSS24", "DSS25", "DSS26", "DSS34", "DSS35", "DSS36", "DSS43", "DSS54", "DSS55", "DSS63", "DSS65"]
+
+
+def training_csv(path, rows, rng):
+    with open(path, "w") as f:
+        f.write("timestamp,spacecraft,antenna_id,signal_strength,communication_duration\n")
+        for _ in range(rows):
+            f.write(f"{START + rng.randrange(30 * 86400)},SC{rng.randrange(40)},{rng.choice(ANTENNAS)},"
+                    f"{rng.uniform(-165, -120):.2f},{rng.uniform(600, 30000):.0f}\n")
+
+
+def snapshot(ts, count, rng):
+    return [DSNRecord(ts, f"SC{i % 40}", rng.choice(ANTENNAS), rng.uniform(-165, -120)) for i in range(count)]
+
+
+def burst(clients, request):
+    """Run request() from clients threads released together; returns per-request seconds."""
+    barrier = threading.Barrier(clients)
+    samples = []
+
+    def client():
+        barrier.wait()
+        start = time.perf_counter()
+        request()
+        samples.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run(clients, records, bursts):
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix="dsn-inference-")
+    try:
+        csv = os.path.join(workdir, "training.csv")
+        training_csv(csv, 5000, rng)
+        ml_config = {
+            "model_path": os.path.join(workdir, "duration.pkl"), "training_data": csv,
+            "features": ["signal_strength", "antenna_id", "timestamp"], "target": "communication_duration",
+            "models": [{"target": "signal_strength", "field": "predicted_signal_strength",
+                        "model_path": os.path.join(workdir, "signal.pkl"),
+                        "features": ["spacecraft", "antenna_id", "timestamp"]}],
+            "inference_timeout": 60.0,
+        }
+        service = InferenceService.from_config(ml_config)
+        evaluations = [0]
+        for predictor in service.predictors.values():
+            predictor.train_model()
+            fit = predictor.model.predict
+
+            def counted(X, fit=fit):
+                evaluations[0] += 1
+                return fit(X)
+            predictor.model.predict = counted
+
+        print(f"\n{bursts} bursts of {clients} concurrent requests, {records} records per snapshot, "
+              f"{len(service.predictors)} models\n")
+        print(f"{'mode':<12} {'p50 ms':>8} {'p99 ms':>8} {'burst ms':>9} {'forest evals':>13}")
+        for mode in ("per-request", "coalesced"):
+            evaluations[0] = 0
+            samples, walls = [], []
+            for i in range(bursts):
+                # A new scrape each burst, with new signal levels, so no memo carries over.
+                ts = START + 30 * 86400 + i * 60
+                current = snapshot(ts, records, rng)
+                if mode == "per-request":
+                    request = lambda: {field: predictor.predict(current)
+                                       for field, predictor in service.predictors.items()}
+                else:
+                    request = lambda: service.predict(current)
+                start = time.perf_counter()
+                samples += burst(clients, request)
+                walls.append(time.perf_counter() - start)
+            samples.sort()
+            print(f"{mode:<12} {statistics.median(samples) * 1000:8.1f} {samples[int(len(samples) * 0.99)] * 1000:8.1f} "
+                  f"{statistics.median(walls) * 1000:9.1f} {evaluations[0]:13}")
+        service.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--records", type=int, default=60)
+    parser.add_argument("--bursts", type=int, default=20)
+    args = parser.parse_args()
+    run(args.clients, args.records, args.bursts)
@@ -0,0 +1,101 @@
+"""
+Query API lookup latency: the in-memory SnapshotIndex against the SQLite
+history it replaces, on a synthetic six-hour history. Answers from both
+are checked to be identical.
+
+Usage: python benchmarks/bench_lookup.py [--pairs N] [--interval S] [--queries N]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from history import HistoryStore  # noqa: E402
+from lookup import SnapshotIndex  # noqa: E402
+from records import DSNRecord  # noqa: E402
+
+WINDOW = 21600
+ANTENNAS = ["DSS14", "DSS24", "DSS25", "DSS26", "DSS34", "DSS35", "DSS36", "DSS43", "DSS54", "DSS55", "DSS63", "DSS65"]
+
+
+def scrapes(pairs, interval, now):
+    for ts in range(now - WINDOW + interval, now + 1, interval):
+        yield [DSNRecord(ts, f"SC{i}", ANTENNAS[(i + ts // 3600) % len(ANTENNAS)], -150.0 + i % 30)
+               for i in range(pairs)]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6)
+
+
+def timed(function, arguments):
+    samples, answers = [], []
+    for args in arguments:
+        start = time.perf_counter()
+        answers.append(function(*args))
+        samples.append(time.perf_counter() - start)
+    return _percentiles(samples), answers
+
+
+def run(pairs, interval, queries):
+    now = int(time.time())
+    with tempfile.TemporaryDirectory(prefix="dsn-lookup-") as tmp:
+        db_file = os.path.join(tmp, "history.db")
+        history = HistoryStore(db_file, "communication_logs")
+        conn = sqlite3.connect(db_file)
+        history.ensure_schema(conn)
+        index = SnapshotIndex(window=WINDOW)
+        start = time.perf_counter()
+        rows = 0
+        for records in scrapes(pairs, interval, now):
+            history.write(conn, [record.as_row() for record in records])
+            index.add(records)
+            rows += len(records)
+        conn.commit()
+        conn.close()
+        print(f"{rows} records over {WINDOW // 3600} h ({pairs} pairs every {interval} s), "
+              f"indexed and stored in {time.perf_counter() - start:.1f} s\n")
+
+        current = history.records_at(index.ts)
+        rng = random.Random(0)
+        picks = [rng.choice(current) for _ in range(queries)]
+        windows = []
+        for record in picks:
+            span = rng.choice((600, 3600, WINDOW - interval))
+            windows.append((record.spacecraft, record.antenna_id, now - span, now))
+
+        def sqlite_active():
+            by_spacecraft = {}
+            for record in history.records_at(history.latest_ts()):
+                by_spacecraft.setdefault(record.spacecraft, set()).add(record.antenna_id)
+            return {name: sorted(antennas) for name, antennas in sorted(by_spacecraft.items())}
+
+        cases = [
+            ("active spacecraft", sqlite_active, index.active_spacecraft, [()] * queries),
+            ("history window", history.query, index.history, windows),
+        ]
+        print(f"{'query':<18} {'sqlite p50 us':>14} {'p99':>9} {'index p50 us':>13} {'p99':>9} {'speedup':>8}")
+        for name, slow, fast, arguments in cases:
+            (slow_p50, slow_p99), expected = timed(slow, arguments)
+            (fast_p50, fast_p99), answers = timed(fast, arguments)
+            if answers != expected:
+                raise SystemExit(f"{name}: index answers differ from SQLite")
+            print(f"{name:<18} {slow_p50:14.0f} {slow_p99:9.0f} {fast_p50:13.1f} {fast_p99:9.1f} "
+                  f"{slow_p50 / fast_p50:7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=40)
+    parser.add_argument("--interval", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.pairs, args.interval, args.queries)
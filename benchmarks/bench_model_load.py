@@ -0,0 +1,95 @@
+"""
+Startup cost of loading the predictive model: the legacy single pickle
+versus registry artifacts (memory-mapped and compressed). Each load runs
+in a fresh interpreter so time and resident memory are measured cold
+(Linux, reads /proc/self/status).
+
+Usage: python benchmarks/bench_model_load.py [--rows N] [--trees N]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+LOADER = r"""
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+
+def rss_kib():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+
+import numpy, sklearn.ensemble  # imported up front so only the load is timed
+kind, path = sys.argv[2], sys.argv[3]
+before = rss_kib()
+start = time.perf_counter()
+if kind == "pickle":
+    import pickle
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+else:
+    from registry import ModelRegistry
+    _, artifact = ModelRegistry(path, compress=int(kind)).load()
+elapsed = time.perf_counter() - start
+after = rss_kib()
+print(json.dumps({"seconds": elapsed, "rss_kib": after - before, "trees": len(artifact["model"].estimators_)}))
+"""
+
+
+def build_artifact(rows, trees):
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from features import FeatureEncoder
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, 7))
+    y = X[:, 0] * 100 + rng.normal(size=rows)
+    model = RandomForestRegressor(n_estimators=trees, random_state=42, n_jobs=-1).fit(X, y)
+    encoder = FeatureEncoder(["signal_strength", "antenna_id", "timestamp"])
+    return {"model": model, "encoder": encoder}
+
+
+def load(kind, path):
+    output = subprocess.run([sys.executable, "-c", LOADER, SRC, kind, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(rows, trees):
+    from registry import ModelRegistry
+
+    artifact = build_artifact(rows, trees)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.pkl")
+        with open(legacy_path, "wb") as f:
+            pickle.dump(artifact, f)
+
+        cases = [("pickle", legacy_path, legacy_path)]
+        for compress in (0, 3):
+            model_path = os.path.join(tmp, f"c{compress}", "predictive_model.pkl")
+            registry = ModelRegistry(model_path, compress=compress)
+            registry.save(artifact)
+            cases.append((str(compress), model_path, registry.path_for(registry.latest_version())))
+
+        print(f"{trees} trees fitted on {rows} rows")
+        for kind, path, file_path in cases:
+            label = {"pickle": "legacy pickle", "0": "registry, mmap", "3": "registry, compress=3"}[kind]
+            result = load(kind, path)
+            size = os.path.getsize(file_path) / 1024 / 1024
+            print(f"  {label:<22} {result['seconds'] * 1000:8.1f} ms  "
+                  f"+{result['rss_kib'] / 1024:7.1f} MiB RSS  {size:7.1f} MiB on disk")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--trees", type=int, default=100)
+    args = parser.parse_args()
+    run(args.rows, args.trees)
@@ -0,0 +1,164 @@
+"""
+Parse-time and peak-memory microbenchmark for DSNMonitor._parse_xml_data
+over recorded dsn.xml fixtures, against the previous ElementTree/XPath
+implementation. Both timings include building the parser's output: dicts
+for the old parser, DSNRecords for the streaming one. Before timing, the
+streaming output is checked record-for-record against each fixture's
+golden file (<fixture>.golden.json); --update-golden rewrites those after
+an intended change in parser output.
+
+Usage: python benchmarks/bench_parse.py [--scale N] [--iterations N] [--update-golden] [fixture ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from monitor import DSNMonitor  # noqa: E402
+from records import RECORD_COLUMNS, format_range  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXED_TIME = datetime(2024, 6, 20, 16, 0, 0, tzinfo=timezone.utc)
+
+
+class FixedClockMonitor(DSNMonitor):
+    def __init__(self):
+        # Parsing needs no network or database state.
+        pass
+
+    def _get_current_timestamp(self):
+        return FIXED_TIME
+
+
+def legacy_parse(monitor, xml_content):
+    """The pre-streaming parser, kept verbatim as the timing baseline."""
+    records = []
+    current_timestamp = monitor._get_current_timestamp()
+    try:
+        root = ET.fromstring(xml_content)
+        for dish in root.findall('.//dish'):
+            antenna_data = dish.attrib
+            antenna_id = antenna_data.get('name', 'Unknown')
+            azimuth = float(antenna_data.get('azimuthAngle', 0)) if antenna_data.get('azimuthAngle') not in ['', 'null', 'none'] else None
+            elevation = float(antenna_data.get('elevationAngle', 0)) if antenna_data.get('elevationAngle') not in ['', 'null', 'none'] else None
+            target = dish.find('.//target')
+            if target is not None:
+                spacecraft = target.get('name', 'Unknown')
+                upleg_range = float(target.get('uplegRange', 0)) if target.get('uplegRange') not in ['', 'null', 'none'] else None
+                downleg_range = float(target.get('downlegRange', 0)) if target.get('downlegRange') not in ['', 'null', 'none'] else None
+                spacecraft_range = None
+                if upleg_range and upleg_range > 0:
+                    spacecraft_range = upleg_range
+                if downleg_range and downleg_range > 0:
+                    if spacecraft_range:
+                        spacecraft_range = (spacecraft_range + downleg_range) / 2
+                    else:
+                        spacecraft_range = downleg_range
+            else:
+                spacecraft = 'Unknown'
+                spacecraft_range = None
+            for signal in dish.findall('.//downSignal[@active="true"]'):
+                if signal.get('signalType') == 'data':
+                    data_rate = float(signal.get('dataRate', 0)) if signal.get('dataRate') not in ['', 'null', 'none'] else None
+                    frequency = float(signal.get('frequency', 0)) if signal.get('frequency') not in ['', 'null', 'none'] else None
+                    power = float(signal.get('power', 0)) if signal.get('power') not in ['', 'null', 'none'] else None
+                    records.append({
+                        "timestamp": current_timestamp.isoformat(),
+                        "spacecraft": spacecraft,
+                        "antenna_id": antenna_id,
+                        "signal_strength": power if power is not None else 0.0,
+                        "communication_duration": 0,
+                        "data_rate": data_rate,
+                        "frequency": frequency,
+                        "azimuth": azimuth,
+                        "elevation": elevation,
+                        "spacecraft_range": spacecraft_range,
+                        "range_display": format_range(spacecraft_range)
+                    })
+    except ET.ParseError as e:
+        print(f"Error parsing XML: {e}")
+    except Exception as e:
+        print(f"Error processing XML data: {e}")
+    return records
+
+
+def golden_path(fixture):
+    return os.path.splitext(fixture)[0] + ".golden.json"
+
+
+def record_fields(records):
+    """Records as plain dicts in RECORD_COLUMNS order, the golden file format."""
+    return [dict(zip(RECORD_COLUMNS, record.as_row())) for record in records]
+
+
+def check_golden(monitor, path, xml_content, update=False):
+    """Compare the parser's output on an unscaled fixture with its golden file, or rewrite the file."""
+    actual = record_fields(monitor._parse_xml_data(xml_content))
+    golden = golden_path(path)
+    if update:
+        with open(golden, "w", encoding="utf-8") as f:
+            json.dump(actual, f, indent=1)
+            f.write("\n")
+        print(f"Wrote {len(actual)} records to {golden}")
+        return
+    if not os.path.exists(golden):
+        raise SystemExit(f"{golden} is missing; run with --update-golden to create it")
+    with open(golden, encoding="utf-8") as f:
+        expected = json.load(f)
+    if actual != expected:
+        raise SystemExit(f"{path}: parser output differs from {golden}")
+
+
+def scale_document(xml_content, factor):
+    """Repeat every <dish> element factor times to simulate a larger feed."""
+    if factor <= 1:
+        return xml_content
+    dishes = re.findall(r"\s*<dish .*?</dish>", xml_content, flags=re.S)
+    return xml_content.replace("</dsn>", "".join(dishes) * (factor - 1) + "\n</dsn>")
+
+
+def measure(parse, xml_content, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(xml_content)
+    elapsed = (time.perf_counter() - start) / iterations
+    tracemalloc.start()
+    parse(xml_content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(paths, scale, iterations, update_golden=False):
+    monitor = FixedClockMonitor()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            document = f.read()
+        check_golden(monitor, path, document, update=update_golden)
+        xml_content = scale_document(document, scale)
+
+        records = len(monitor._parse_xml_data(xml_content))
+        print(f"{os.path.basename(path)} x{scale}: {records} records, {len(xml_content) / 1024:.0f} KiB")
+        for label, parse in (("ElementTree + XPath", lambda x: legacy_parse(monitor, x)),
+                             ("iterparse streaming", monitor._parse_xml_data)):
+            elapsed, peak = measure(parse, xml_content, iterations)
+            print(f"  {label:<20} {elapsed * 1000:8.2f} ms/parse  peak {peak / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", default=sorted(glob.glob(os.path.join(FIXTURES, "*.xml"))))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the golden files from the parser")
+    args = parser.parse_args()
+    run(args.fixtures, args.scale, args.iterations, args.update_golden)
@@ -0,0 +1,150 @@
+"""
+End-to-end scrape -> store -> predict -> plot -> broadcast load test.
+
+Replays captured feed responses (by default the fixtures, recorded as a
+synthetic capture set) through DSNMonitor with a simulated clock, and
+reports per-stage latency percentiles and overall throughput. Runs
+offline against a temporary database and model.
+
+Usage: python benchmarks/bench_pipeline.py [--captures DIR] [--scrapes N] [--scale N] [--clients N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from monitor import DSNMonitor  # noqa: E402
+from plotting import PlotRenderer  # noqa: E402
+from inference import InferenceService  # noqa: E402
+from records import records_to_frame  # noqa: E402
+from webapp import create_app  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+START_TIME = datetime(2024, 6, 20, 16, 0, 0)
+
+
+class SimulatedClockMonitor(DSNMonitor):
+    """Each scrape is stamped scrape_interval seconds after the previous one."""
+
+    def __init__(self, data_config, db_config):
+        super().__init__(data_config, db_config)
+        self.scrape_interval = data_config["scrape_interval"]
+        self.scrapes = 0
+
+    def _get_current_timestamp(self):
+        return START_TIME + timedelta(seconds=self.scrapes * self.scrape_interval)
+
+
+def fixture_captures(directory, count):
+    """Write the fixtures as a capture set: count primary responses, one backup."""
+    with open(os.path.join(FIXTURES, "dsn.xml"), encoding="utf-8") as f:
+        xml = f.read()
+    base = int(START_TIME.timestamp() * 1000)
+    for i in range(count):
+        with open(os.path.join(directory, f"{base + i * 300000:013d}-primary.xml"), "w", encoding="utf-8") as f:
+            f.write(xml)
+    shutil.copy(os.path.join(FIXTURES, "backup.html"), os.path.join(directory, f"{base:013d}-backup.html"))
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    return {p: np.percentile(values, p) for p in (50, 95, 99)} | {"max": values.max()}
+
+
+def run(captures, scrapes, scale, clients):
+    workdir = tempfile.mkdtemp(prefix="dsn-bench-")
+    try:
+        if captures is None:
+            captures = os.path.join(workdir, "captures")
+            os.makedirs(captures)
+            fixture_captures(captures, 10)
+
+        with open(os.path.join(ROOT, "config", "settings.yaml")) as f:
+            config = yaml.safe_load(f)
+        config["data"].update(replay_dir=captures, replay_speed=0, replay_scale=scale, capture_dir=None)
+        config["database"]["file"] = os.path.join(workdir, "bench.db")
+        config["ml"]["model_path"] = os.path.join(workdir, "models", "model.pkl")
+        config["ml"]["training_data"] = os.path.join(workdir, "training.csv")
+        for model in config["ml"].get("models") or []:
+            model["model_path"] = os.path.join(workdir, "models", os.path.basename(model["model_path"]))
+
+        monitor = SimulatedClockMonitor(config["data"], config["database"])
+        inference = InferenceService.from_config(config["ml"])
+        renderer = PlotRenderer()
+
+        # Small models trained on the replayed records, so predict() does real work.
+        seed = monitor.fetch_dsn_data()
+        frame = records_to_frame(seed * 20, ["timestamp", "signal_strength", "antenna_id", "spacecraft"])
+        frame["communication_duration"] = [random.uniform(600, 30000) for _ in range(len(frame))]
+        frame.to_csv(config["ml"]["training_data"], index=False)
+        for predictor in inference.predictors.values():
+            predictor.train_model()
+
+        app, socketio, emit_update = create_app(config["webapp"], monitor, inference)
+        listeners = [socketio.test_client(app) for _ in range(clients)]
+        for client in listeners:
+            client.get_received()
+
+        stages = {name: [] for name in ("parse", "store", "predict", "plot", "broadcast")}
+        total_records = 0
+        started = time.perf_counter()
+        for _ in range(scrapes):
+            monitor.scrapes += 1
+            t0 = time.perf_counter()
+            records = monitor.refresh_snapshot()
+            t1 = time.perf_counter()
+            monitor.store_data(records)
+            monitor.writer.flush()
+            t2 = time.perf_counter()
+            # The broadcast below reuses this batch, keyed on the installed snapshot.
+            snapshot = monitor.get_snapshot()
+            inference.predict(snapshot)
+            t3 = time.perf_counter()
+            renderer.get(renderer.submit([record.to_dict() for record in records]), timeout=30)
+            t4 = time.perf_counter()
+            emit_update(snapshot)
+            delivered = sum(len(client.get_received()) for client in listeners)
+            t5 = time.perf_counter()
+            if delivered != clients:
+                raise SystemExit(f"broadcast reached {delivered} of {clients} clients")
+
+            for name, elapsed in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                stages[name].append(elapsed)
+            total_records += len(records)
+        wall = time.perf_counter() - started
+
+        print(f"scrapes: {scrapes}  records/scrape: {total_records // scrapes}  clients: {clients}")
+        print(f"{'stage':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, samples in stages.items():
+            p = percentiles(samples)
+            print(f"{name:<10} {p[50]:9.2f} {p[95]:9.2f} {p[99]:9.2f} {p['max']:9.2f}")
+        print(f"throughput: {scrapes / wall:.1f} scrapes/s, {total_records / wall:.0f} records/s")
+
+        for client in listeners:
+            client.disconnect()
+        renderer.close()
+        inference.close()
+        monitor.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--captures", help="Directory of recorded responses (data.capture_dir)")
+    parser.add_argument("--scrapes", type=int, default=100)
+    parser.add_argument("--scale", type=int, default=1, help="Multiply dishes and signals per feed")
+    parser.add_argument("--clients", type=int, default=20, help="Connected websocket clients")
+    args = parser.parse_args()
+    run(args.captures, args.scrapes, args.scale, args.clients)
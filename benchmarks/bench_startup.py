@@ -0,0 +1,114 @@
+"""
+Startup benchmark: time-to-first-scrape and time-to-listening-socket.
+
+Launches src/main.py as a fresh interpreter against a temporary config
+that replays the fixtures (no network), and times how long each command
+takes to store its first scrape or accept a TCP connection. Also reports
+the cost of a bare `import src`.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--commands scrape,serve,run]
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+MAIN = os.path.join(ROOT, "src", "main.py")
+SCRAPED = "Data fetched and stored successfully."
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_config(workdir, port):
+    with open(os.path.join(ROOT, "config", "settings.yaml")) as f:
+        config = yaml.safe_load(f)
+    captures = os.path.join(workdir, "captures")
+    os.makedirs(captures, exist_ok=True)
+    # One primary and one backup capture; the replay loops over them.
+    shutil.copy(os.path.join(FIXTURES, "dsn.xml"), os.path.join(captures, f"{1718899200000:013d}-primary.xml"))
+    shutil.copy(os.path.join(FIXTURES, "backup.html"), os.path.join(captures, f"{1718899200000:013d}-backup.html"))
+    config["data"].update(replay_dir=captures, replay_speed=0, replay_scale=1, capture_dir=None)
+    config["database"]["file"] = os.path.join(workdir, "bench.db")
+    config["ml"]["model_path"] = os.path.join(workdir, "models", "model.pkl")
+    config["ml"]["training_data"] = os.path.join(workdir, "training.csv")
+    config["webapp"].update(host="127.0.0.1", port=port, debug=False)
+    path = os.path.join(workdir, "settings.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def accepts(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+            return True
+    except OSError:
+        return False
+
+
+def time_command(command, timeout=120):
+    """Seconds until the command's first scrape ('scrape') or open port (others)."""
+    workdir = tempfile.mkdtemp(prefix="dsn-startup-")
+    port = free_port()
+    config_path = write_config(workdir, port)
+    log_path = os.path.join(workdir, "out.log")
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-u", MAIN, command, "--config", config_path],
+                                   stdout=log, stderr=subprocess.STDOUT)
+        try:
+            while time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    break
+                if command == "scrape":
+                    with open(log_path) as f:
+                        if SCRAPED in f.read():
+                            return time.perf_counter() - start
+                elif accepts(port):
+                    return time.perf_counter() - start
+                time.sleep(0.01)
+            with open(log_path) as f:
+                raise SystemExit(f"'{command}' did not come up:\n{f.read()}")
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def time_import(module):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--commands", default="scrape,serve,run")
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_import("sys") for _ in range(args.runs))
+    package = statistics.median(time_import("src") for _ in range(args.runs))
+    print(f"{'import src':<36} {package * 1000:8.0f} ms  (bare interpreter {baseline * 1000:.0f} ms)")
+    for command in args.commands.split(","):
+        label = "time-to-first-scrape" if command == "scrape" else "time-to-listening-socket"
+        samples = [time_command(command) for _ in range(args.runs)]
+        print(f"{command + ' ' + label:<36} {statistics.median(samples) * 1000:8.0f} ms  "
+              f"(min {min(samples) * 1000:.0f}, max {max(samples) * 1000:.0f})")
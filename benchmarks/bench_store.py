@@ -0,0 +1,93 @@
+"""
+Compare SQLite write throughput of the legacy per-scrape store_data path
+against the batched SQLiteWriter feeding the indexed history store.
+
+Usage: python benchmarks/bench_store.py [--scrapes N] [--rows-per-scrape M]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from history import LEGACY_COLUMNS, HistoryStore  # noqa: E402
+from records import format_range  # noqa: E402
+from storage import SQLiteWriter  # noqa: E402
+
+TABLE = "communication_logs"
+
+
+def make_rows(count, offset=0):
+    rows = []
+    for i in range(count):
+        rows.append((
+            1704067200 + 300 * offset,
+            f"SC{i % 40}",
+            f"DSS-{i % 12}",
+            -150.0 + i % 30,
+            0,
+            1000.0 * (i % 7),
+            8.4e9,
+            120.0,
+            45.0,
+            1.5e9,
+        ))
+    return rows
+
+
+def legacy_store(db_file, rows):
+    """What store_data did before the writer: connect, create, row-by-row."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT, spacecraft TEXT, antenna_id TEXT,
+            signal_strength REAL, communication_duration REAL,
+            data_rate REAL, frequency REAL, azimuth REAL, elevation REAL,
+            spacecraft_range REAL, range_display TEXT
+        )
+    """)
+    columns = LEGACY_COLUMNS + ("range_display",)
+    query = f"INSERT INTO {TABLE} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    for row in rows:
+        cursor.execute(query, row + (format_range(row[-1]),))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def run(scrapes, rows_per_scrape):
+    total = scrapes * rows_per_scrape
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "legacy.db")
+        start = time.perf_counter()
+        for n in range(scrapes):
+            legacy_store(db_file, make_rows(rows_per_scrape, n))
+        legacy = time.perf_counter() - start
+
+        db_file = os.path.join(tmp, "writer.db")
+        writer = SQLiteWriter(db_file, [HistoryStore(db_file, TABLE)], flush_interval=0.05)
+        writer.start()
+        start = time.perf_counter()
+        for n in range(scrapes):
+            writer.put(make_rows(rows_per_scrape, n))
+        writer.flush()
+        batched = time.perf_counter() - start
+        writer.stop()
+
+    print(f"rows: {total} ({scrapes} scrapes x {rows_per_scrape})")
+    print(f"legacy store_data : {total / legacy:12.0f} rows/sec ({legacy:.3f} s)")
+    print(f"SQLiteWriter      : {total / batched:12.0f} rows/sec ({batched:.3f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scrapes", type=int, default=200)
+    parser.add_argument("--rows-per-scrape", type=int, default=50)
+    args = parser.parse_args()
+    run(args.scrapes, args.rows_per_scrape)
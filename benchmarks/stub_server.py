@@ -0,0 +1,94 @@
+"""
+Local stand-in for the DSNNow XML feed and the Canberra backup page.
+
+Serves /dsn.xml and /backup.html from benchmarks/fixtures with optional
+artificial latency, failures and ETag / Last-Modified support, so fetch
+behaviour can be measured without network access.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LAST_MODIFIED = "Thu, 20 Jun 2024 16:00:00 GMT"
+
+
+class StubFeedServer:
+    def __init__(self, primary_delay=0.0, backup_delay=0.0, primary_status=200, conditional=True):
+        self.primary_delay = primary_delay
+        self.backup_delay = backup_delay
+        self.primary_status = primary_status
+        self.conditional = conditional
+        self.hits = {"primary": 0, "backup": 0, "not_modified": 0}
+        self.bodies = {}
+        for name in ("dsn.xml", "backup.html"):
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                self.bodies[name] = f.read()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def primary_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/dsn.xml"
+
+    @property
+    def backup_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/backup.html"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.split("?")[0].lstrip("/")
+                if name not in stub.bodies:
+                    self.send_error(404)
+                    return
+                primary = name == "dsn.xml"
+                stub.hits["primary" if primary else "backup"] += 1
+                time.sleep(stub.primary_delay if primary else stub.backup_delay)
+                if primary and stub.primary_status != 200:
+                    self.send_response(stub.primary_status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = stub.bodies[name]
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if stub.conditional and (self.headers.get("If-None-Match") == etag
+                                         or self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+                    stub.hits["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/xml" if primary else "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                if stub.conditional:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -4,11 +4,32 @@ This module contains the core functionality of the NASA-DSN-E project.
 It includes the following submodules:
 - monitor: Handles data collection and storage
 - predict: Handles model training and prediction
+- inference: Batches dashboard predictions across every configured model
 - webapp: Handles the web application
+
+Submodules are imported on first attribute access, so `import src` stays
+cheap and a scraper never loads Flask or scikit-learn.
 """
 
-from .monitor import DSNMonitor
-from .predict import DSNPredictor
-from .webapp import create_app
+import importlib
+
+_EXPORTS = {
+    "DSNMonitor": ".monitor",
+    "DSNPredictor": ".predict",
+    "InferenceService": ".inference",
+    "create_app": ".webapp",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["DSNMonitor", "DSNPredictor", "create_app"]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
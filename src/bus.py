@@ -0,0 +1,24 @@
+class ProcessBus:
+    """
+    Snapshot bus from the scraper process to the web worker processes.
+
+    Every subscriber gets its own multiprocessing queue, created from the
+    given context so it can be handed to a child process, and publish()
+    fans a message out to all of them. Messages are small dicts; snapshot
+    payloads stay in the SQLite store and are referenced by timestamp.
+    Subscribe every worker before starting it; later subscribers only
+    see later messages.
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self._subscribers = []
+
+    def subscribe(self):
+        subscription = self._context.Queue()
+        self._subscribers.append(subscription)
+        return subscription
+
+    def publish(self, message):
+        for subscription in self._subscribers:
+            subscription.put(message)
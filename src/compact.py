@@ -0,0 +1,370 @@
+from dataclasses import dataclass
+from itertools import groupby
+import math
+import sqlite3
+
+try:
+    from .history import HISTORY_COLUMNS, HistoryStore, to_epoch
+    from .storage import connect_reader
+except ImportError:  # Running as a script from src/
+    from history import HISTORY_COLUMNS, HistoryStore, to_epoch
+    from storage import connect_reader
+
+VALUE_COLUMNS = HISTORY_COLUMNS[3:]
+# Values that move steadily through a pass (dish pointing, Doppler, range)
+# are stored as a start value and a per-second rate; the rest are held.
+LINEAR_COLUMNS = ("frequency", "azimuth", "elevation", "spacecraft_range")
+_LINEAR = [VALUE_COLUMNS.index(column) for column in LINEAR_COLUMNS]
+
+DEFAULT_TOLERANCES = {
+    "signal_strength": 0.5,  # dB
+    "data_rate": 0.0,  # b/s
+    "frequency": 1000.0,  # Hz
+    "azimuth": 0.5,  # Degrees
+    "elevation": 0.5,  # Degrees
+    "spacecraft_range": 1000.0,  # m
+}
+
+# Last ts of a run that is still being extended.
+OPEN = 2 ** 62
+# Runs are cut at this length, so a read at time t only has to look at runs
+# that started within MAX_RUN seconds before it.
+MAX_RUN = 6 * 3600
+
+
+@dataclass(slots=True)
+class Run:
+    """
+    A run's values as of first_ts and the rates of the linear ones, in
+    VALUE_COLUMNS order. slopes holds, per linear column, the range of rates
+    that keeps every sample so far within tolerance.
+    """
+
+    id: int
+    first_ts: int
+    values: list
+    rates: list
+    slopes: dict
+    closed: bool = False
+
+
+class CompactHistoryStore(HistoryStore):
+    """
+    History stored as runs: one row per stretch of scrapes over which a
+    spacecraft/antenna signal stayed within tolerance of its prediction
+    (held values, or start value plus rate for LINEAR_COLUMNS).
+
+    Spacecraft and antenna names live in dictionary tables, scrape times
+    in {table}_scrapes, runs in {table}_runs. {table} is a view that
+    rebuilds one row per signal per scrape, so every reader sees the same
+    columns as with the row layout. Values come back within the configured
+    tolerance of what was scraped; a tolerance of 0 stores them exactly.
+    """
+
+    def __init__(self, db_file, table, tolerances=None):
+        super().__init__(db_file, table)
+        tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self.tolerances = [float(tolerances.get(column, 0.0)) for column in VALUE_COLUMNS]
+        self.runs = f"{table}_runs"
+        self.scrapes = f"{table}_scrapes"
+        self._dictionaries = {"spacecraft": f"{table}_spacecraft", "antenna": f"{table}_antennas"}
+        self._keys = {"spacecraft": {}, "antenna": {}}
+        self._scrape_ts = None
+        self._previous_ts = None
+        self._current = {}  # (spacecraft, antenna_id, slot) -> Run covering the latest scrape
+        self._previous = {}  # Runs of the previous scrape not (yet) seen in the latest one
+        self._slots = {}
+
+    def _create_table(self, conn, name):
+        for dictionary in self._dictionaries.values():
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {dictionary} (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.scrapes} (ts INTEGER PRIMARY KEY)")
+        values = ", ".join(
+            f"{column} REAL, {column}_rate REAL" if column in LINEAR_COLUMNS else f"{column} REAL"
+            for column in VALUE_COLUMNS
+        )
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.runs} (
+                id INTEGER PRIMARY KEY,
+                spacecraft_key INTEGER,
+                antenna_key INTEGER,
+                slot INTEGER NOT NULL,
+                first_ts INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,
+                {values}
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.runs}_first ON {self.runs} (first_ts)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.runs}_pair_first "
+                     f"ON {self.runs} (spacecraft_key, antenna_key, first_ts)")
+        conn.execute(f"DROP VIEW IF EXISTS {name}")
+        conn.execute(f"CREATE VIEW {name} AS SELECT r.id AS id, {self._columns()} {self._source()}")
+
+    def _columns(self):
+        values = [
+            f"r.{column} + r.{column}_rate * (s.ts - r.first_ts) AS {column}" if column in LINEAR_COLUMNS
+            else f"r.{column} AS {column}"
+            for column in VALUE_COLUMNS
+        ]
+        return ", ".join(["s.ts AS ts", "sc.name AS spacecraft", "an.name AS antenna_id"] + values)
+
+    def _source(self):
+        # Scrapes drive the join: each one probes only runs started in the
+        # MAX_RUN seconds before it, through the first_ts indexes.
+        return (
+            f"FROM {self.scrapes} AS s "
+            f"CROSS JOIN {self.runs} AS r ON r.first_ts BETWEEN s.ts - {MAX_RUN} AND s.ts AND r.last_ts >= s.ts "
+            f"LEFT JOIN {self._dictionaries['spacecraft']} AS sc ON sc.id = r.spacecraft_key "
+            f"LEFT JOIN {self._dictionaries['antenna']} AS an ON an.id = r.antenna_key"
+        )
+
+    def _select(self, where):
+        return f"SELECT {self._columns()} {self._source()} WHERE {where} ORDER BY s.ts, r.id"
+
+    def _create_schema(self, conn):
+        # Migration writes runs on top of whatever is already stored.
+        self._create_table(conn, self.table)
+        self._load_state(conn)
+
+    def _replaces(self, columns):
+        return True  # Any row-layout table; {table} is a view here
+
+    def rollback(self, conn):
+        """After a failed batch: reload runs and dictionaries from the committed tables."""
+        self._load_state(conn)
+
+    def _load_state(self, conn):
+        for kind, dictionary in self._dictionaries.items():
+            self._keys[kind] = {name: key for key, name in conn.execute(f"SELECT id, name FROM {dictionary}")}
+        latest = conn.execute(f"SELECT ts FROM {self.scrapes} ORDER BY ts DESC LIMIT 2").fetchall()
+        self._scrape_ts = latest[0][0] if latest else None
+        self._previous_ts = latest[1][0] if len(latest) > 1 else None
+        rates = ", ".join(f"{column}_rate" for column in LINEAR_COLUMNS)
+        self._current, self._previous, self._slots = {}, {}, {}
+        for row in conn.execute(
+                f"SELECT r.id, sc.name, an.name, r.slot, r.first_ts, {', '.join(VALUE_COLUMNS)}, {rates} "
+                f"FROM {self.runs} AS r "
+                f"LEFT JOIN {self._dictionaries['spacecraft']} AS sc ON sc.id = r.spacecraft_key "
+                f"LEFT JOIN {self._dictionaries['antenna']} AS an ON an.id = r.antenna_key "
+                f"WHERE r.first_ts >= ? AND r.last_ts = {OPEN}", ((self._scrape_ts or 0) - MAX_RUN,)):
+            run_id, spacecraft, antenna_id, slot, first_ts = row[:5]
+            rates = self._unpack_rates(row[5 + len(VALUE_COLUMNS):])
+            # Earlier samples are not kept, so a resumed run's rates are fixed.
+            self._current[(spacecraft, antenna_id, slot)] = Run(
+                run_id, first_ts, list(row[5:5 + len(VALUE_COLUMNS)]), rates, self._pinned(rates))
+            pair = (spacecraft, antenna_id)
+            self._slots[pair] = max(self._slots.get(pair, 0), slot + 1)
+
+    @staticmethod
+    def _pinned(rates):
+        return {index: (rates[index], rates[index]) for index in _LINEAR if rates[index] is not None}
+
+    @staticmethod
+    def _unpack_rates(linear_rates):
+        rates = [0.0] * len(VALUE_COLUMNS)
+        for index, rate in zip(_LINEAR, linear_rates):
+            rates[index] = rate
+        return rates
+
+    def _key(self, conn, kind, name):
+        if name is None:
+            return None
+        keys = self._keys[kind]
+        key = keys.get(name)
+        if key is None:
+            dictionary = self._dictionaries[kind]
+            conn.execute(f"INSERT OR IGNORE INTO {dictionary} (name) VALUES (?)", (name,))
+            key = keys[name] = conn.execute(f"SELECT id FROM {dictionary} WHERE name = ?", (name,)).fetchone()[0]
+        return key
+
+    def write(self, conn, rows):
+        """Extend, close or start runs for history rows; the caller owns the transaction."""
+        for ts, group in groupby(sorted(rows, key=lambda row: row[0]), key=lambda row: row[0]):
+            if self._scrape_ts is not None and ts < self._scrape_ts:
+                self._write_past(conn, ts, list(group))
+                continue
+            if ts != self._scrape_ts:
+                self._close_missing(conn)
+                conn.execute(f"INSERT OR IGNORE INTO {self.scrapes} (ts) VALUES (?)", (ts,))
+                self._previous, self._current, self._slots = self._current, {}, {}
+                self._previous_ts, self._scrape_ts = self._scrape_ts, ts
+            for row in group:
+                self._observe(conn, ts, row)
+        self._close_missing(conn)
+
+    def _close_missing(self, conn):
+        # A run missing from the latest scrape ended at the previous one. It
+        # is reopened if the rest of that scrape arrives in a later batch.
+        closing = [run for run in self._previous.values() if not run.closed]
+        conn.executemany(f"UPDATE {self.runs} SET last_ts = ? WHERE id = ?",
+                         [(self._previous_ts, run.id) for run in closing])
+        for run in closing:
+            run.closed = True
+
+    def _observe(self, conn, ts, row):
+        pair = (row[1], row[2])
+        slot = self._slots.get(pair, 0)
+        self._slots[pair] = slot + 1
+        key = pair + (slot,)
+        values = row[3:]
+        run = self._previous.pop(key, None)
+        if run is not None:
+            if self._extend(conn, run, ts, values):
+                self._current[key] = run
+                return
+            if not run.closed:
+                conn.execute(f"UPDATE {self.runs} SET last_ts = ? WHERE id = ?", (self._previous_ts, run.id))
+        self._current[key] = self._start(conn, pair, slot, ts, values, OPEN)
+
+    def _extend(self, conn, run, ts, values):
+        """Add a sample to run if every value stays within tolerance of the run's line."""
+        dt = ts - run.first_ts
+        if dt > MAX_RUN or dt <= 0:
+            return False
+        rates, slopes = list(run.rates), dict(run.slopes)
+        for index, (value, start, tolerance) in enumerate(zip(values, run.values, self.tolerances)):
+            if value is None or start is None:
+                if value is not start:
+                    return False
+                continue
+            if index in slopes and tolerance > 0:
+                # Swinging door: narrow the rates that fit every sample so far,
+                # and move the stored rate only once it falls outside them.
+                low, high = slopes[index]
+                low, high = max(low, (value - tolerance - start) / dt), min(high, (value + tolerance - start) / dt)
+                if low > high:
+                    return False
+                slopes[index] = (low, high)
+                if not low <= rates[index] <= high:
+                    rates[index] = (low + high) / 2
+            if abs(start + rates[index] * dt - value) > tolerance:
+                return False
+        if rates != run.rates:
+            conn.execute(f"UPDATE {self.runs} SET {', '.join(f'{c}_rate = ?' for c in LINEAR_COLUMNS)} "
+                         f"WHERE id = ?", [rates[index] for index in _LINEAR] + [run.id])
+            run.rates = rates
+        run.slopes = slopes
+        if run.closed:
+            conn.execute(f"UPDATE {self.runs} SET last_ts = {OPEN} WHERE id = ?", (run.id,))
+            run.closed = False
+        return True
+
+    def _start(self, conn, pair, slot, ts, values, last_ts):
+        rates = [0.0 if value is not None else None for value in values]
+        columns = ", ".join(
+            f"{column}, {column}_rate" if column in LINEAR_COLUMNS else column for column in VALUE_COLUMNS)
+        params = [self._key(conn, "spacecraft", pair[0]), self._key(conn, "antenna", pair[1]), slot, ts, last_ts]
+        for index, value in enumerate(values):
+            params.append(value)
+            if index in _LINEAR:
+                params.append(rates[index])
+        cursor = conn.execute(
+            f"INSERT INTO {self.runs} (spacecraft_key, antenna_key, slot, first_ts, last_ts, {columns}) "
+            f"VALUES ({', '.join('?' for _ in params)})", params)
+        slopes = {index: (-math.inf, math.inf) for index in _LINEAR if values[index] is not None}
+        return Run(cursor.lastrowid, ts, list(values), rates, slopes)
+
+    def _write_past(self, conn, ts, rows):
+        """Rows behind the latest scrape (imports, migrations) are stored as one-sample runs."""
+        if conn.execute(f"SELECT 1 FROM {self.scrapes} WHERE ts = ?", (ts,)).fetchone() is None:
+            # Runs spanning a new scrape time would claim it; cut that instant out of them.
+            self._split(conn, ts)
+            self._split(conn, ts + 1)
+            conn.execute(f"DELETE FROM {self.runs} WHERE first_ts = ? AND last_ts = ?", (ts, ts))
+            conn.execute(f"INSERT INTO {self.scrapes} (ts) VALUES (?)", (ts,))
+        slots = {}
+        for row in rows:
+            pair = (row[1], row[2])
+            slots[pair] = slots.get(pair, 0) + 1
+            self._start(conn, pair, slots[pair] - 1, ts, row[3:], ts)
+
+    def _split(self, conn, at, pair_keys=None):
+        """Cut every run that spans at into one ending at - 1 and one starting at at."""
+        where = "first_ts < ? AND first_ts >= ? AND last_ts >= ?"
+        params = [at, at - MAX_RUN, at]
+        if pair_keys is not None:
+            where += " AND spacecraft_key IS ? AND antenna_key IS ?"
+            params += list(pair_keys)
+        touched = [run_id for (run_id,) in conn.execute(f"SELECT id FROM {self.runs} WHERE {where}", params)]
+        if not touched:
+            return
+        columns = ", ".join(
+            f"{column}, {column}_rate" if column in LINEAR_COLUMNS else column for column in VALUE_COLUMNS)
+        conn.execute(
+            f"INSERT INTO {self.runs} (spacecraft_key, antenna_key, slot, first_ts, last_ts, {columns}) "
+            f"SELECT spacecraft_key, antenna_key, slot, first_ts, ? - 1, {columns} FROM {self.runs} WHERE {where}",
+            [at] + params)
+        # The original row keeps its id (and open runs stay open) as the later part.
+        shifted = ", ".join(f"{column} = {column} + {column}_rate * (? - first_ts)" for column in LINEAR_COLUMNS)
+        conn.execute(f"UPDATE {self.runs} SET {shifted}, first_ts = ? WHERE {where}",
+                     [at] * (len(LINEAR_COLUMNS) + 1) + params)
+        runs = {run.id: run for run in (*self._current.values(), *self._previous.values())}
+        for run_id in touched:
+            if run_id in runs:
+                run = runs[run_id]
+                for index in _LINEAR:
+                    if run.values[index] is not None:
+                        run.values[index] += run.rates[index] * (at - run.first_ts)
+                run.first_ts = at
+                run.slopes = self._pinned(run.rates)
+
+    def set_duration(self, conn, spacecraft, antenna_id, start_ts, end_ts, duration):
+        """Label a pair's runs in [start_ts, end_ts] with a measured pass duration."""
+        keys = (self._keys["spacecraft"].get(spacecraft), self._keys["antenna"].get(antenna_id))
+        if (spacecraft is not None and keys[0] is None) or (antenna_id is not None and keys[1] is None):
+            return  # Pair never stored
+        # Cut runs at the pass boundaries so only samples inside it are labelled.
+        self._split(conn, start_ts, keys)
+        self._split(conn, end_ts + 1, keys)
+        conn.execute(
+            f"UPDATE {self.runs} SET communication_duration = ? "
+            f"WHERE spacecraft_key IS ? AND antenna_key IS ? AND first_ts >= ? AND first_ts <= ?",
+            (duration, keys[0], keys[1], start_ts, end_ts),
+        )
+
+    def query(self, spacecraft, antenna_id, start, end, limit=None):
+        """Return DSNRecords for a spacecraft/antenna pair in [start, end], oldest first."""
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        query = self._select(
+            f"s.ts BETWEEN ? AND ? "
+            f"AND r.spacecraft_key = (SELECT id FROM {self._dictionaries['spacecraft']} WHERE name = ?) "
+            f"AND r.antenna_key = (SELECT id FROM {self._dictionaries['antenna']} WHERE name = ?)"
+        )
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self._read(query, [start_ts, end_ts, spacecraft, antenna_id])
+
+    def latest_ts(self):
+        """Timestamp of the newest stored scrape, or None."""
+        try:
+            conn = connect_reader(self.db_file)
+        except sqlite3.Error:
+            return None
+        try:
+            return conn.execute(f"SELECT MAX(ts) FROM {self.scrapes}").fetchone()[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    def iter_chunks(self, start_ts=None, end_ts=None, chunk_size=100000):
+        """Stream rebuilt history rows with start_ts <= ts < end_ts, oldest first, in chunks."""
+        conn = connect_reader(self.db_file)
+        try:
+            cursor = conn.execute(self._select("s.ts >= ? AND s.ts < ?"),
+                                  (start_ts if start_ts is not None else -OPEN, end_ts if end_ts is not None else OPEN))
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            conn.close()
+
+    def records_between(self, start_ts, end_ts):
+        """Return DSNRecords for every pair with start_ts <= ts < end_ts, oldest first."""
+        return self._read(self._select("s.ts >= ? AND s.ts < ?"), [start_ts, end_ts])
+
+    def records_at(self, ts):
+        """Return the snapshot rebuilt for a single scrape timestamp."""
+        return self._read(self._select("s.ts = ?"), [ts])
@@ -0,0 +1,316 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+try:
+    from .bus import ProcessBus
+    from .forecast import PassForecaster
+    from . import metrics
+    from .monitor import DSNMonitor
+    from .inference import InferenceService
+    from .predict import DSNPredictor, model_configs
+    from .scheduler import AdaptiveScheduler
+    from .training import TrainingEngine, report, train_models, training_options
+except ImportError:  # Running as a script from src/
+    from bus import ProcessBus
+    from forecast import PassForecaster
+    import metrics
+    from monitor import DSNMonitor
+    from inference import InferenceService
+    from predict import DSNPredictor, model_configs
+    from scheduler import AdaptiveScheduler
+    from training import TrainingEngine, report, train_models, training_options
+
+
+def data_fetching_loop(monitor, trainer, scheduler, retrain_interval, emit_update, stop_event):
+    next_retrain = time.monotonic() + retrain_interval
+    mode = None
+    while not stop_event.is_set():
+        try:
+            data = monitor.refresh_snapshot()
+            monitor.store_data(data)
+            print("Data fetched and stored successfully.")
+
+            # Emit update through WebSocket
+            emit_update(monitor.get_snapshot())
+            # An empty feed is news (every contact ended); only errors back off.
+            delay = scheduler.failure() if monitor.last_fetch_failed else scheduler.observe(data)
+
+        except Exception as e:
+            metrics.SCRAPE_ERRORS.inc()
+            print(f"Error in data fetching loop: {e}")
+            delay = scheduler.failure()
+
+        metrics.SCRAPE_DELAY.set(delay)
+        if scheduler.mode != mode:
+            mode = scheduler.mode
+            print(f"Scrape schedule: {mode}, next in {delay:.0f} seconds.")
+
+        # Retraining keeps its own clock: a due round is submitted while
+        # waiting for the next scrape, never by delaying or moving it.
+        next_scrape = time.monotonic() + delay
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_retrain:
+                # Training runs in its own process; scraping carries on meanwhile.
+                if trainer.submit():
+                    print("Started incremental retrain.")
+                next_retrain = now + retrain_interval
+            if now >= next_scrape:
+                break
+            stop_event.wait(min(next_scrape, next_retrain) - now)
+
+
+def _make_trainer(config, inference=None):
+    on_complete = None
+    if inference is not None:
+        on_complete = lambda result: inference.reload() if result["status"] == "trained" else None
+    return TrainingEngine(config["ml"], config["database"], on_complete=on_complete)
+
+
+def _stop_on_signals():
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    return stop_event
+
+
+def _observe(config, serve_metrics=False):
+    """Arm the SIGUSR1 profiler and, for processes with no web app, a /metrics listener."""
+    metrics_config = config.get("metrics", {})
+    metrics.install_profiler_signal(metrics_config.get("profile_dir", "profiles"),
+                                    interval=metrics_config.get("profile_interval", 0.01))
+    if serve_metrics and metrics_config.get("port"):
+        return metrics.serve(metrics_config.get("host", "0.0.0.0"), metrics_config["port"])
+    return None
+
+
+def _build_web(config, monitor, inference):
+    # Flask, Socket.IO and (on first plot) matplotlib load only in processes that serve.
+    try:
+        from .webapp import create_app
+    except ImportError:  # Running as a script from src/
+        from webapp import create_app
+    return create_app(config["webapp"], monitor, inference, _make_forecaster(config))
+
+
+def _serve_in_thread(socketio, app, host, port):
+    server = threading.Thread(
+        target=socketio.run,
+        args=(app,),
+        kwargs=dict(host=host, port=port, debug=False, use_reloader=False, allow_unsafe_werkzeug=True),
+        daemon=True
+    )
+    server.start()
+    return server
+
+
+def _make_scheduler(config):
+    data_config = config["data"]
+    interval = data_config["scrape_interval"]
+    return AdaptiveScheduler(
+        base_interval=interval,
+        min_interval=data_config.get("min_scrape_interval", interval),
+        max_interval=data_config.get("max_scrape_interval", interval),
+        signal_change=data_config.get("signal_change_db", 3.0),
+        max_backoff=data_config.get("max_backoff", 1800),
+        jitter=data_config.get("jitter", 0.1),
+    )
+
+
+def _make_forecaster(config):
+    forecast_config = config.get("forecast", {})
+    return PassForecaster(
+        horizon_hours=forecast_config.get("horizon_hours", 24),
+        max_hours=forecast_config.get("max_hours", 72),
+        step_seconds=forecast_config.get("step_seconds", 60),
+        min_elevation=forecast_config.get("min_elevation", 10.0),
+        lookback_hours=forecast_config.get("lookback_hours", 6),
+    )
+
+
+def run_single(config):
+    """Scraper thread, trainer and web server in one process (development)."""
+    monitor = DSNMonitor(config["data"], config["database"])
+    inference = InferenceService.from_config(config["ml"])
+    app, socketio, emit_update = _build_web(config, monitor, inference)
+    trainer = _make_trainer(config, inference)
+    _observe(config)
+
+    def publish_snapshot(records):
+        # The index labels passes this scrape closed from the store, so commit them first.
+        monitor.writer.flush()
+        emit_update(records)
+
+    stop_event = threading.Event()
+    scheduler = _make_scheduler(config)
+    retrain_interval = config["ml"]["retrain_interval"]
+    data_thread = threading.Thread(
+        target=data_fetching_loop,
+        args=(monitor, trainer, scheduler, retrain_interval, publish_snapshot, stop_event),
+        daemon=True
+    )
+    data_thread.start()
+    print(f"Started data fetching thread (interval: {scheduler.min_interval}-{scheduler.max_interval} seconds)")
+
+    try:
+        socketio.run(
+            app,
+            host=config["webapp"]["host"],
+            port=config["webapp"]["port"],
+            debug=config["webapp"]["debug"],
+            use_reloader=False,
+            allow_unsafe_werkzeug=True
+        )
+    finally:
+        stop_event.set()
+        data_thread.join(timeout=config["data"].get("fetch_timeout", 10) + 5)
+        trainer.close()
+        inference.close()
+        monitor.close()
+
+
+def follow_bus(subscription, monitor, inference, emit_update):
+    """Apply bus messages until a stop message: reload models, or load and push a stored snapshot."""
+    while True:
+        message = subscription.get()
+        if message["type"] == "stop":
+            return
+        if message["type"] == "model":
+            inference.reload()
+        elif message["type"] == "snapshot":
+            records = monitor.history.records_at(message["ts"])
+            if records:
+                monitor.install_snapshot(records)
+                emit_update(monitor.get_snapshot())
+
+
+def web_worker(config, index, subscription):
+    """
+    One web process: serves HTTP/websocket clients on port + index and
+    republishes snapshots announced by the scraper process.
+    """
+    # The parent coordinates shutdown; ignore the terminal's Ctrl-C here.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _observe(config)
+
+    monitor = DSNMonitor(config["data"], config["database"])
+    inference = InferenceService.from_config(config["ml"])
+    app, socketio, emit_update = _build_web(config, monitor, inference)
+    port = config["webapp"]["port"] + index
+    _serve_in_thread(socketio, app, config["webapp"]["host"], port)
+    print(f"Web worker {index} listening on port {port}")
+
+    try:
+        follow_bus(subscription, monitor, inference, emit_update)
+    finally:
+        inference.close()
+        monitor.close()
+        print(f"Web worker {index} stopped.")
+
+
+def run_production(config):
+    """
+    One scraper/trainer process plus N web worker processes.
+
+    The scraper stores each snapshot in SQLite and announces its timestamp
+    on a ProcessBus; workers load it from the store and push it to their
+    own websocket clients. Workers listen on consecutive ports starting at
+    webapp.port, so put a load balancer with sticky sessions in front.
+    """
+    context = multiprocessing.get_context("spawn")
+    bus = ProcessBus(context)
+    workers = []
+    for index in range(config["webapp"].get("workers", 2)):
+        process = context.Process(target=web_worker, args=(config, index, bus.subscribe()),
+                                  name=f"web-{index}")
+        process.start()
+        workers.append(process)
+
+    stop_event = _stop_on_signals()
+    _observe(config, serve_metrics=True)
+    monitor = DSNMonitor(config["data"], config["database"])
+    trainer = _make_trainer(config)
+    trainer.on_complete = lambda result: bus.publish({"type": "model"}) if result["status"] == "trained" else None
+
+    def publish_snapshot(records):
+        if records:
+            # Workers read the snapshot back from the store, so it must be committed first.
+            monitor.writer.flush()
+            bus.publish({"type": "snapshot", "ts": records[0].ts})
+
+    print(f"Scraper running with {len(workers)} web workers.")
+    try:
+        data_fetching_loop(monitor, trainer, _make_scheduler(config),
+                           config["ml"]["retrain_interval"], publish_snapshot, stop_event)
+    finally:
+        print("Shutting down...")
+        bus.publish({"type": "stop"})
+        for process in workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        trainer.close()
+        monitor.close()
+
+
+def run_scraper(config):
+    """Scrape, store and retrain only; no web server, Flask never imported."""
+    stop_event = _stop_on_signals()
+    _observe(config, serve_metrics=True)
+    monitor = DSNMonitor(config["data"], config["database"])
+    trainer = _make_trainer(config)
+    scheduler = _make_scheduler(config)
+    print(f"Scraper running (interval: {scheduler.min_interval}-{scheduler.max_interval} seconds)")
+    try:
+        data_fetching_loop(monitor, trainer, scheduler,
+                           config["ml"]["retrain_interval"], lambda records: None, stop_event)
+    finally:
+        trainer.close()
+        monitor.close()
+
+
+def run_server(config):
+    """
+    Serve the dashboard only, following a scraper that writes the same
+    database: the newest stored scrape is picked up every poll_interval
+    seconds, and new model versions are reloaded as they appear.
+    """
+    stop_event = _stop_on_signals()
+    _observe(config)
+    monitor = DSNMonitor(config["data"], config["database"])
+    inference = InferenceService.from_config(config["ml"])
+    app, socketio, emit_update = _build_web(config, monitor, inference)
+    _serve_in_thread(socketio, app, config["webapp"]["host"], config["webapp"]["port"])
+    print(f"Serving on port {config['webapp']['port']}")
+
+    last_ts = None
+    try:
+        while not stop_event.is_set():
+            ts = monitor.history.latest_ts()
+            if ts is not None and ts != last_ts:
+                records = monitor.history.records_at(ts)
+                if records:
+                    monitor.install_snapshot(records)
+                    inference.reload()
+                    emit_update(monitor.get_snapshot())
+                    last_ts = ts
+            stop_event.wait(config["webapp"].get("poll_interval", 5))
+    finally:
+        inference.close()
+        monitor.close()
+
+
+def run_training(config, from_file=None):
+    """
+    Run one training round in this process and exit. from_file ("" for
+    ml.training_data) trains from a CSV, Parquet or Arrow file instead of
+    the stored history.
+    """
+    configs = model_configs(config["ml"]).values()
+    if from_file is not None:
+        for ml_config in configs:
+            DSNPredictor(ml_config).train_model(from_file or None)
+        return
+    report(train_models([training_options(ml_config, config["database"]) for ml_config in configs]))
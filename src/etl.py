@@ -0,0 +1,259 @@
+import csv
+import os
+import sqlite3
+
+try:
+    from .history import HISTORY_COLUMNS, open_history, to_epoch
+    from .passes import Sessionizer
+    from .rollups import RollupStore
+    from .storage import WRITER_PRAGMAS, SQLiteWriter, connect_reader
+except ImportError:  # Running as a script from src/
+    from history import HISTORY_COLUMNS, open_history, to_epoch
+    from passes import Sessionizer
+    from rollups import RollupStore
+    from storage import WRITER_PRAGMAS, SQLiteWriter, connect_reader
+
+# Parquet and Arrow need pyarrow, which is optional; CSV works without it.
+FORMATS = {
+    ".parquet": "parquet", ".pq": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+    ".csv": "csv",
+}
+
+
+def file_format(path):
+    """parquet, arrow or csv, from the file extension."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file type '{suffix}'; use one of {', '.join(sorted(FORMATS))}")
+    return FORMATS[suffix]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet and Arrow files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def history_schema(pa):
+    """Arrow schema of an exported history file."""
+    return pa.schema(
+        [("ts", pa.int64()), ("spacecraft", pa.string()), ("antenna_id", pa.string())]
+        + [(column, pa.float64()) for column in HISTORY_COLUMNS[3:]]
+    )
+
+
+def export_history(db_config, path, start_ts=None, end_ts=None, chunk_rows=100000, compression="zstd"):
+    """
+    Stream history rows with start_ts <= ts < end_ts to path, oldest first.
+
+    The file is written under a temporary name and renamed when complete.
+    Returns the number of rows written.
+    """
+    fmt = file_format(path)
+    if not os.path.exists(db_config["file"]):
+        raise FileNotFoundError(f"No database at {db_config['file']}")
+    history = open_history(db_config)
+    chunks = history.iter_chunks(start_ts, end_ts, chunk_size=chunk_rows)
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rows = 0
+    try:
+        if fmt == "csv":
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(HISTORY_COLUMNS)
+                for chunk in chunks:
+                    writer.writerows(chunk)
+                    rows += len(chunk)
+        else:
+            pa = _pyarrow()
+            schema = history_schema(pa)
+            if fmt == "parquet":
+                writer = pa.parquet.ParquetWriter(tmp_path, schema, compression=compression)
+                write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer = pa.ipc.new_file(tmp_path, schema)
+                write = writer.write_batch
+            try:
+                for chunk in chunks:
+                    # Transpose the row tuples into one Arrow array per column.
+                    write(pa.RecordBatch.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+                        schema=schema,
+                    ))
+                    rows += len(chunk)
+            finally:
+                writer.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+def _columns_in(path, fmt):
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+    pa = _pyarrow()
+    if fmt == "parquet":
+        return pa.parquet.read_schema(path).names
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def _epoch_or_none(value):
+    try:
+        return to_epoch(value)
+    except (AttributeError, TypeError, ValueError):
+        return None  # Skipped, as the legacy migration does
+
+
+def iter_archive(path, chunk_rows=50000):
+    """
+    Yield lists of history rows (HISTORY_COLUMNS order) from an archive.
+
+    A `ts` column is used as is. Legacy files with a `timestamp` column
+    (epoch or ISO string) are converted like the in-place migration does.
+    Columns the archive lacks are imported as NULL.
+    """
+    fmt = file_format(path)
+    present = _columns_in(path, fmt)
+    time_column = "ts" if "ts" in present else "timestamp"
+    if time_column not in present:
+        raise ValueError(f"{path} has neither a 'ts' nor a 'timestamp' column")
+    wanted = [time_column] + [column for column in HISTORY_COLUMNS[1:] if column in present]
+
+    if fmt == "csv":
+        import pandas as pd
+
+        # Empty cells arrive as NaN; turn them into None (NULL) column-wise.
+        batches = (
+            {column: frame[column].astype(object).where(frame[column].notna(), None).tolist() for column in wanted}
+            for frame in pd.read_csv(path, usecols=wanted, chunksize=chunk_rows)
+        )
+    else:
+        pa = _pyarrow()
+        if fmt == "parquet":
+            batches = (batch.to_pydict() for batch in
+                       pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=wanted))
+        else:
+            reader = pa.ipc.open_file(pa.memory_map(path))
+            batches = (reader.get_batch(i).select(wanted).to_pydict() for i in range(reader.num_record_batches))
+
+    for batch in batches:
+        convert = _epoch_or_none if time_column == "timestamp" else int
+        times = [None if t is None else convert(t) for t in batch[time_column]]
+        missing = [None] * len(times)
+        columns = [times] + [batch.get(column, missing) for column in HISTORY_COLUMNS[1:]]
+        yield [row for row in zip(*columns) if row[0] is not None]
+
+
+def import_archive(db_config, path, chunk_rows=50000, skip_existing=True):
+    """
+    Load an archive through the scraper's SQLiteWriter sinks (history,
+    rollups and passes), committing one chunk at a time.
+
+    The writer's lock makes the import fail while a scraper is writing the
+    same database, whose in-memory rollup and pass state it would desync.
+    With skip_existing, rows whose (ts, spacecraft, antenna_id) are
+    already stored are dropped, so re-importing a file is harmless.
+    Each chunk is sorted by ts. Rows older than the newest scrape stored
+    so far, by the database or an earlier chunk, cannot be folded in
+    incrementally; if any are imported, the rollups covering them are
+    rebuilt and passes are replayed from the whole history at the end.
+    Returns (rows imported, rows skipped).
+    """
+    db_file, table = db_config["file"], db_config["table"]
+    history = open_history(db_config)
+    rollups = RollupStore(db_file, table, prefix=db_config.get("rollup_prefix", "rollup"),
+                          max_gap=db_config.get("contact_max_gap", 900))
+    sessionizer = Sessionizer(history, table=db_config.get("passes_table", "communication_passes"),
+                              max_gap=db_config.get("contact_max_gap", 900))
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+
+    writer = SQLiteWriter(db_file, [history, rollups, sessionizer], batch_size=chunk_rows, max_queue=chunk_rows)
+    writer.start()
+    newest = history.latest_ts()
+    imported = skipped = 0
+    first_ts = last_ts = None  # Range of imported rows behind the live edge
+    reader = connect_reader(db_file)
+    try:
+        for rows in iter_archive(path, chunk_rows):
+            if not rows:
+                continue
+            rows.sort(key=lambda row: row[0])
+            low, high = rows[0][0], rows[-1][0]
+            if skip_existing:
+                existing = set(reader.execute(
+                    f"SELECT ts, spacecraft, antenna_id FROM {table} WHERE ts BETWEEN ? AND ?", (low, high)))
+                fresh = [row for row in rows if row[:3] not in existing]
+                skipped += len(rows) - len(fresh)
+                rows = fresh
+            if not rows:
+                continue
+            written = writer.rows_written
+            writer.put(rows)
+            writer.flush()
+            if writer.rows_written - written != len(rows):
+                # The writer rolled the chunk back; its error has been logged.
+                raise RuntimeError(f"Import stopped after {imported} rows: a chunk failed to write")
+            imported += len(rows)
+            # Rows at the newest ts still join that scrape; only older ones go backwards.
+            if newest is not None and low < newest:
+                first_ts = low if first_ts is None else min(first_ts, low)
+                last_ts = high if last_ts is None else max(last_ts, high)
+            newest = high if newest is None else max(newest, high)
+
+        if first_ts is not None:
+            # Still holding the writer lock, so no scraper starts in between.
+            conn = sqlite3.connect(db_file)
+            try:
+                for pragma in WRITER_PRAGMAS:
+                    conn.execute(pragma)
+                rollups.rebuild(conn, first_ts, last_ts)
+                sessionizer.rebuild(conn)
+                conn.commit()
+            finally:
+                conn.close()
+    finally:
+        reader.close()
+        writer.stop()
+    return imported, skipped
+
+
+def read_frame(path, columns):
+    """
+    Load only the given columns of a CSV, Parquet or Arrow file as a DataFrame.
+
+    `timestamp` is served from an exported file's `ts` column when the file
+    has no `timestamp` of its own.
+    """
+    fmt = file_format(path)
+    present = set(_columns_in(path, fmt))
+    renames = {"ts": "timestamp"} if "timestamp" in columns and "timestamp" not in present else {}
+    source = [{v: k for k, v in renames.items()}.get(column, column) for column in columns]
+    missing = [column for column in source if column not in present]
+    if missing:
+        raise ValueError(f"{path} has no column(s) {', '.join(missing)}")
+
+    if fmt == "csv":
+        import pandas as pd
+
+        frame = pd.read_csv(path, usecols=source)
+    else:
+        pa = _pyarrow()
+        if fmt == "parquet":
+            table = pa.parquet.read_table(path, columns=source)
+        else:
+            # Memory-mapped: the projected columns are the only ones paged in.
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all().select(source)
+        frame = table.to_pandas()
+    return frame.rename(columns=renames)[list(columns)]
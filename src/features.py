@@ -0,0 +1,121 @@
+import numpy as np
+
+# Configured features that hold names rather than numbers.
+CATEGORICAL_FEATURES = ("antenna_id", "spacecraft")
+TIME_FEATURES = ("timestamp", "ts")
+
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+
+
+def _to_epoch_seconds(values):
+    """Epoch seconds from numeric epochs, ISO strings or datetimes."""
+    import pandas as pd
+
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    parsed = pd.to_datetime(series, errors="coerce", format="ISO8601")
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_convert(None)
+    # Through a Timedelta, so the datetime unit (ns in pandas 2, s or us in 3)
+    # does not matter and unparseable values come out as NaN.
+    return ((parsed - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class FeatureEncoder:
+    """
+    Turns the configured ml features into a numeric matrix.
+
+    Categorical features are integer-coded against the categories seen at
+    fit time (unknown values map to -1). Time features expand into
+    hour-of-day and day-of-week sine/cosine pairs plus days elapsed since
+    the earliest training sample. Times are floored to time_resolution
+    seconds so consecutive scrapes of an unchanged contact encode to the
+    same row, which lets the predictor memoize its output.
+    """
+
+    def __init__(self, features, time_resolution=3600):
+        self.features = list(features)
+        self.time_resolution = time_resolution
+        self.categories = {}
+        self.epoch = None
+
+    @property
+    def is_fitted(self):
+        return self.epoch is not None
+
+    def feature_names(self):
+        names = []
+        for feature in self.features:
+            if feature in TIME_FEATURES:
+                names += [f"{feature}_hour_sin", f"{feature}_hour_cos",
+                          f"{feature}_dow_sin", f"{feature}_dow_cos", f"{feature}_days"]
+            else:
+                names.append(feature)
+        return names
+
+    def fit(self, columns):
+        """Learn category codes and the time origin from a DataFrame or column mapping."""
+        self.epoch = 0.0
+        for feature in self.features:
+            values = columns[feature]
+            if feature in CATEGORICAL_FEATURES:
+                uniques = sorted({str(v) for v in values if v is not None and v == v})
+                self.categories[feature] = {value: code for code, value in enumerate(uniques)}
+            elif feature in TIME_FEATURES:
+                seconds = _to_epoch_seconds(values)
+                if len(seconds) and not np.isnan(seconds).all():
+                    self.epoch = float(np.nanmin(seconds))
+        return self
+
+    def partial_fit(self, columns):
+        """
+        Extend an already fitted encoder with categories seen in new data.
+
+        Existing codes never change, so trees grown on earlier batches keep
+        their meaning; the time origin stays fixed after the first fit.
+        """
+        if not self.is_fitted:
+            return self.fit(columns)
+        for feature in self.features:
+            if feature in CATEGORICAL_FEATURES:
+                codes = self.categories.setdefault(feature, {})
+                for value in sorted({str(v) for v in columns[feature] if v is not None and v == v}):
+                    if value not in codes:
+                        codes[value] = len(codes)
+        return self
+
+    def transform(self, columns):
+        """Encode a DataFrame or {feature: values} mapping into a float64 matrix."""
+        if not self.is_fitted:
+            raise ValueError("FeatureEncoder must be fitted before transform")
+        import pandas as pd
+
+        blocks = []
+        for feature in self.features:
+            values = columns[feature]
+            if feature in CATEGORICAL_FEATURES:
+                codes = self.categories[feature]
+                blocks.append(np.fromiter((codes.get(str(v), -1) for v in values),
+                                          dtype=np.float64, count=len(values)))
+            elif feature in TIME_FEATURES:
+                seconds = _to_epoch_seconds(values)
+                seconds = np.floor(seconds / self.time_resolution) * self.time_resolution
+                day_angle = 2 * np.pi * (seconds % SECONDS_PER_DAY) / SECONDS_PER_DAY
+                week_angle = 2 * np.pi * (seconds % SECONDS_PER_WEEK) / SECONDS_PER_WEEK
+                blocks += [np.sin(day_angle), np.cos(day_angle),
+                           np.sin(week_angle), np.cos(week_angle),
+                           (seconds - self.epoch) / SECONDS_PER_DAY]
+            else:
+                blocks.append(pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64))
+        matrix = np.column_stack(blocks) if blocks else np.empty((0, 0))
+        return np.nan_to_num(matrix, nan=0.0)
+
+    def transform_records(self, records):
+        """Encode DSNRecords directly, reading ts for time features."""
+        columns = {}
+        for feature in self.features:
+            attribute = "ts" if feature in TIME_FEATURES else feature
+            columns[feature] = [getattr(record, attribute) for record in records]
+        return self.transform(columns)
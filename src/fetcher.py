@@ -0,0 +1,106 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# body is None when the server answered 304 Not Modified. validators are
+# the response's ETag / Last-Modified, remembered only once the result is
+# handed to the caller.
+FetchResult = namedtuple("FetchResult", ["source", "body", "content_type", "not_modified", "validators"],
+                         defaults=(None,))
+
+
+class FeedFetcher:
+    """
+    Pooled, conditional, hedged HTTP fetcher for the DSN feeds.
+
+    A single requests.Session keeps connections alive between scrapes.
+    ETag / Last-Modified validators are remembered per URL so unchanged
+    feeds come back as 304s. If the primary has not answered within
+    hedge_delay seconds, the backup is requested in parallel and the first
+    successful response wins; a primary that fails outright falls back to
+    the backup immediately instead of after the full timeout. Validators
+    are only stored for the response that is returned: a hedge loser's
+    body is discarded, so its validators must not turn the next request
+    into a 304 for data the caller never saw.
+    """
+
+    def __init__(self, primary_url, backup_url, timeout=10, hedge_delay=3.0, pool_size=4):
+        self.primary_url = primary_url
+        self.backup_url = backup_url
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._validators = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="dsn-fetch")
+
+    def _get(self, source, url, params=None):
+        headers = {}
+        with self._lock:
+            validators = self._validators.get(url, {})
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return FetchResult(source, None, None, True)
+        response.raise_for_status()
+
+        fresh = {}
+        if response.headers.get("ETag"):
+            fresh["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            fresh["last_modified"] = response.headers["Last-Modified"]
+        return FetchResult(source, response.text, response.headers.get("content-type", "").lower(), False, fresh)
+
+    def _accept(self, result):
+        """Remember the validators of a result that is being returned to the caller."""
+        if result.validators is not None:
+            url = self.primary_url if result.source == "primary" else self.backup_url
+            with self._lock:
+                self._validators[url] = result.validators
+        return result
+
+    def forget(self, url):
+        """Drop stored validators so the next request for url is unconditional."""
+        with self._lock:
+            self._validators.pop(url, None)
+
+    def fetch_backup(self):
+        """Fetch only the backup source."""
+        return self._accept(self._get("backup", self.backup_url))
+
+    def fetch(self, params=None):
+        """Fetch the primary feed, hedging to the backup when it is slow."""
+        primary = self._executor.submit(self._get, "primary", self.primary_url, params)
+        try:
+            return self._accept(primary.result(timeout=self.hedge_delay))
+        except FutureTimeout:
+            print(f"DSNNow slower than {self.hedge_delay}s; hedging to backup source.")
+        except requests.RequestException as e:
+            print(f"Failed to fetch from DSNNow: {e}. Trying backup source.")
+            return self.fetch_backup()
+
+        backup = self._executor.submit(self._get, "backup", self.backup_url)
+        error = None
+        try:
+            for future in as_completed([primary, backup], timeout=self.timeout):
+                try:
+                    return self._accept(future.result())
+                except requests.RequestException as e:
+                    error = e
+        except FutureTimeout as e:
+            error = e
+        raise requests.RequestException(f"Primary and backup sources failed: {error}")
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,172 @@
+import re
+import threading
+import time
+
+import numpy as np
+
+# Geodetic latitude and east longitude (degrees) of the three DSN complexes.
+COMPLEXES = {
+    "gdscc": (35.4267, -116.8900),   # Goldstone
+    "cdscc": (-35.4014, 148.9817),   # Canberra
+    "mdscc": (40.4314, -4.2481),     # Madrid
+}
+
+# DSS antenna numbers: 1x/2x Goldstone, 3x/4x Canberra, 5x/6x Madrid.
+_COMPLEX_BY_SERIES = {1: "gdscc", 2: "gdscc", 3: "cdscc", 4: "cdscc", 5: "mdscc", 6: "mdscc"}
+_DSS_NUMBER = re.compile(r"(\d+)")
+
+_COMPLEX_NAMES = tuple(COMPLEXES)
+_LATITUDES = np.radians([COMPLEXES[name][0] for name in _COMPLEX_NAMES])
+_LONGITUDES = np.radians([COMPLEXES[name][1] for name in _COMPLEX_NAMES])
+
+
+def complex_for(antenna_id):
+    """DSN complex name for an antenna id such as 'DSS43', or None."""
+    match = _DSS_NUMBER.search(antenna_id or "")
+    if not match:
+        return None
+    return _COMPLEX_BY_SERIES.get(int(match.group(1)) // 10)
+
+
+def earth_rotation_angle(ts):
+    """Earth rotation angle (radians, a close stand-in for GMST) at epoch seconds ts."""
+    days = np.asarray(ts, dtype=np.float64) / 86400.0 + 2440587.5 - 2451545.0
+    return np.mod(2 * np.pi * (0.7790572732640 + 1.00273781191135448 * days), 2 * np.pi)
+
+
+def sky_positions(ts, latitude, longitude, azimuth, elevation):
+    """
+    Right ascension and declination (radians) from station az/el samples.
+
+    All arguments are arrays (angles in radians, azimuth from north through
+    east). Parallax and refraction are ignored, which is well inside a
+    tracking antenna's beam for deep-space targets.
+    """
+    sin_lat, cos_lat = np.sin(latitude), np.cos(latitude)
+    sin_el, cos_el = np.sin(elevation), np.cos(elevation)
+    cos_az = np.cos(azimuth)
+    declination = np.arcsin(np.clip(sin_lat * sin_el + cos_lat * cos_el * cos_az, -1.0, 1.0))
+    hour_angle = np.arctan2(-np.sin(azimuth) * cos_el, cos_lat * sin_el - sin_lat * cos_el * cos_az)
+    right_ascension = np.mod(earth_rotation_angle(ts) + longitude - hour_angle, 2 * np.pi)
+    return right_ascension, declination
+
+
+class PassForecaster:
+    """
+    Projects when each tracked spacecraft is above each complex's horizon.
+
+    Recent az/el samples are converted to a sky position per spacecraft;
+    elevations for every spacecraft x complex x time step are then computed
+    in one broadcast expression and split into rise/set windows. Results are
+    cached per scrape timestamp, so repeated API calls between scrapes are
+    free.
+    """
+
+    def __init__(self, horizon_hours=24, max_hours=72, step_seconds=60, min_elevation=10.0, lookback_hours=6):
+        self.horizon_hours = horizon_hours
+        self.max_hours = max_hours
+        self.step_seconds = step_seconds
+        self.min_elevation = min_elevation
+        self.lookback_seconds = int(lookback_hours * 3600)
+        self._cache_key = None
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def fit(self, records):
+        """Return (spacecraft names, right ascensions, declinations) from records with az/el."""
+        names, index = [], {}
+        groups, ts, lat, lon, az, el = [], [], [], [], [], []
+        for record in records:
+            site = complex_for(record.antenna_id)
+            if (site is None or record.azimuth is None or record.elevation is None
+                    or record.spacecraft in (None, "Unknown")):
+                continue
+            if record.spacecraft not in index:
+                index[record.spacecraft] = len(names)
+                names.append(record.spacecraft)
+            groups.append(index[record.spacecraft])
+            ts.append(record.ts)
+            lat.append(COMPLEXES[site][0])
+            lon.append(COMPLEXES[site][1])
+            az.append(record.azimuth)
+            el.append(record.elevation)
+        if not names:
+            return [], np.empty(0), np.empty(0)
+
+        groups = np.array(groups)
+        ra, dec = sky_positions(np.array(ts), np.radians(lat), np.radians(lon), np.radians(az), np.radians(el))
+        # Circular mean for right ascension, plain mean for declination.
+        size = len(names)
+        mean_ra = np.mod(np.arctan2(np.bincount(groups, np.sin(ra), size),
+                                    np.bincount(groups, np.cos(ra), size)), 2 * np.pi)
+        mean_dec = np.bincount(groups, dec, size) / np.bincount(groups, minlength=size)
+        return names, mean_ra, mean_dec
+
+    def elevations(self, right_ascension, declination, times):
+        """Elevation in degrees, shaped (spacecraft, complex, time step)."""
+        local_sidereal = earth_rotation_angle(times)[None, :] + _LONGITUDES[:, None]
+        hour_angle = local_sidereal[None, :, :] - right_ascension[:, None, None]
+        sin_el = (np.sin(_LATITUDES)[None, :, None] * np.sin(declination)[:, None, None]
+                  + np.cos(_LATITUDES)[None, :, None] * np.cos(declination)[:, None, None] * np.cos(hour_angle))
+        return np.degrees(np.arcsin(np.clip(sin_el, -1.0, 1.0)))
+
+    def forecast(self, records, now=None, hours=None):
+        """View windows per spacecraft and complex for the next `hours` hours."""
+        now = int(time.time()) if now is None else int(now)
+        hours = self.horizon_hours if hours is None else hours
+        names, right_ascension, declination = self.fit(records)
+        times = now + np.arange(0, int(hours * 3600) + 1, self.step_seconds)
+        if not names:
+            return []
+
+        elevation = self.elevations(right_ascension, declination, times)
+        pairs = elevation.reshape(-1, len(times))
+        visible = pairs >= self.min_elevation
+
+        # Rises and sets are +1/-1 steps in the padded visibility rows;
+        # np.nonzero walks rows in order, so the two lists pair up.
+        padded = np.zeros((len(pairs), len(times) + 2), dtype=np.int8)
+        padded[:, 1:-1] = visible
+        steps = np.diff(padded, axis=1)
+        rise_rows, rise_cols = np.nonzero(steps == 1)
+        _, set_cols = np.nonzero(steps == -1)
+
+        flat = np.append(pairs.ravel(), -90.0)
+        bounds = np.empty(2 * len(rise_rows), dtype=np.intp)
+        bounds[0::2] = rise_rows * len(times) + rise_cols
+        bounds[1::2] = rise_rows * len(times) + set_cols
+        peaks = np.maximum.reduceat(flat, bounds)[0::2] if len(bounds) else np.empty(0)
+
+        windows = {}
+        for row, rise, end, peak in zip(rise_rows.tolist(), rise_cols.tolist(), set_cols.tolist(), peaks.tolist()):
+            windows.setdefault(row, []).append({
+                "rise": int(times[rise]),
+                "set": int(times[end - 1]),
+                "max_elevation": round(peak, 2),
+            })
+
+        results = []
+        for row in range(len(pairs)):
+            spacecraft, site = divmod(row, len(_COMPLEX_NAMES))
+            results.append({
+                "spacecraft": names[spacecraft],
+                "complex": _COMPLEX_NAMES[site],
+                "in_view": bool(visible[row, 0]),
+                "elevation": round(float(pairs[row, 0]), 2),
+                "windows": windows.get(row, []),
+            })
+        return results
+
+    def cached(self, snapshot, history, hours=None):
+        """Forecast from the snapshot plus recent history, computed once per scrape and horizon."""
+        if not snapshot:
+            return []
+        scrape_ts = snapshot[0].ts
+        key = (scrape_ts, hours)
+        with self._lock:
+            if self._cache_key == key:
+                return self._cache
+            samples = history.records_between(scrape_ts - self.lookback_seconds, scrape_ts) + list(snapshot)
+            self._cache = self.forecast(samples, now=scrape_ts, hours=hours)
+            self._cache_key = key
+            return self._cache
@@ -0,0 +1,347 @@
+import sqlite3
+from datetime import datetime, timezone
+
+try:
+    from .records import RECORD_COLUMNS as HISTORY_COLUMNS, DSNRecord
+    from .storage import connect_reader
+except ImportError:  # Running as a script from src/
+    from records import RECORD_COLUMNS as HISTORY_COLUMNS, DSNRecord
+    from storage import connect_reader
+
+# Columns of the pre-history communication_logs table, in the order the
+# migration reads them. Older setup_db.py tables only carry the first five.
+LEGACY_COLUMNS = ("timestamp",) + HISTORY_COLUMNS[1:]
+
+
+def to_epoch(timestamp):
+    """Convert an ISO string or datetime into integer epoch seconds."""
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return int(timestamp.timestamp())
+
+
+def month_key(ts):
+    """Partition suffix (YYYYMM, UTC) for an epoch timestamp."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m")
+
+
+def _months_between(start_ts, end_ts):
+    start = datetime.fromtimestamp(start_ts, tz=timezone.utc)
+    end = datetime.fromtimestamp(end_ts, tz=timezone.utc)
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield f"{year:04d}{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def open_history(db_config):
+    """The history store db_config describes: one row per sample, or compact runs."""
+    if db_config.get("layout", "rows") == "compact":
+        if db_config.get("partition") not in (None, "none"):
+            raise ValueError("Monthly partitions are not supported with the compact layout")
+        try:
+            from .compact import CompactHistoryStore
+        except ImportError:  # Running as a script from src/
+            from compact import CompactHistoryStore
+        return CompactHistoryStore(db_config["file"], db_config["table"], tolerances=db_config.get("compact_tolerance"))
+    return HistoryStore(db_config["file"], db_config["table"], partition=db_config.get("partition"))
+
+
+class HistoryStore:
+    """
+    Indexed history of communication records keyed by epoch timestamps.
+
+    With partition="monthly" rows land in one table per UTC month
+    ({table}_YYYYMM) and {table} becomes a UNION ALL view over them, so
+    readers can keep querying the configured table name.
+    """
+
+    def __init__(self, db_file, table, partition=None):
+        if partition not in (None, "none", "monthly"):
+            raise ValueError(f"Unsupported partition mode: {partition}")
+        self.db_file = db_file
+        self.table = table
+        self.partitioned = partition == "monthly"
+        self._partitions = set()
+
+    def _create_table(self, conn, name):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts INTEGER NOT NULL,
+                spacecraft TEXT,
+                antenna_id TEXT,
+                signal_strength REAL,
+                communication_duration REAL,
+                data_rate REAL,
+                frequency REAL,
+                azimuth REAL,
+                elevation REAL,
+                spacecraft_range REAL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_pair_ts ON {name} (spacecraft, antenna_id, ts)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_ts ON {name} (ts)")
+
+    def _object_type(self, conn, name):
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _refresh_view(self, conn):
+        conn.execute(f"DROP VIEW IF EXISTS {self.table}")
+        if not self._partitions:
+            return
+        columns = ", ".join(("id",) + HISTORY_COLUMNS)
+        union = " UNION ALL ".join(
+            f"SELECT {columns} FROM {self.table}_{key}" for key in sorted(self._partitions)
+        )
+        conn.execute(f"CREATE VIEW {self.table} AS {union}")
+
+    def _partition_for(self, conn, ts):
+        key = month_key(ts)
+        if key not in self._partitions:
+            # Automatic rollover: the first row of a new month creates its table.
+            self._create_table(conn, f"{self.table}_{key}")
+            self._partitions.add(key)
+            self._refresh_view(conn)
+        return f"{self.table}_{key}"
+
+    def ensure_schema(self, conn):
+        """
+        Create tables and indexes, migrating a legacy table if present.
+
+        The rename, copy and drop of the legacy table run in one
+        transaction. A {table}_legacy left behind by an older version is
+        copied again on start, skipping rows history already has.
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN")  # Otherwise the DDL below would commit on its own
+        try:
+            sources = self._claim_legacy_tables(conn)
+            self._create_schema(conn)
+            for legacy_table, resumed in sources:
+                self.migrate(conn, legacy_table, skip_existing=resumed)
+                conn.execute(f"DROP TABLE {legacy_table}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _create_schema(self, conn):
+        if self.partitioned:
+            self._load_partitions(conn)
+            self._refresh_view(conn)
+        else:
+            self._create_table(conn, self.table)
+
+    def _load_partitions(self, conn):
+        prefix = f"{self.table}_"
+        self._partitions = set()
+        for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", (prefix + "%",)):
+            suffix = name[len(prefix):]
+            if len(suffix) == 6 and suffix.isdigit():
+                self._partitions.add(suffix)
+
+    def rollback(self, conn):
+        """After a failed batch: forget partitions its transaction created."""
+        if self.partitioned:
+            self._load_partitions(conn)
+
+    def _replaces(self, columns):
+        """Whether a {table} table with these columns must be migrated into this layout."""
+        return "ts" not in columns or self.partitioned
+
+    def _claim_legacy_tables(self, conn):
+        """
+        [(legacy table, whether history may already hold its rows)] to copy:
+        a leftover {table}_legacy, and {table} itself, renamed out of the
+        way, if this layout replaces it.
+        """
+        leftover = f"{self.table}_legacy"
+        sources = []
+        if self._object_type(conn, leftover) == "table":
+            sources.append((leftover, True))
+        if self._object_type(conn, self.table) == "table":
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+            if self._replaces(columns):
+                legacy_table = f"{leftover}_current" if sources else leftover
+                conn.execute(f"ALTER TABLE {self.table} RENAME TO {legacy_table}")
+                print(f"Renamed legacy table '{self.table}' to '{legacy_table}' for migration.")
+                sources.insert(0, (legacy_table, False))
+        return sources
+
+    def migrate(self, conn, legacy_table, chunk_size=10000, skip_existing=False):
+        """
+        Copy rows from a legacy ISO-timestamp table into the history layout.
+        With skip_existing, rows whose (ts, spacecraft, antenna_id) are
+        already stored are left out.
+        """
+        present = {row[1] for row in conn.execute(f"PRAGMA table_info({legacy_table})")}
+        # An unpartitioned history table being re-partitioned already has ts.
+        time_column = "ts" if "ts" in present else "timestamp"
+        select = ", ".join([time_column] + [
+            column if column in present else "NULL" for column in LEGACY_COLUMNS[1:]
+        ])
+        cursor = conn.execute(f"SELECT {select} FROM {legacy_table} ORDER BY id")
+        migrated = 0
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            rows = []
+            for row in chunk:
+                try:
+                    rows.append((to_epoch(row[0]),) + tuple(row[1:]))
+                except (TypeError, ValueError):
+                    continue  # Skip rows with unparseable timestamps
+            if skip_existing and rows:
+                rows = self._unstored(conn, rows)
+            self.write(conn, rows)
+            migrated += len(rows)
+        print(f"Migrated {migrated} rows from '{legacy_table}' into history.")
+
+    def _unstored(self, conn, rows):
+        low, high = min(row[0] for row in rows), max(row[0] for row in rows)
+        stored = set()
+        for name in self._tables_for_range(low, high):
+            if self._object_type(conn, name):
+                stored.update(conn.execute(
+                    f"SELECT ts, spacecraft, antenna_id FROM {name} WHERE ts BETWEEN ? AND ?", (low, high)))
+        return [row for row in rows if row[:3] not in stored]
+
+    def write(self, conn, rows):
+        """Insert history rows; the caller owns the transaction."""
+        placeholders = ", ".join("?" for _ in HISTORY_COLUMNS)
+        columns = ", ".join(HISTORY_COLUMNS)
+        if not self.partitioned:
+            conn.executemany(f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})", rows)
+            return
+
+        by_partition = {}
+        for row in rows:
+            by_partition.setdefault(self._partition_for(conn, row[0]), []).append(row)
+        for name, partition_rows in by_partition.items():
+            conn.executemany(f"INSERT INTO {name} ({columns}) VALUES ({placeholders})", partition_rows)
+
+    def set_duration(self, conn, spacecraft, antenna_id, start_ts, end_ts, duration):
+        """Label a pair's rows in [start_ts, end_ts] with a measured pass duration."""
+        for name in self._tables_for_range(start_ts, end_ts):
+            conn.execute(
+                f"UPDATE {name} SET communication_duration = ? "
+                f"WHERE spacecraft = ? AND antenna_id = ? AND ts BETWEEN ? AND ?",
+                (duration, spacecraft, antenna_id, start_ts, end_ts),
+            )
+
+    def _tables_for_range(self, start_ts, end_ts):
+        if not self.partitioned:
+            return [self.table]
+        keys = self._partitions
+        if not keys:
+            # Reader processes never saw ensure_schema; fall back to the view.
+            return [self.table]
+        return [f"{self.table}_{key}" for key in _months_between(start_ts, end_ts) if key in keys]
+
+    def query(self, spacecraft, antenna_id, start, end, limit=None):
+        """Return DSNRecords for a spacecraft/antenna pair in [start, end], oldest first."""
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        tables = self._tables_for_range(start_ts, end_ts)
+        if not tables:
+            return []
+
+        columns = ", ".join(HISTORY_COLUMNS)
+        union = " UNION ALL ".join(
+            f"SELECT {columns} FROM {name} WHERE spacecraft = ? AND antenna_id = ? AND ts BETWEEN ? AND ?"
+            for name in tables
+        )
+        params = [spacecraft, antenna_id, start_ts, end_ts] * len(tables)
+        query = f"SELECT * FROM ({union}) ORDER BY ts"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self._read(query, params)
+
+    def latest_ts(self):
+        """Timestamp of the newest stored scrape, or None."""
+        try:
+            conn = connect_reader(self.db_file)
+        except sqlite3.Error:
+            return None
+        try:
+            return conn.execute(f"SELECT MAX(ts) FROM {self.table}").fetchone()[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    def iter_chunks(self, start_ts=None, end_ts=None, chunk_size=100000):
+        """
+        Stream raw history rows (HISTORY_COLUMNS order) with
+        start_ts <= ts < end_ts, oldest first, chunk_size rows at a time.
+        Partitions are read one by one so no query sorts the whole view.
+        """
+        where, params = [], []
+        if start_ts is not None:
+            where.append("ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append("ts < ?")
+            params.append(end_ts)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        columns = ", ".join(HISTORY_COLUMNS)
+
+        conn = connect_reader(self.db_file)
+        try:
+            tables = [self.table]
+            if self.partitioned:
+                prefix = f"{self.table}_"
+                tables = sorted(
+                    name for (name,) in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", (prefix + "%",))
+                    if len(name) == len(prefix) + 6 and name[len(prefix):].isdigit()
+                )
+            for name in tables:
+                cursor = conn.execute(f"SELECT {columns} FROM {name}{clause} ORDER BY ts", params)
+                while True:
+                    chunk = cursor.fetchmany(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            conn.close()
+
+    def records_between(self, start_ts, end_ts):
+        """Return DSNRecords for every pair with start_ts <= ts < end_ts, oldest first."""
+        tables = self._tables_for_range(start_ts, end_ts)
+        if not tables:
+            return []
+        columns = ", ".join(HISTORY_COLUMNS)
+        union = " UNION ALL ".join(
+            f"SELECT {columns} FROM {name} WHERE ts >= ? AND ts < ?" for name in tables
+        )
+        return self._read(f"SELECT * FROM ({union}) ORDER BY ts", [start_ts, end_ts] * len(tables))
+
+    def records_at(self, ts):
+        """Return the snapshot written for a single scrape timestamp, in feed order."""
+        table = self._tables_for_range(ts, ts)
+        if not table:
+            return []
+        columns = ", ".join(HISTORY_COLUMNS)
+        return self._read(f"SELECT {columns} FROM {table[0]} WHERE ts = ? ORDER BY id", [ts])
+
+    def _read(self, query, params):
+        try:
+            conn = connect_reader(self.db_file)
+        except sqlite3.Error as e:
+            print(f"History unavailable: {e}")
+            return []
+        try:
+            rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"History query failed: {e}")
+            return []
+        finally:
+            conn.close()
+
+        return [DSNRecord.from_row(row) for row in rows]
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import threading
+import time
+
+try:
+    from . import metrics
+    from .predict import DSNPredictor, model_configs
+except ImportError:  # Running as a script from src/
+    import metrics
+    from predict import DSNPredictor, model_configs
+
+
+class InferenceService:
+    """
+    Runs every configured model over dashboard snapshots, one batch per
+    snapshot.
+
+    Page loads, socket connects and broadcasts asking about the same
+    snapshot object (as returned by DSNMonitor.get_snapshot) share a single
+    batch: the first request submits it to the worker pool and the others
+    wait on the same future. Keying on the object rather than its scrape ts
+    keeps two snapshots stamped with the same second apart. The last few
+    finished batches are kept, so later requests for them return at once.
+    At most max_pending batches may be queued or running; a request past
+    that, or one still waiting after timeout seconds, gets no predictions
+    instead of holding up the page.
+    """
+
+    def __init__(self, predictors, workers=1, max_pending=4, timeout=2.0, slo=0.25, keep=4):
+        self.predictors = predictors  # {record field: DSNPredictor}
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.slo = slo
+        self.keep = keep
+        # id(snapshot) -> (snapshot, Future of {field: predictions or None});
+        # holding the snapshot keeps its id from being reused while cached.
+        self._batches = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Threads, not processes: the models stay loaded once, and the
+        # forest evaluation releases the GIL for most of its work.
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        metrics.INFERENCE_PENDING.set_function(lambda: self._pending)
+
+    @classmethod
+    def from_config(cls, ml_config):
+        """A service over the main model and every ml.models entry, each filling its field (default: its target)."""
+        predictors = {config.get("field", target): DSNPredictor(config)
+                      for target, config in model_configs(ml_config).items()}
+        return cls(
+            predictors,
+            workers=ml_config.get("inference_workers", 1),
+            max_pending=ml_config.get("inference_max_pending", 4),
+            timeout=ml_config.get("inference_timeout", 2.0),
+            slo=ml_config.get("inference_slo", 0.25),
+        )
+
+    @property
+    def fields(self):
+        return list(self.predictors)
+
+    def predict(self, records):
+        """
+        {field: predictions aligned with records, or None if that model
+        cannot predict yet}; {} if the request was shed or timed out.
+        """
+        start = time.perf_counter()
+        key = id(records)
+        with self._lock:
+            entry = self._batches.get(key)
+            batch = entry[1] if entry is not None else None
+            if batch is not None:
+                outcome = "coalesced"
+                self._batches.move_to_end(key)
+            elif self._pending >= self.max_pending:
+                outcome = "shed"
+            else:
+                outcome = "batched"
+                self._pending += 1
+                batch = self._executor.submit(self._run, list(records))
+                self._batches[key] = (records, batch)
+                while len(self._batches) > self.keep:
+                    self._batches.popitem(last=False)
+
+        predictions = {}
+        if batch is not None:
+            try:
+                predictions = batch.result(timeout=self.timeout)
+            except FutureTimeout:
+                outcome = "timeout"
+        elapsed = time.perf_counter() - start
+        metrics.INFERENCE_SECONDS.observe(elapsed)
+        metrics.INFERENCE_REQUESTS.inc(outcome=outcome)
+        if elapsed > self.slo:
+            metrics.INFERENCE_SLO_MISSES.inc()
+        return predictions
+
+    def _run(self, records):
+        try:
+            # One encoding and one forest evaluation per model for every waiter.
+            return {field: predictor.predict(records) for field, predictor in self.predictors.items()}
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def reload(self):
+        """Swap in the newest saved version of every model."""
+        for predictor in self.predictors.values():
+            predictor.reload()
+        with self._lock:
+            # Finished batches hold the old models' answers.
+            self._batches.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
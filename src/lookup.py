@@ -0,0 +1,147 @@
+import bisect
+from dataclasses import replace
+import threading
+
+try:
+    from .forecast import complex_for
+except ImportError:  # Running as a script from src/
+    from forecast import complex_for
+
+
+class SnapshotIndex:
+    """
+    In-memory index over the live snapshot and the last `window` seconds of
+    scrapes, for query endpoints that must not touch SQLite or the feed.
+
+    The current snapshot is indexed by spacecraft, antenna and DSN complex;
+    add() updates those maps only for pairs that appeared or disappeared.
+    Each spacecraft/antenna pair also keeps its recent records in time
+    order, so a windowed history is two bisects and a slice. Records enter
+    unlabelled; label() applies a pass duration once the pass closes.
+    """
+
+    def __init__(self, window=21600):
+        self.window = window
+        self.ts = None  # Timestamp of the current snapshot
+        self._since = None  # Oldest timestamp the index is complete from
+        self._current = {}  # (spacecraft, antenna_id) -> records in the current snapshot
+        self._by_spacecraft = {}
+        self._by_antenna = {}
+        self._by_complex = {}
+        self._series = {}  # (spacecraft, antenna_id) -> ([ts, ...], [record, ...])
+        self._lock = threading.Lock()
+
+    def seed(self, records, since):
+        """Before any add(): load every stored record (oldest first) from since on."""
+        batch = []
+        for record in records:
+            if batch and record.ts != batch[0].ts:
+                self.add(batch)
+                batch = []
+            batch.append(record)
+        self.add(batch)
+        with self._lock:
+            # Nothing was stored between since and the first record.
+            floor = since if self.ts is None else max(since, self.ts - self.window)
+            if self._since is None or floor < self._since:
+                self._since = floor
+
+    def add(self, records):
+        """Index one scrape's records; returns False if it was already indexed."""
+        if not records:
+            return False
+        ts = records[0].ts
+        current = {}
+        for record in records:
+            current.setdefault((record.spacecraft, record.antenna_id), []).append(record)
+
+        with self._lock:
+            if self.ts is not None and ts <= self.ts:
+                return False
+            for pair in self._current.keys() - current.keys():
+                self._unlink(pair)
+            for pair in current.keys() - self._current.keys():
+                self._link(pair)
+            for pair, pair_records in current.items():
+                times, series = self._series.setdefault(pair, ([], []))
+                times.extend([ts] * len(pair_records))
+                series.extend(pair_records)
+            self._current = current
+            self.ts = ts
+            if self._since is None:
+                self._since = ts
+            self._evict(ts - self.window)
+        return True
+
+    def label(self, spacecraft, antenna_id, start_ts, end_ts, duration):
+        """Set the pass duration on a pair's indexed records in [start_ts, end_ts], as the Sessionizer does in SQLite."""
+        with self._lock:
+            times, series = self._series.get((spacecraft, antenna_id), ((), ()))
+            for i in range(bisect.bisect_left(times, start_ts), bisect.bisect_right(times, end_ts)):
+                series[i] = replace(series[i], communication_duration=duration)
+
+    def _link(self, pair):
+        spacecraft, antenna_id = pair
+        self._by_spacecraft.setdefault(spacecraft, set()).add(antenna_id)
+        self._by_antenna.setdefault(antenna_id, set()).add(spacecraft)
+        site = complex_for(antenna_id)
+        if site:
+            self._by_complex.setdefault(site, set()).add(antenna_id)
+
+    def _unlink(self, pair):
+        spacecraft, antenna_id = pair
+        for key, value, index in ((spacecraft, antenna_id, self._by_spacecraft),
+                                  (antenna_id, spacecraft, self._by_antenna)):
+            members = index[key]
+            members.discard(value)
+            if not members:
+                del index[key]
+        site = complex_for(antenna_id)
+        if site and antenna_id not in self._by_antenna:
+            self._by_complex[site].discard(antenna_id)
+            if not self._by_complex[site]:
+                del self._by_complex[site]
+
+    def _evict(self, cutoff):
+        for pair in list(self._series):
+            times, series = self._series[pair]
+            cut = bisect.bisect_left(times, cutoff)
+            if cut:
+                del times[:cut]
+                del series[:cut]
+            if not times:
+                del self._series[pair]
+        self._since = max(self._since, cutoff)
+
+    def covers(self, start_ts):
+        """Whether every stored record at or after start_ts is in the index."""
+        with self._lock:
+            return self._since is not None and start_ts >= self._since
+
+    def active_spacecraft(self, site=None):
+        """{spacecraft: [antenna_id, ...]} in the current snapshot, optionally at one complex."""
+        with self._lock:
+            antennas = self._by_complex.get(site, set()) if site else None
+            return {
+                spacecraft: sorted(a for a in members if antennas is None or a in antennas)
+                for spacecraft, members in sorted(self._by_spacecraft.items())
+                if antennas is None or not antennas.isdisjoint(members)
+            }
+
+    def antennas(self, site=None):
+        """{antenna_id: [spacecraft, ...]} in the current snapshot, optionally at one complex."""
+        with self._lock:
+            names = self._by_complex.get(site, ()) if site else self._by_antenna
+            return {antenna_id: sorted(self._by_antenna[antenna_id]) for antenna_id in sorted(names)}
+
+    def tracking(self, spacecraft):
+        """Current records of every antenna tracking spacecraft, by antenna."""
+        with self._lock:
+            return [record for antenna_id in sorted(self._by_spacecraft.get(spacecraft, ()))
+                    for record in self._current[(spacecraft, antenna_id)]]
+
+    def history(self, spacecraft, antenna_id, start_ts, end_ts):
+        """Indexed records of a pair with start_ts <= ts <= end_ts, oldest first."""
+        with self._lock:
+            times, series = self._series.get((spacecraft, antenna_id), ((), ()))
+            return series[bisect.bisect_left(times, start_ts):bisect.bisect_right(times, end_ts)]
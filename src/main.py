@@ -1,63 +1,84 @@
+import argparse
 import os
 import yaml
-import time
-import threading
-from monitor import DSNMonitor
-from predict import DSNPredictor
-from webapp import create_app
+from datetime import datetime, timezone
+from deploy import run_production, run_scraper, run_server, run_single, run_training
+from etl import export_history, import_archive
 
 def load_config(config_path="config/settings.yaml"):
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
-def data_fetching_loop(monitor, predictor, scrape_interval, retrain_interval, emit_update):
-    last_retrain = time.time()
-    while True:
-        try:
-            data = monitor.fetch_dsn_data()
-            monitor.store_data(data)
-            print("Data fetched and stored successfully.")
-            
-            # Emit update through WebSocket
-            emit_update(data)
-
-            current_time = time.time()
-            if current_time - last_retrain >= retrain_interval:
-                predictor.train_model()
-                last_retrain = current_time
-                print("Model retrained.")
-
-            time.sleep(scrape_interval)
-
-        except Exception as e:
-            print(f"Error in data fetching loop: {e}")
-            time.sleep(scrape_interval)
+def parse_time(value):
+    """Epoch seconds or ISO 8601 (UTC unless an offset is given)."""
+    if value is None or value.isdigit():
+        return None if value is None else int(value)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
 
 def main():
-    config = load_config()
-    print("Starting NASA-DSN-E... Configuration loaded.")
+    parser = argparse.ArgumentParser(description="NASA-DSN-E monitor")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("run", "scrape", "serve", "train", "export", "import"),
+        default="run",
+        help="run: scraper and web server (see --mode); scrape: scraper and trainer only; "
+             "serve: web server only, following the database; train: one training round, then exit; "
+             "export/import: move history to or from a Parquet, Arrow or CSV file",
+    )
+    parser.add_argument("path", nargs="?", help="export/import: the .parquet, .arrow or .csv file")
+    parser.add_argument(
+        "--mode",
+        choices=("single", "production"),
+        default="single",
+        help="single: one process for development; production: one scraper plus webapp.workers web processes",
+    )
+    parser.add_argument("--config", help="Settings file (default: config/settings.yaml in the repository)")
+    parser.add_argument("--from-file", nargs="?", const="", metavar="PATH",
+                        help="train: fit on a CSV/Parquet/Arrow file (default ml.training_data) instead of the history")
+    parser.add_argument("--start", help="export: first timestamp to include (epoch or ISO 8601, UTC)")
+    parser.add_argument("--end", help="export: timestamp to stop before (epoch or ISO 8601, UTC)")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="export/import: rows per chunk/transaction")
+    args = parser.parse_args()
 
-    monitor = DSNMonitor(config["data"], config["database"])
-    predictor = DSNPredictor(config["ml"])
-    app, socketio, emit_update = create_app(config["webapp"], monitor, predictor)
+    if args.command in ("export", "import") and not args.path:
+        parser.error(f"{args.command} needs a file path")
+    # Files named on the command line are relative to where we were started;
+    # paths in the settings file are relative to the repository root.
+    for name in ("path", "config"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    if args.from_file:
+        args.from_file = os.path.abspath(args.from_file)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)) + "/..")
 
-    scrape_interval = config["data"]["scrape_interval"]
-    retrain_interval = config["ml"]["retrain_interval"]
-    data_thread = threading.Thread(
-        target=data_fetching_loop,
-        args=(monitor, predictor, scrape_interval, retrain_interval, emit_update),
-        daemon=True
-    )
-    data_thread.start()
-    print(f"Started data fetching thread (interval: {scrape_interval} seconds)")
+    config = load_config(args.config or "config/settings.yaml")
+    print("Starting NASA-DSN-E... Configuration loaded.")
 
-    socketio.run(
-        app,
-        host=config["webapp"]["host"],
-        port=config["webapp"]["port"],
-        debug=config["webapp"]["debug"]
-    )
+    if args.command == "scrape":
+        run_scraper(config)
+    elif args.command == "serve":
+        run_server(config)
+    elif args.command == "train":
+        run_training(config, from_file=args.from_file)
+    elif args.command == "export":
+        rows = export_history(config["database"], args.path, parse_time(args.start), parse_time(args.end),
+                              chunk_rows=args.chunk_rows)
+        print(f"Exported {rows} rows to {args.path}.")
+    elif args.command == "import":
+        try:
+            imported, skipped = import_archive(config["database"], args.path, chunk_rows=args.chunk_rows)
+        except RuntimeError as e:
+            # e.g. a scraper is writing the same database
+            parser.exit(1, f"Import failed: {e}\n")
+        print(f"Imported {imported} rows from {args.path} ({skipped} already stored).")
+    elif args.mode == "production":
+        run_production(config)
+    else:
+        run_single(config)
 
 if __name__ == "__main__":
-    os.chdir(os.path.dirname(os.path.abspath(__file__)) + "/..")
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,329 @@
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import os
+import signal
+import sys
+import threading
+import time
+
+# Seconds; wide enough for a sub-millisecond parse and a hedged 10 s fetch.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, _label_text(self.labelnames, key), value)
+                    for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {value:.17g}" for name, labels, value in self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. errors or fallbacks."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down.
+
+    set_function() makes it a callback gauge, read at render time, for
+    values that are cheaper to compute on demand than to keep current.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self._function = function
+
+    def _samples(self):
+        if self._function is None:
+            return super()._samples()
+        value = self._function()
+        return [] if value is None else [(self.name, "", value)]
+
+
+class Histogram(_Metric):
+    """Bucketed latency distribution with a sum and a count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                samples.append((f"{self.name}_bucket", _label_text(self.labelnames, key, f'le="{le}"'), cumulative))
+            samples.append((f"{self.name}_sum", _label_text(self.labelnames, key), total))
+            samples.append((f"{self.name}_count", _label_text(self.labelnames, key), count))
+        return samples
+
+
+class Registry:
+    """The metrics of one process, rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics. Every process registers all of them; each only moves
+# the ones for the stages it runs.
+STAGE_SECONDS = REGISTRY.histogram(
+    "dsn_stage_seconds", "Time spent per pipeline stage (fetch, parse, store, predict, plot, emit).", ["stage"])
+FETCH_ERRORS = REGISTRY.counter(
+    "dsn_fetch_errors_total", "Feed requests that failed, by source.", ["source"])
+BACKUP_FALLBACKS = REGISTRY.counter(
+    "dsn_backup_fallbacks_total", "Scrapes answered by the backup source, by reason.", ["reason"])
+PARSE_ERRORS = REGISTRY.counter(
+    "dsn_parse_errors_total", "Feed bodies or records that could not be parsed, by source.", ["source"])
+DB_ERRORS = REGISTRY.counter(
+    "dsn_db_errors_total", "SQLite batches rolled back after an error.")
+ROWS_WRITTEN = REGISTRY.counter(
+    "dsn_rows_written_total", "History rows committed by the batched writer.")
+SCRAPE_ERRORS = REGISTRY.counter(
+    "dsn_scrape_errors_total", "Scrape loop iterations that raised.")
+SCRAPE_DELAY = REGISTRY.gauge(
+    "dsn_scrape_delay_seconds", "Delay the adaptive scheduler chose before the next scrape.")
+SOCKET_CLIENTS = REGISTRY.gauge(
+    "dsn_socket_clients", "Connected Socket.IO clients.")
+SNAPSHOT_AGE = REGISTRY.gauge(
+    "dsn_snapshot_age_seconds", "Seconds since the served snapshot was refreshed.")
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "dsn_inference_seconds", "Time a dashboard request waited for its snapshot's predictions.")
+INFERENCE_REQUESTS = REGISTRY.counter(
+    "dsn_inference_requests_total", "Prediction requests, by outcome (batched, coalesced, shed, timeout).", ["outcome"])
+INFERENCE_SLO_MISSES = REGISTRY.counter(
+    "dsn_inference_slo_misses_total", "Prediction requests that waited longer than ml.inference_slo.")
+INFERENCE_PENDING = REGISTRY.gauge(
+    "dsn_inference_pending", "Prediction batches queued or running.")
+
+
+def render():
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # One line per Prometheus scrape is noise
+
+
+def serve(host, port):
+    """Serve /metrics from a daemon thread, for processes without a web app."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a live process.
+
+    A daemon thread snapshots every other thread's stack each interval
+    seconds; the result is a tally of collapsed stacks
+    ("module:function;module:function count"), the input format of
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self._stacks = _Tally()
+        self._thread = None
+        self._stop = threading.Event()
+        self.samples = 0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks, hottest first."""
+        if self._thread is None:
+            return []
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self._stacks.most_common()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def dump(self, path):
+        """Stop sampling and write the collapsed stacks to path."""
+        stacks = self.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def install_profiler_signal(directory, interval=0.01, signum=None):
+    """
+    Toggle a SamplingProfiler with a signal (SIGUSR1 by default), without a
+    restart: the first `kill -USR1 <pid>` starts sampling, the next writes
+    {directory}/profile-{pid}-{time}.txt. Call from the main thread.
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return None  # No SIGUSR1 on Windows
+    profiler = SamplingProfiler(interval)
+
+    def toggle(*_):
+        if not profiler.running:
+            profiler.start()
+            print(f"Profiler started (pid {os.getpid()}).")
+            return
+        # Writing from the handler would run on the main thread mid-whatever;
+        # hand it to a thread so the interrupted code resumes immediately.
+        def write():
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"profile-{os.getpid()}-{int(time.time())}.txt")
+            profiler.dump(path)
+            print(f"Profiler wrote {profiler.samples} samples to {path}.")
+        threading.Thread(target=write, name="profiler-dump", daemon=True).start()
+
+    signal.signal(signum, toggle)
+    return profiler
@@ -1,171 +1,322 @@
 import requests
-import sqlite3
-from bs4 import BeautifulSoup
+from dataclasses import replace
 from datetime import datetime, timedelta
+import json
 import re
+import threading
+import time
 import xml.etree.ElementTree as ET
 import io
 
+try:
+    from .fetcher import FeedFetcher
+    from .history import open_history
+    from .metrics import BACKUP_FALLBACKS, FETCH_ERRORS, PARSE_ERRORS, SNAPSHOT_AGE, STAGE_SECONDS
+    from .passes import Sessionizer
+    from .records import DSNRecord
+    from .replay import RecordingFetcher, ReplayFetcher
+    from .rollups import RollupStore
+    from .storage import SQLiteWriter
+except ImportError:  # Running as a script from src/
+    from fetcher import FeedFetcher
+    from history import open_history
+    from metrics import BACKUP_FALLBACKS, FETCH_ERRORS, PARSE_ERRORS, SNAPSHOT_AGE, STAGE_SECONDS
+    from passes import Sessionizer
+    from records import DSNRecord
+    from replay import RecordingFetcher, ReplayFetcher
+    from rollups import RollupStore
+    from storage import SQLiteWriter
+
+# DSNNow marks missing numeric attributes with these strings.
+_NULL_VALUES = frozenset(('', 'null', 'none'))
+
+def _coerce_float(value):
+    """Convert a DSNNow attribute to float: absent -> 0.0, null markers -> None."""
+    if value is None:
+        return 0.0
+    if value in _NULL_VALUES:
+        return None
+    return float(value)
+
 class DSNMonitor:
     def __init__(self, data_config, db_config):
         """Initialize the monitor with data and database configurations."""
         self.dsnnow_url = data_config["dsnnow_url"]
         self.backup_source = data_config["backup_source"]
+        self.cache_bust_seconds = data_config.get("cache_bust_seconds", 5)
+        if data_config.get("replay_dir"):
+            # Offline: serve recorded responses instead of calling the feeds.
+            self.fetcher = ReplayFetcher(
+                data_config["replay_dir"],
+                speed=data_config.get("replay_speed", 1.0),
+                scale=data_config.get("replay_scale", 1),
+            )
+        else:
+            self.fetcher = FeedFetcher(
+                self.dsnnow_url,
+                self.backup_source,
+                timeout=data_config.get("fetch_timeout", 10),
+                hedge_delay=data_config.get("hedge_delay", 3.0),
+            )
+        if data_config.get("capture_dir"):
+            self.fetcher = RecordingFetcher(self.fetcher, data_config["capture_dir"])
+        # Last parsed records per source, reused when a feed answers 304.
+        self._last_records = {}
+        # Whether the last fetch_dsn_data() got no records because of an
+        # error, as opposed to an empty feed; the scheduler backs off on it.
+        self.last_fetch_failed = False
         self.db_file = db_config["file"]
         self.db_table = db_config["table"]
+        self.history = open_history(db_config)
+        self.rollups = RollupStore(
+            self.db_file,
+            self.db_table,
+            prefix=db_config.get("rollup_prefix", "rollup"),
+            max_gap=db_config.get("contact_max_gap", 900),
+            max_points=db_config.get("rollup_max_points", 1500),
+        )
+        self.sessionizer = Sessionizer(
+            self.history,
+            table=db_config.get("passes_table", "communication_passes"),
+            max_gap=db_config.get("contact_max_gap", 900),
+        )
+        self.writer = SQLiteWriter(
+            self.db_file,
+            [self.history, self.rollups, self.sessionizer],
+            batch_size=db_config.get("batch_size", 500),
+            flush_interval=db_config.get("flush_interval", 1.0),
+        )
 
-    def _connect_db(self):
-        """Establish a connection to the SQLite database."""
-        return sqlite3.connect(self.db_file)
-
-    def _format_range(self, range_meters):
-        """Format spacecraft range into a human-readable string."""
-        if range_meters is None or range_meters <= 0:
-            return "Unknown"
-        
-        # Convert to kilometers
-        range_km = range_meters / 1000.0
-        
-        # Format based on distance
-        if range_km >= 1000000:  # More than 1 million km
-            return f"{range_km/1000000:.2f} million km"
-        elif range_km >= 1000:  # More than 1000 km
-            return f"{range_km/1000:.2f} thousand km"
-        else:
-            return f"{range_km:.2f} km"
+        # Shared snapshot served to request handlers; refreshed only by the
+        # background fetching loop via refresh_snapshot().
+        self.cache_ttl = data_config.get(
+            "cache_ttl", 2 * data_config.get("max_scrape_interval", data_config.get("scrape_interval", 300)))
+        self._snapshot = ()
+        self._snapshot_time = None
+        self._snapshot_lock = threading.Lock()
+        SNAPSHOT_AGE.set_function(self.snapshot_age)
 
     def _get_current_timestamp(self):
         return datetime.now()
 
     def _parse_xml_data(self, xml_content):
-        """Parse DSNNow XML data into a list of records."""
+        """Parse DSNNow XML data into a list of records in a single streaming pass."""
         records = []
-        current_timestamp = self._get_current_timestamp()
-        
+        ts = int(self._get_current_timestamp().timestamp())
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode("utf-8")
+
         try:
-            # Parse XML content
-            root = ET.fromstring(xml_content)
-            
-            # Find all dish elements
-            for dish in root.findall('.//dish'):
-                antenna_data = dish.attrib
-                antenna_id = antenna_data.get('name', 'Unknown')
-                
-                # Get antenna angles
-                azimuth = float(antenna_data.get('azimuthAngle', 0)) if antenna_data.get('azimuthAngle') not in ['', 'null', 'none'] else None
-                elevation = float(antenna_data.get('elevationAngle', 0)) if antenna_data.get('elevationAngle') not in ['', 'null', 'none'] else None
-                
-                # Get target information
-                target = dish.find('.//target')
-                if target is not None:
-                    spacecraft = target.get('name', 'Unknown')
-                    # Get both upleg and downleg ranges
-                    upleg_range = float(target.get('uplegRange', 0)) if target.get('uplegRange') not in ['', 'null', 'none'] else None
-                    downleg_range = float(target.get('downlegRange', 0)) if target.get('downlegRange') not in ['', 'null', 'none'] else None
-                    # Use the non-zero range, or average if both are available
-                    spacecraft_range = None
-                    if upleg_range and upleg_range > 0:
-                        spacecraft_range = upleg_range
-                    if downleg_range and downleg_range > 0:
-                        if spacecraft_range:
-                            spacecraft_range = (spacecraft_range + downleg_range) / 2
-                        else:
-                            spacecraft_range = downleg_range
-                else:
-                    spacecraft = 'Unknown'
-                    spacecraft_range = None
-                
-                # Get all active downSignals
-                down_signals = dish.findall('.//downSignal[@active="true"]')
-                for signal in down_signals:
-                    if signal.get('signalType') == 'data':
-                        data_rate = float(signal.get('dataRate', 0)) if signal.get('dataRate') not in ['', 'null', 'none'] else None
-                        frequency = float(signal.get('frequency', 0)) if signal.get('frequency') not in ['', 'null', 'none'] else None
-                        power = float(signal.get('power', 0)) if signal.get('power') not in ['', 'null', 'none'] else None
-                        
-                        # Format the range for display
-                        range_display = self._format_range(spacecraft_range)
-                        
-                        records.append({
-                            "timestamp": current_timestamp.isoformat(),
-                            "spacecraft": spacecraft,
-                            "antenna_id": antenna_id,
-                            "signal_strength": power if power is not None else 0.0,
-                            "communication_duration": 0,  # Placeholder; predict this later
-                            "data_rate": data_rate,
-                            "frequency": frequency,
-                            "azimuth": azimuth,
-                            "elevation": elevation,
-                            "spacecraft_range": spacecraft_range,
-                            "range_display": range_display
-                        })
-                
+            target = None
+            signals = []
+            # Children end before their dish, so a dish's target and signals
+            # are already collected when its own end event arrives.
+            for _, elem in ET.iterparse(io.BytesIO(xml_content)):
+                tag = elem.tag
+                if tag == "downSignal":
+                    attrib = elem.attrib
+                    if attrib.get("active") == "true" and attrib.get("signalType") == "data":
+                        signals.append((attrib.get("dataRate"), attrib.get("frequency"), attrib.get("power")))
+                elif tag == "target":
+                    if target is None:
+                        target = (elem.get("name", "Unknown"), elem.get("uplegRange"), elem.get("downlegRange"))
+                elif tag == "dish":
+                    self._append_dish_records(records, ts, elem.attrib, target, signals)
+                    target = None
+                    signals = []
+                    # Processed dishes are no longer needed; keep memory flat.
+                    elem.clear()
+
         except ET.ParseError as e:
+            PARSE_ERRORS.inc(source="primary")
             print(f"Error parsing XML: {e}")
+            # A truncated feed would look like every later contact ending.
+            self.last_fetch_failed = True
+            return []
         except Exception as e:
+            PARSE_ERRORS.inc(source="primary")
             print(f"Error processing XML data: {e}")
             
         return records
 
+    def _append_dish_records(self, records, ts, antenna_data, target, signals):
+        """Build one record per active data downSignal of a dish."""
+        antenna_id = antenna_data.get('name', 'Unknown')
+
+        # Get antenna angles
+        azimuth = _coerce_float(antenna_data.get('azimuthAngle'))
+        elevation = _coerce_float(antenna_data.get('elevationAngle'))
+
+        # Get target information
+        if target is not None:
+            spacecraft, upleg, downleg = target
+            upleg_range = _coerce_float(upleg)
+            downleg_range = _coerce_float(downleg)
+            # Use the non-zero range, or average if both are available
+            spacecraft_range = None
+            if upleg_range and upleg_range > 0:
+                spacecraft_range = upleg_range
+            if downleg_range and downleg_range > 0:
+                if spacecraft_range:
+                    spacecraft_range = (spacecraft_range + downleg_range) / 2
+                else:
+                    spacecraft_range = downleg_range
+        else:
+            spacecraft = 'Unknown'
+            spacecraft_range = None
+
+        for data_rate, frequency, power in signals:
+            power = _coerce_float(power)
+            records.append(DSNRecord(
+                ts=ts,
+                spacecraft=spacecraft,
+                antenna_id=antenna_id,
+                signal_strength=power if power is not None else 0.0,
+                communication_duration=None,  # Measured when the pass closes
+                data_rate=_coerce_float(data_rate),
+                frequency=_coerce_float(frequency),
+                azimuth=azimuth,
+                elevation=elevation,
+                spacecraft_range=spacecraft_range,
+            ))
+
     def fetch_dsn_data(self):
         """Fetch real-time DSN data from DSNNow or fallback source."""
+        self.last_fetch_failed = False
         try:
-            # Add timestamp parameter to URL to prevent caching
+            # Add timestamp parameter to URL to prevent caching. Scrapes in the
+            # same bucket share a CDN cache key; keep it below min_scrape_interval.
             current_timestamp = self._get_current_timestamp()
-            timestamp_param = str(round(float(current_timestamp.strftime("%s"))/5.0))
-            url = f"{self.dsnnow_url}?r={timestamp_param}"
-            
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            # Check if the response is XML
-            content_type = response.headers.get('content-type', '').lower()
-            if 'xml' in content_type or response.text.strip().startswith('<?xml'):
-                return self._parse_xml_data(response.text)
-            else:
-                # Try parsing as JSON (backward compatibility)
-                try:
-                    data = response.json()
-                    return self._parse_dsn_data(data)
-                except ValueError:
-                    raise ValueError("Response is neither XML nor JSON")
-                    
-        except (requests.RequestException, ValueError) as e:
-            print(f"Failed to fetch from DSNNow: {e}. Trying backup source.")
-            return self._fetch_backup_data()
+            timestamp_param = str(int(current_timestamp.timestamp() // self.cache_bust_seconds))
+            with STAGE_SECONDS.time(stage="fetch"):
+                result = self.fetcher.fetch(params={"r": timestamp_param})
+        except requests.RequestException as e:
+            FETCH_ERRORS.inc(source="primary")
+            print(f"Failed to fetch DSN data: {e}")
+            self.last_fetch_failed = True
+            return []
+
+        if result.source == "backup":
+            # The fetcher hedged or fell back because DSNNow was slow or down.
+            BACKUP_FALLBACKS.inc(reason="fetch")
+        if result.not_modified:
+            return self._reuse_records(result.source)
+
+        if result.source == "backup":
+            records = self._parse_backup_html(result.body)
+        else:
+            try:
+                with STAGE_SECONDS.time(stage="parse"):
+                    records = self._parse_primary(result)
+            except ValueError as e:
+                PARSE_ERRORS.inc(source="primary")
+                print(f"Failed to parse DSNNow response: {e}. Trying backup source.")
+                self.fetcher.forget(self.dsnnow_url)
+                return self._fetch_backup_data()
+        self._last_records[result.source] = records
+        return records
+
+    def _parse_primary(self, result):
+        """Parse a DSNNow response body as XML, or JSON for older feeds."""
+        # Check if the response is XML
+        if 'xml' in result.content_type or result.body.strip().startswith('<?xml'):
+            return self._parse_xml_data(result.body)
+        # Try parsing as JSON (backward compatibility)
+        try:
+            data = json.loads(result.body)
+        except ValueError:
+            raise ValueError("Response is neither XML nor JSON")
+        return self._parse_dsn_data(data)
+
+    def _reuse_records(self, source):
+        """Re-stamp the last records from a source whose feed is unchanged."""
+        cached = self._last_records.get(source)
+        if cached is None:
+            # Validators outlived the parsed records; force a full fetch next time.
+            self.fetcher.forget(self.dsnnow_url if source == "primary" else self.backup_source)
+            return []
+        ts = int(self._get_current_timestamp().timestamp())
+        return [replace(record, ts=ts) for record in cached]
+
+    def refresh_snapshot(self):
+        """Fetch fresh data and publish it as the shared snapshot."""
+        records = self.fetch_dsn_data()
+        if records:
+            self.install_snapshot(records)
+        else:
+            print("Fetch returned no records; keeping previous snapshot.")
+        return records
+
+    def install_snapshot(self, records):
+        """Publish records as the shared snapshot, e.g. ones received from a scraper process."""
+        with self._snapshot_lock:
+            self._snapshot = tuple(records)
+            self._snapshot_time = time.time()
+
+    def get_snapshot(self):
+        """
+        Return the cached snapshot for request handlers: the same tuple
+        until the next install, so it also identifies the snapshot.
+        """
+        with self._snapshot_lock:
+            return self._snapshot
+
+    def snapshot_age(self):
+        """Seconds since the snapshot was last refreshed, or None if never."""
+        if self._snapshot_time is None:
+            return None
+        return time.time() - self._snapshot_time
+
+    def is_snapshot_stale(self):
+        """Whether the snapshot is missing or older than the configured TTL."""
+        age = self.snapshot_age()
+        return age is None or age > self.cache_ttl
 
     def _parse_dsn_data(self, data):
         """Parse DSNNow JSON data into a list of records."""
         records = []
-        timestamp = datetime.utcnow().isoformat()
+        ts = int(self._get_current_timestamp().timestamp())
         for antenna in data.get("antennas", []):
             try:
                 signal_strength = float(antenna.get("signal_strength", 0.0))
-                records.append({
-                    "timestamp": timestamp,
-                    "spacecraft": antenna.get("spacecraft", "Unknown"),
-                    "antenna_id": antenna.get("id", "Unknown"),
-                    "signal_strength": signal_strength,
-                    "communication_duration": 0,  # Placeholder; predict this later
-                    "data_rate": None,
-                    "frequency": None,
-                    "azimuth": None,
-                    "elevation": None,
-                    "spacecraft_range": None,
-                    "range_display": "Unknown"
-                })
+                records.append(DSNRecord(
+                    ts=ts,
+                    spacecraft=antenna.get("spacecraft", "Unknown"),
+                    antenna_id=antenna.get("id", "Unknown"),
+                    signal_strength=signal_strength,
+                    communication_duration=None,  # Measured when the pass closes
+                ))
             except (ValueError, TypeError):
+                PARSE_ERRORS.inc(source="primary")
                 continue  # Skip invalid records
         return records
 
     def _fetch_backup_data(self):
         """Fallback: Scrape Canberra DSN schedule if DSNNow fails."""
+        BACKUP_FALLBACKS.inc(reason="parse_error")
         try:
-            response = requests.get(self.backup_source, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            with STAGE_SECONDS.time(stage="fetch"):
+                result = self.fetcher.fetch_backup()
+        except requests.RequestException as e:
+            FETCH_ERRORS.inc(source="backup")
+            print(f"Backup fetch failed: {e}")
+            self.last_fetch_failed = True
+            return []
+        if result.not_modified:
+            return self._reuse_records("backup")
+        records = self._parse_backup_html(result.body)
+        self._last_records["backup"] = records
+        return records
+
+    def _parse_backup_html(self, html):
+        """Parse the Canberra tracking table into a list of records."""
+        from bs4 import BeautifulSoup  # Only needed when DSNNow is down
+
+        start = time.perf_counter()
+        try:
+            soup = BeautifulSoup(html, "html.parser")
             records = []
-            timestamp = datetime.utcnow().isoformat()
+            ts = int(self._get_current_timestamp().timestamp())
             
             for row in soup.select("table tr")[1:]:  # Skip header
                 cols = row.find_all("td")
@@ -177,80 +328,36 @@ class DSNMonitor:
                         signal_text = re.sub(r'[^\d.]', '', signal_text)
                         signal_strength = float(signal_text) if signal_text else 0.0
                         
-                        records.append({
-                            "timestamp": timestamp,
-                            "spacecraft": cols[0].text.strip(),
-                            "antenna_id": cols[1].text.strip(),
-                            "signal_strength": signal_strength,
-                            "communication_duration": 0,
-                            "data_rate": None,
-                            "frequency": None,
-                            "azimuth": None,
-                            "elevation": None,
-                            "spacecraft_range": None,
-                            "range_display": "Unknown"
-                        })
+                        records.append(DSNRecord(
+                            ts=ts,
+                            spacecraft=cols[0].text.strip(),
+                            antenna_id=cols[1].text.strip(),
+                            signal_strength=signal_strength,
+                            communication_duration=None,
+                        ))
                     except (ValueError, IndexError):
+                        PARSE_ERRORS.inc(source="backup")
                         continue  # Skip invalid records
             return records
         except Exception as e:
-            print(f"Backup fetch failed: {e}")
+            PARSE_ERRORS.inc(source="backup")
+            print(f"Backup parse failed: {e}")
+            self.last_fetch_failed = True
             return []
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="parse")
 
     def store_data(self, records):
-        """Store fetched data in the SQLite database."""
+        """Queue fetched data for the batched SQLite writer."""
         if not records:
             print("No valid records to store.")
             return
-            
-        conn = self._connect_db()
-        cursor = conn.cursor()
-        
-        # Update table schema if needed
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {self.db_table} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                spacecraft TEXT,
-                antenna_id TEXT,
-                signal_strength REAL,
-                communication_duration REAL,
-                data_rate REAL,
-                frequency REAL,
-                azimuth REAL,
-                elevation REAL,
-                spacecraft_range REAL,
-                range_display TEXT
-            )
-        """)
-        
-        query = f"""
-            INSERT INTO {self.db_table} (
-                timestamp, spacecraft, antenna_id, signal_strength, 
-                communication_duration, data_rate, frequency, 
-                azimuth, elevation, spacecraft_range, range_display
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        try:
-            for record in records:
-                cursor.execute(query, (
-                    record["timestamp"],
-                    record["spacecraft"],
-                    record["antenna_id"],
-                    record["signal_strength"],
-                    record["communication_duration"],
-                    record["data_rate"],
-                    record["frequency"],
-                    record["azimuth"],
-                    record["elevation"],
-                    record["spacecraft_range"],
-                    record["range_display"]
-                ))
-            conn.commit()
-            print(f"Stored {len(records)} records in database.")
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            conn.rollback()
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+
+        self.writer.start()
+        self.writer.put([record.as_row() for record in records])
+        print(f"Queued {len(records)} records for storage.")
+
+    def close(self):
+        """Flush pending writes and release database and HTTP connections."""
+        self.writer.stop()
+        self.fetcher.close()
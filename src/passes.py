@@ -0,0 +1,225 @@
+from dataclasses import dataclass
+import sqlite3
+
+try:
+    from .records import RECORD_COLUMNS
+    from .storage import connect_reader
+except ImportError:  # Running as a script from src/
+    from records import RECORD_COLUMNS
+    from storage import connect_reader
+
+_TS = RECORD_COLUMNS.index("ts")
+_SPACECRAFT = RECORD_COLUMNS.index("spacecraft")
+_ANTENNA = RECORD_COLUMNS.index("antenna_id")
+_SIGNAL = RECORD_COLUMNS.index("signal_strength")
+
+# Dishes reported without a target are not contacts.
+_NO_TARGET = frozenset((None, "Unknown"))
+
+
+@dataclass(slots=True)
+class Contact:
+    """An open spacecraft/antenna contact."""
+
+    start_ts: int
+    last_ts: int
+    peak_signal: float
+    samples: int
+
+
+def oldest_open_contact(db_file, table):
+    """Start ts of the oldest contact still open, or None; rows from then on are unlabelled."""
+    try:
+        conn = connect_reader(db_file)
+    except sqlite3.Error:
+        return None
+    try:
+        return conn.execute(f"SELECT MIN(start_ts) FROM {table}_open").fetchone()[0]
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def passes_closed_after(db_file, table, last_id, min_end_ts=0):
+    """(id, spacecraft, antenna_id, start_ts, end_ts, duration) of passes stored after id last_id, oldest first."""
+    try:
+        conn = connect_reader(db_file)
+    except sqlite3.Error:
+        return []
+    try:
+        return conn.execute(
+            f"SELECT id, spacecraft, antenna_id, start_ts, end_ts, duration FROM {table} "
+            f"WHERE id > ? AND end_ts >= ? ORDER BY id",
+            (last_id, min_end_ts),
+        ).fetchall()
+    except sqlite3.Error:
+        return []  # No passes table yet
+    finally:
+        conn.close()
+
+
+class Sessionizer:
+    """
+    Turns successive snapshots into completed communication passes.
+
+    Used as a SQLiteWriter sink after the history store. Open contacts are
+    kept in a dict keyed by (spacecraft, antenna_id); a scrape is complete
+    once rows with a later timestamp arrive, and every open contact missing
+    from it (or all of them, after a gap longer than max_gap) is closed.
+    A closed pass is written to {table} and its duration (last minus first
+    sighting) is written back into the pass's history rows, which stay NULL
+    while the contact is open. Open contacts are mirrored to {table}_open
+    so a restart resumes them; on first start history is replayed in bulk.
+    """
+
+    def __init__(self, history, table="communication_passes", max_gap=900):
+        self.history = history
+        self.table = table
+        self.max_gap = max_gap
+        self._open = {}
+        self._scrape_ts = None
+        self._seen = set()
+        self.passes_closed = 0
+        self._passes_committed = 0
+
+    def ensure_schema(self, conn):
+        """Create the pass tables; replay history when they are new, else resume open contacts."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+        ).fetchone() is not None
+
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spacecraft TEXT NOT NULL,
+                antenna_id TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                peak_signal REAL,
+                samples INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_pair_start "
+                     f"ON {self.table} (spacecraft, antenna_id, start_ts)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_start ON {self.table} (start_ts)")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table}_open (
+                spacecraft TEXT NOT NULL,
+                antenna_id TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,
+                peak_signal REAL,
+                samples INTEGER NOT NULL,
+                PRIMARY KEY (spacecraft, antenna_id)
+            )
+        """)
+
+        if exists:
+            self._load_open(conn)
+        else:
+            self.backfill(conn)
+        conn.commit()
+
+    def _load_open(self, conn):
+        self._open = {}
+        for spacecraft, antenna_id, start_ts, last_ts, peak_signal, samples in conn.execute(
+                f"SELECT * FROM {self.table}_open"):
+            self._open[(spacecraft, antenna_id)] = Contact(start_ts, last_ts, peak_signal, samples)
+        # The last scrape before shutdown is the one still pending.
+        self._scrape_ts = max((contact.last_ts for contact in self._open.values()), default=None)
+        self._seen = {pair for pair, contact in self._open.items() if contact.last_ts == self._scrape_ts}
+
+    def rollback(self, conn):
+        """After a failed batch: forget its contacts and closes, back to the committed tables."""
+        self._load_open(conn)
+        self.passes_closed = self._passes_committed
+
+    def backfill(self, conn, chunk_size=10000):
+        """Replay every existing history row, oldest first, closing passes as they end."""
+        columns = ", ".join(RECORD_COLUMNS)
+        try:
+            cursor = conn.execute(f"SELECT {columns} FROM {self.history.table} ORDER BY ts, id")
+        except sqlite3.OperationalError:
+            return  # No history yet
+        # Labelling only touches communication_duration, never the ts index
+        # this cursor walks, so rows can be updated behind it.
+        replayed = 0
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            self._observe(conn, chunk)
+            replayed += len(chunk)
+        for pair, contact in self._open.items():
+            # Still open: unlabelled until the pass completes.
+            self.history.set_duration(conn, pair[0], pair[1], contact.start_ts, contact.last_ts, None)
+        self._save_open(conn)
+        if replayed:
+            print(f"Sessionized {replayed} history rows into {self.passes_closed} passes.")
+
+    def rebuild(self, conn):
+        """Forget every pass and replay history, e.g. after rows were imported behind the live edge."""
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.execute(f"DELETE FROM {self.table}_open")
+        self._open = {}
+        self._scrape_ts = None
+        self._seen = set()
+        self.passes_closed = 0
+        self.backfill(conn)
+
+    def write(self, conn, rows):
+        """Fold a batch of history rows into open contacts; the caller owns the transaction."""
+        self._passes_committed = self.passes_closed
+        self._observe(conn, sorted(rows, key=lambda r: r[_TS]))
+        self._save_open(conn)
+
+    def _observe(self, conn, rows):
+        for row in rows:
+            ts = row[_TS]
+            if self._scrape_ts is None or ts > self._scrape_ts:
+                if self._scrape_ts is not None:
+                    self._finish_scrape(conn, ts)
+                self._scrape_ts = ts
+                self._seen = set()
+
+            pair = (row[_SPACECRAFT], row[_ANTENNA])
+            if pair[0] in _NO_TARGET or pair[1] is None:
+                continue
+            self._seen.add(pair)
+            signal = row[_SIGNAL]
+            contact = self._open.get(pair)
+            if contact is None:
+                self._open[pair] = Contact(ts, ts, signal, 1)
+                continue
+            if ts > contact.last_ts:
+                # One sample per scrape, however many signals the pair has in it.
+                contact.last_ts = ts
+                contact.samples += 1
+            if signal is not None and (contact.peak_signal is None or signal > contact.peak_signal):
+                contact.peak_signal = signal
+
+    def _finish_scrape(self, conn, next_ts):
+        """Close contacts absent from the completed scrape; O(open contacts)."""
+        feed_gap = next_ts - self._scrape_ts > self.max_gap
+        closed = [pair for pair in self._open if feed_gap or pair not in self._seen]
+        for pair in closed:
+            self._close(conn, pair, self._open.pop(pair))
+
+    def _close(self, conn, pair, contact):
+        duration = contact.last_ts - contact.start_ts
+        conn.execute(
+            f"INSERT INTO {self.table} (spacecraft, antenna_id, start_ts, end_ts, duration, peak_signal, samples) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?)",
+            pair + (contact.start_ts, contact.last_ts, duration, contact.peak_signal, contact.samples),
+        )
+        self.history.set_duration(conn, pair[0], pair[1], contact.start_ts, contact.last_ts, duration)
+        self.passes_closed += 1
+
+    def _save_open(self, conn):
+        conn.execute(f"DELETE FROM {self.table}_open")
+        conn.executemany(
+            f"INSERT INTO {self.table}_open VALUES (?, ?, ?, ?, ?, ?)",
+            [pair + (c.start_ts, c.last_ts, c.peak_signal, c.samples) for pair, c in self._open.items()],
+        )
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import threading
+import time
+
+try:
+    from .metrics import STAGE_SECONDS
+except ImportError:  # Running as a script from src/
+    from metrics import STAGE_SECONDS
+
+class PlotRenderer:
+    """
+    Renders signal-strength plots off the request thread.
+
+    Uses the object-oriented Figure/Agg API (no pyplot global state), so
+    renders are safe to run concurrently in a small worker pool. PNGs are
+    cached under a hash of the plotted points; identical snapshots are
+    rendered once and can be served with the hash as ETag.
+    """
+
+    def __init__(self, max_workers=2, cache_size=32):
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plot")
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def snapshot_key(points):
+        """Content hash of the (timestamp, strength) points."""
+        return hashlib.sha1(repr(points).encode("utf-8")).hexdigest()[:20]
+
+    def submit(self, data):
+        """Schedule a render of the given records and return its cache key."""
+        points = tuple((d["timestamp"], d["signal_strength"]) for d in data)
+        key = self.snapshot_key(points)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+            elif key not in self._pending:
+                self._pending[key] = self._executor.submit(self._render_and_store, key, points)
+        return key
+
+    def get(self, key, timeout=None):
+        """Return PNG bytes for key, waiting for an in-flight render; None if unknown."""
+        with self._lock:
+            png = self._cache.get(key)
+            future = self._pending.get(key)
+        if png is not None:
+            return png
+        if future is None:
+            return None
+        return future.result(timeout=timeout)
+
+    def _render_and_store(self, key, points):
+        try:
+            start = time.perf_counter()
+            png = self._render(points)
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="plot")
+            with self._lock:
+                self._cache[key] = png
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return png
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _render(self, points):
+        # Deferred: matplotlib takes most of a second to import.
+        from matplotlib.figure import Figure
+
+        timestamps = [p[0] for p in points]
+        strengths = [p[1] for p in points]
+        fig = Figure(figsize=(10, 5))
+        ax = fig.add_subplot()
+        ax.plot(timestamps, strengths, marker="o")
+        ax.set_title("DSN Signal Strength Over Time")
+        ax.set_xlabel("Timestamp")
+        ax.set_ylabel("Signal Strength")
+        ax.tick_params(axis="x", labelrotation=45)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -1,7 +1,34 @@
-import pandas as pd
-import pickle
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+import numpy as np
+import threading
+from collections import namedtuple
+
+try:
+    from .etl import read_frame
+    from .features import FeatureEncoder
+    from .metrics import STAGE_SECONDS
+    from .registry import ModelRegistry
+except ImportError:  # Running as a script from src/
+    from etl import read_frame
+    from features import FeatureEncoder
+    from metrics import STAGE_SECONDS
+    from registry import ModelRegistry
+
+# The serving model is swapped as a whole: readers take one reference and
+# keep using it even if a newer version is installed meanwhile.
+ActiveModel = namedtuple("ActiveModel", ["version", "model", "encoder"])
+
+
+def model_configs(ml_config):
+    """
+    {target: settings} for the main model and each entry of ml.models.
+    An entry needs its own target and model_path; any other ml setting it
+    leaves out (features, time_resolution, ...) is shared with the main model.
+    """
+    configs = {ml_config["target"]: ml_config}
+    for model in ml_config.get("models") or []:
+        configs[model["target"]] = {**ml_config, **model}
+    return configs
+
 
 class DSNPredictor:
     def __init__(self, ml_config):
@@ -9,47 +36,111 @@ class DSNPredictor:
         self.training_data = ml_config["training_data"]
         self.features = ml_config["features"]
         self.target = ml_config["target"]
-        self.model = None
-        self._load_model()
+        self.time_resolution = ml_config.get("time_resolution", 3600)
+        self.registry = ModelRegistry(
+            self.model_path,
+            keep=ml_config.get("keep_versions", 3),
+            compress=ml_config.get("compress", 0),
+        )
+        # Loaded lazily on first use so startup does not pay for unpickling.
+        self._active = None
+        self._load_lock = threading.Lock()
+        # (model the entries belong to, encoded feature row -> prediction)
+        self._memo = (None, {})
 
     def _load_model(self):
         try:
-            with open(self.model_path, "rb") as f:
-                self.model = pickle.load(f)
-                print("Loaded existing model.")
-        except FileNotFoundError:
-            self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+            version, artifact = self.registry.load()
+        except Exception as e:
+            print(f"Failed to load model: {e}")
+            version, artifact = None, None
+        if artifact is None:
+            from sklearn.ensemble import RandomForestRegressor
             print("Initialized new model.")
+            return ActiveModel(None, RandomForestRegressor(n_estimators=100, random_state=42),
+                               FeatureEncoder(self.features, self.time_resolution))
+        print(f"Loaded model version {version}.")
+        return ActiveModel(version, artifact["model"], artifact["encoder"])
+
+    def _current(self):
+        active = self._active
+        if active is None:
+            with self._load_lock:
+                if self._active is None:
+                    self._active = self._load_model()
+                active = self._active
+        return active
+
+    @property
+    def model(self):
+        return self._current().model
+
+    @property
+    def encoder(self):
+        return self._current().encoder
+
+    def reload(self):
+        """Load the newest saved version and swap it in once it is fully loaded."""
+        active = self._active
+        if active is not None and active.version == self.registry.latest_version():
+            return
+        # Build the replacement off to the side; predict() keeps serving the
+        # old model until this single reference assignment.
+        self._active = self._load_model()
+
+    def train_model(self, path=None):
+        """Train from a CSV, Parquet or Arrow file (default ml.training_data), reading only the needed columns."""
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
 
-    def train_model(self):
         try:
-            df = pd.read_csv(self.training_data)
-            X = df[self.features]
-            y = df[self.target]
+            columns = list(dict.fromkeys(self.features + [self.target]))
+            df = read_frame(path or self.training_data, columns).dropna(subset=[self.target])
+            encoder = FeatureEncoder(self.features, self.time_resolution).fit(df)
+            X = encoder.transform(df)
+            y = df[self.target].to_numpy(dtype=np.float64)
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            self.model.fit(X_train, y_train)
-            score = self.model.score(X_test, y_test)
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            model.fit(X_train, y_train)
+            score = model.score(X_test, y_test)
             print(f"Model trained. R^2 score: {score:.2f}")
-            with open(self.model_path, "wb") as f:
-                pickle.dump(self.model, f)
-            print("Model saved.")
+            version = self.registry.save({"model": model, "encoder": encoder})
+            self._active = ActiveModel(version, model, encoder)
+            print(f"Model saved as version {version}.")
         except Exception as e:
             print(f"Training failed: {e}")
 
     def is_trained(self):
-        return hasattr(self.model, 'estimators_') and self.model.estimators_ is not None
+        model = self.model
+        return hasattr(model, 'estimators_') and model.estimators_ is not None
 
     def predict(self, data):
-        if self.model is None:
+        active = self._current()
+        if active.model is None:
             print("No model available. Train first.")
             return None
-        if not self.is_trained():
+        if not hasattr(active.model, 'estimators_'):
             print("Model not trained yet. Train first.")
             return None
         try:
-            df = pd.DataFrame(data, columns=self.features)
-            predictions = self.model.predict(df)
-            return predictions
+            with STAGE_SECONDS.time(stage="predict"):
+                return self._predict(active, data)
         except Exception as e:
             print(f"Prediction failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _predict(self, active, data):
+        X = active.encoder.transform_records(data)
+        keys = [row.tobytes() for row in X]
+        owner, memo = self._memo
+        if owner is not active:
+            memo = {}
+        misses = [i for i, key in enumerate(keys) if key not in memo]
+        fresh = {}
+        if misses:
+            # One vectorized call for every row not seen last scrape.
+            for i, value in zip(misses, active.model.predict(X[misses])):
+                fresh[keys[i]] = value
+        predictions = np.array([fresh[key] if key in fresh else memo[key] for key in keys])
+        self._memo = (active, dict(zip(keys, predictions)))
+        return predictions
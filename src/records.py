@@ -0,0 +1,84 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+# Column order shared by history rows, DataFrames and SQLite parameters.
+RECORD_COLUMNS = (
+    "ts", "spacecraft", "antenna_id", "signal_strength",
+    "communication_duration", "data_rate", "frequency",
+    "azimuth", "elevation", "spacecraft_range"
+)
+
+
+def format_range(range_meters):
+    """Format spacecraft range into a human-readable string."""
+    if range_meters is None or range_meters <= 0:
+        return "Unknown"
+
+    # Convert to kilometers
+    range_km = range_meters / 1000.0
+
+    # Format based on distance
+    if range_km >= 1000000:  # More than 1 million km
+        return f"{range_km/1000000:.2f} million km"
+    elif range_km >= 1000:  # More than 1000 km
+        return f"{range_km/1000:.2f} thousand km"
+    else:
+        return f"{range_km:.2f} km"
+
+
+@dataclass(frozen=True, slots=True)
+class DSNRecord:
+    """
+    One active downlink observed at a single scrape.
+
+    Records are immutable and slot-based so long snapshot histories stay
+    small; use dataclasses.replace() to derive modified copies. The ISO
+    timestamp and range_display are computed views over ts and
+    spacecraft_range rather than stored strings.
+    """
+
+    ts: int
+    spacecraft: str
+    antenna_id: str
+    signal_strength: float
+    communication_duration: float = None  # Set once the pass closes
+    data_rate: float = None
+    frequency: float = None
+    azimuth: float = None
+    elevation: float = None
+    spacecraft_range: float = None
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.ts).isoformat()
+
+    @property
+    def range_display(self):
+        return format_range(self.spacecraft_range)
+
+    def as_row(self):
+        """Parameter tuple in RECORD_COLUMNS order."""
+        return (self.ts, self.spacecraft, self.antenna_id, self.signal_strength,
+                self.communication_duration, self.data_rate, self.frequency,
+                self.azimuth, self.elevation, self.spacecraft_range)
+
+    def to_dict(self):
+        """Plain dict for templates and JSON payloads."""
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        data["timestamp"] = self.timestamp
+        data["range_display"] = self.range_display
+        del data["ts"]
+        return data
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+
+def records_to_frame(records, columns=None):
+    """Build a DataFrame column by column, including computed attributes."""
+    import pandas as pd
+
+    columns = list(columns or RECORD_COLUMNS)
+    return pd.DataFrame({column: [getattr(record, column) for record in records] for column in columns},
+                        columns=columns)
@@ -0,0 +1,94 @@
+import glob
+import os
+import pickle
+import re
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts next to the configured model_path.
+
+    Each save writes {stem}-v{N}.joblib through a temporary file and an
+    atomic rename, so a crash mid-write never damages an existing version.
+    With compress=0 the tree arrays are loaded memory-mapped, which keeps
+    startup fast and lets processes share the pages; a non-zero compress
+    level trades that for smaller files. Only the newest `keep` versions
+    are retained.
+    """
+
+    def __init__(self, model_path, keep=3, compress=0):
+        self.legacy_path = model_path
+        self.directory = os.path.dirname(model_path) or "."
+        self.stem = os.path.splitext(os.path.basename(model_path))[0]
+        self.keep = keep
+        self.compress = compress
+        self._pattern = re.compile(rf"^{re.escape(self.stem)}-v(\d+)\.joblib$")
+
+    def path_for(self, version):
+        return os.path.join(self.directory, f"{self.stem}-v{version:05d}.joblib")
+
+    def versions(self):
+        """Saved versions, oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.stem}-v*.joblib")):
+            match = self._pattern.match(os.path.basename(path))
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def latest_version(self):
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def save(self, artifact):
+        """Atomically write artifact as the next version and return that version."""
+        import joblib
+
+        os.makedirs(self.directory, exist_ok=True)
+        version = (self.latest_version() or 0) + 1
+        path = self.path_for(version)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        try:
+            joblib.dump(artifact, tmp_path, compress=self.compress)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Never leave a half-written file behind to pile up.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._prune()
+        return version
+
+    def _prune(self):
+        for version in self.versions()[:-self.keep]:
+            try:
+                os.remove(self.path_for(version))
+            except OSError:
+                pass  # A reader on another platform may still hold it open
+
+    def load(self, version=None):
+        """Return (version, artifact) for the given or latest version, or (None, None)."""
+        import joblib
+
+        if version is None:
+            version = self.latest_version()
+        if version is None:
+            return self._load_legacy()
+        mmap_mode = "r" if not self.compress else None
+        return version, joblib.load(self.path_for(version), mmap_mode=mmap_mode)
+
+    def _load_legacy(self):
+        """Import a single-file pickle from before versioning as version 1."""
+        try:
+            with open(self.legacy_path, "rb") as f:
+                artifact = pickle.load(f)
+        except (FileNotFoundError, IsADirectoryError):
+            return None, None
+        if not (isinstance(artifact, dict) and "encoder" in artifact):
+            print("Existing model has no feature encoder; retrain required.")
+            return None, None
+        version = self.save(artifact)
+        print(f"Imported legacy model '{self.legacy_path}' as version {version}.")
+        return self.load(version)
@@ -0,0 +1,171 @@
+import bisect
+import glob
+import os
+import re
+import time
+
+import requests
+
+try:
+    from .fetcher import FetchResult
+except ImportError:  # Running as a script from src/
+    from fetcher import FetchResult
+
+# Captures are named {epoch milliseconds}-{source}{suffix}.
+_SUFFIXES = {"primary": ".xml", "backup": ".html"}
+_CONTENT_TYPES = {"primary": "text/xml", "backup": "text/html"}
+_CAPTURE_NAME = re.compile(r"^(\d+)-(primary|backup)\.(xml|html)$")
+
+_DISH = re.compile(r"\s*<dish .*?</dish>", re.S)
+_DISH_NAME = re.compile(r'(<dish name=")([^"]*)(")')
+_TABLE_ROW = re.compile(r"\s*<tr>\s*<td>.*?</tr>", re.S)
+
+
+def scale_feed(source, body, factor):
+    """
+    Multiply the dishes (and so the signals) in a feed body factor times.
+
+    Copies get suffixed antenna names (DSS14-2, DSS14-3, ...) so every copy
+    is a distinct spacecraft/antenna pair downstream.
+    """
+    if factor <= 1:
+        return body
+    if source == "primary":
+        dishes = _DISH.findall(body)
+        copies = "".join(
+            _DISH_NAME.sub(lambda m: f"{m.group(1)}{m.group(2)}-{k}{m.group(3)}", dish)
+            for k in range(2, factor + 1) for dish in dishes
+        )
+        return body.replace("</dsn>", copies + "\n</dsn>")
+    rows = _TABLE_ROW.findall(body)
+    copies = "".join(
+        re.sub(r"(<td>.*?</td>\s*<td>)(.*?)(</td>)", lambda m: f"{m.group(1)}{m.group(2).strip()}-{k}{m.group(3)}",
+               row, count=1, flags=re.S)
+        for k in range(2, factor + 1) for row in rows
+    )
+    return body.replace("</table>", copies + "\n</table>")
+
+
+def list_captures(directory):
+    """(epoch ms, source, path) for every capture in directory, oldest first."""
+    captures = []
+    for path in glob.glob(os.path.join(directory, "*")):
+        match = _CAPTURE_NAME.match(os.path.basename(path))
+        if match:
+            captures.append((int(match.group(1)), match.group(2), path))
+    return sorted(captures)
+
+
+class RecordingFetcher:
+    """
+    Wraps a FeedFetcher and saves every full response body to directory.
+
+    304s are not written; a replay simply keeps serving the previous
+    capture until the next recorded change.
+    """
+
+    def __init__(self, fetcher, directory):
+        self.fetcher = fetcher
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._last_ms = 0
+
+    def _save(self, result):
+        if result.not_modified or result.body is None:
+            return result
+        # Strictly increasing, so two captures in one millisecond keep their order.
+        self._last_ms = max(int(time.time() * 1000), self._last_ms + 1)
+        path = os.path.join(self.directory, f"{self._last_ms:013d}-{result.source}{_SUFFIXES[result.source]}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(result.body)
+        os.replace(tmp_path, path)
+        return result
+
+    def fetch(self, params=None):
+        return self._save(self.fetcher.fetch(params))
+
+    def fetch_backup(self):
+        return self._save(self.fetcher.fetch_backup())
+
+    def forget(self, url):
+        self.fetcher.forget(url)
+
+    def close(self):
+        self.fetcher.close()
+
+
+class ReplayFetcher:
+    """
+    FeedFetcher stand-in that serves captured responses.
+
+    With speed > 0 the recording plays back on its own timeline, speed
+    times faster than it was captured; a fetch between two recorded
+    changes answers like a 304. With speed 0 every fetch advances to the
+    next capture, which is what benchmarks want. scale multiplies the
+    dishes in each body (see scale_feed). With loop the recording restarts
+    after its last capture.
+    """
+
+    def __init__(self, directory, speed=1.0, scale=1, loop=True):
+        self.captures = list_captures(directory)
+        if not self.captures:
+            raise ValueError(f"No captures found in {directory}")
+        self.speed = speed
+        self.scale = scale
+        self.loop = loop
+        first, last = self.captures[0][0], self.captures[-1][0]
+        self._offsets = [t - first for t, _, _ in self.captures]
+        # One average capture gap after the last capture before looping.
+        self._span = (last - first) + max(1, (last - first) // max(1, len(self.captures) - 1))
+        self._bodies = {}
+        self._started = None
+        self._position = -1
+        self._force = False
+
+    def _body(self, index):
+        if index not in self._bodies:
+            _, source, path = self.captures[index]
+            with open(path, "r", encoding="utf-8") as f:
+                self._bodies[index] = scale_feed(source, f.read(), self.scale)
+        return self._bodies[index]
+
+    def _advance(self):
+        """Move to the capture that is current now and return its index."""
+        count = len(self.captures)
+        if self.speed <= 0:
+            position = self._position + 1
+        else:
+            if self._started is None:
+                self._started = time.monotonic()
+            elapsed_ms = int((time.monotonic() - self._started) * 1000 * self.speed)
+            laps, offset = divmod(elapsed_ms, self._span)
+            position = laps * count + bisect.bisect_right(self._offsets, offset) - 1
+        if not self.loop:
+            position = min(position, count - 1)
+        self._position = position
+        return position % count
+
+    def fetch(self, params=None):
+        previous = self._position
+        index = self._advance()
+        source = self.captures[index][1]
+        if self._position == previous and not self._force:
+            return FetchResult(source, None, None, True)
+        self._force = False
+        return FetchResult(source, self._body(index), _CONTENT_TYPES[source], False)
+
+    def fetch_backup(self):
+        """The most recent backup capture at the current position."""
+        count = len(self.captures)
+        index = max(self._position, 0) % count
+        for candidate in range(index, index - count, -1):
+            if self.captures[candidate][1] == "backup":
+                return FetchResult("backup", self._body(candidate % count), "text/html", False)
+        raise requests.RequestException("No backup capture recorded")
+
+    def forget(self, url):
+        self._force = True
+
+    def close(self):
+        pass
@@ -0,0 +1,306 @@
+import sqlite3
+
+try:
+    from .records import RECORD_COLUMNS
+    from .storage import connect_reader
+except ImportError:  # Running as a script from src/
+    from records import RECORD_COLUMNS
+    from storage import connect_reader
+
+# (suffix, bucket width in seconds), finest first.
+RESOLUTIONS = (("1m", 60), ("1h", 3600), ("1d", 86400))
+
+_TS = RECORD_COLUMNS.index("ts")
+_SPACECRAFT = RECORD_COLUMNS.index("spacecraft")
+_ANTENNA = RECORD_COLUMNS.index("antenna_id")
+_SIGNAL = RECORD_COLUMNS.index("signal_strength")
+_DATA_RATE = RECORD_COLUMNS.index("data_rate")
+
+# Stored aggregates; averages are kept as sum/count so buckets stay mergeable.
+_AGGREGATE_COLUMNS = (
+    "samples", "signal_count", "signal_sum", "signal_min", "signal_max",
+    "rate_count", "rate_sum", "rate_min", "rate_max",
+    "contact_seconds", "first_ts", "last_ts",
+)
+
+_MERGE = {
+    "samples": "samples + excluded.samples",
+    "signal_count": "signal_count + excluded.signal_count",
+    "signal_sum": "signal_sum + excluded.signal_sum",
+    "signal_min": "MIN(COALESCE(signal_min, excluded.signal_min), COALESCE(excluded.signal_min, signal_min))",
+    "signal_max": "MAX(COALESCE(signal_max, excluded.signal_max), COALESCE(excluded.signal_max, signal_max))",
+    "rate_count": "rate_count + excluded.rate_count",
+    "rate_sum": "rate_sum + excluded.rate_sum",
+    "rate_min": "MIN(COALESCE(rate_min, excluded.rate_min), COALESCE(excluded.rate_min, rate_min))",
+    "rate_max": "MAX(COALESCE(rate_max, excluded.rate_max), COALESCE(excluded.rate_max, rate_max))",
+    "contact_seconds": "contact_seconds + excluded.contact_seconds",
+    "first_ts": "MIN(first_ts, excluded.first_ts)",
+    "last_ts": "MAX(last_ts, excluded.last_ts)",
+}
+
+
+def resolution_for(start_ts, end_ts, max_points):
+    """Pick the finest resolution that covers [start_ts, end_ts] in at most max_points buckets."""
+    span = max(0, end_ts - start_ts)
+    for suffix, seconds in RESOLUTIONS:
+        if span // seconds <= max_points:
+            return suffix
+    return RESOLUTIONS[-1][0]
+
+
+def _merge_min(current, value):
+    if value is None:
+        return current
+    return value if current is None else min(current, value)
+
+
+def _merge_max(current, value):
+    if value is None:
+        return current
+    return value if current is None else max(current, value)
+
+
+class RollupStore:
+    """
+    Per spacecraft/antenna aggregates in 1-minute, 1-hour and 1-day buckets.
+
+    Used as a second SQLiteWriter sink: every flushed batch of history rows
+    is folded into {prefix}_1m, {prefix}_1h and {prefix}_1d with upserts in
+    the same transaction. Contact seconds add the gap since a pair was last
+    seen, as long as that gap is at most max_gap; a longer gap starts a new
+    contact. On first start the tables are backfilled from the history table.
+    """
+
+    def __init__(self, db_file, source_table, prefix="rollup", max_gap=900, max_points=1500):
+        self.db_file = db_file
+        self.source_table = source_table
+        self.prefix = prefix
+        self.max_gap = max_gap
+        self.max_points = max_points
+        # (spacecraft, antenna_id) -> ts of the last sample folded in
+        self._last_seen = {}
+
+    def table_for(self, suffix):
+        return f"{self.prefix}_{suffix}"
+
+    def ensure_schema(self, conn):
+        """Create the rollup tables; backfill them from history when new."""
+        finest = self.table_for(RESOLUTIONS[0][0])
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (finest,)
+        ).fetchone() is not None
+
+        for suffix, _ in RESOLUTIONS:
+            name = self.table_for(suffix)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {name} (
+                    spacecraft TEXT NOT NULL,
+                    antenna_id TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    signal_count INTEGER NOT NULL,
+                    signal_sum REAL NOT NULL,
+                    signal_min REAL,
+                    signal_max REAL,
+                    rate_count INTEGER NOT NULL,
+                    rate_sum REAL NOT NULL,
+                    rate_min REAL,
+                    rate_max REAL,
+                    contact_seconds INTEGER NOT NULL,
+                    first_ts INTEGER NOT NULL,
+                    last_ts INTEGER NOT NULL,
+                    PRIMARY KEY (spacecraft, antenna_id, bucket)
+                ) WITHOUT ROWID
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_bucket ON {name} (bucket)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_antenna ON {name} (antenna_id, bucket)")
+
+        if exists:
+            self._load_last_seen(conn)
+        else:
+            self.backfill(conn)
+        conn.commit()
+
+    def _load_last_seen(self, conn):
+        self._last_seen = {
+            (spacecraft, antenna_id): last_ts
+            for spacecraft, antenna_id, last_ts in conn.execute(
+                f"SELECT spacecraft, antenna_id, MAX(last_ts) FROM {self.table_for(RESOLUTIONS[0][0])} "
+                f"GROUP BY spacecraft, antenna_id")
+        }
+
+    def rollback(self, conn):
+        """After a failed batch: forget the samples it folded in."""
+        self._load_last_seen(conn)
+
+    def backfill(self, conn, chunk_size=10000):
+        """Fold every existing history row into the rollups, oldest first."""
+        columns = ", ".join(RECORD_COLUMNS)
+        try:
+            cursor = conn.execute(f"SELECT {columns} FROM {self.source_table} ORDER BY ts")
+        except sqlite3.OperationalError:
+            return  # No history yet
+        folded = 0
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            self.write(conn, chunk)
+            folded += len(chunk)
+        if folded:
+            print(f"Built rollups from {folded} history rows.")
+
+    def rebuild(self, conn, start_ts, end_ts):
+        """
+        Recompute every bucket that overlaps [start_ts, end_ts] from history,
+        e.g. after rows were bulk-imported behind the live edge.
+
+        The finest resolution is one INSERT ... SELECT over history, with
+        LAG() supplying each pair's gap since its previous sample (from just
+        before the range on). Coarser resolutions are merged from it.
+        """
+        day = RESOLUTIONS[-1][1]
+        start, end = start_ts - start_ts % day, end_ts - end_ts % day + day
+        columns = ", ".join(("spacecraft", "antenna_id", "bucket") + _AGGREGATE_COLUMNS)
+        for suffix, _ in RESOLUTIONS:
+            conn.execute(f"DELETE FROM {self.table_for(suffix)} WHERE bucket >= ? AND bucket < ?", (start, end))
+
+        (finest, seconds), coarser = RESOLUTIONS[0], RESOLUTIONS[1:]
+        conn.execute(f"""
+            INSERT INTO {self.table_for(finest)} ({columns})
+            SELECT spacecraft, antenna_id, ts - ts % {seconds},
+                   COUNT(*), COUNT(signal_strength), TOTAL(signal_strength),
+                   MIN(signal_strength), MAX(signal_strength),
+                   COUNT(data_rate), TOTAL(data_rate), MIN(data_rate), MAX(data_rate),
+                   TOTAL(CASE WHEN gap > 0 AND gap <= :max_gap THEN gap ELSE 0 END),
+                   MIN(ts), MAX(ts)
+            FROM (
+                SELECT spacecraft, antenna_id, ts, signal_strength, data_rate,
+                       ts - LAG(ts) OVER (PARTITION BY spacecraft, antenna_id ORDER BY ts) AS gap
+                FROM {self.source_table}
+                WHERE ts >= :lookback AND ts < :end
+                  AND spacecraft IS NOT NULL AND antenna_id IS NOT NULL
+            )
+            WHERE ts >= :start
+            GROUP BY spacecraft, antenna_id, ts - ts % {seconds}
+        """, {"max_gap": self.max_gap, "lookback": start - self.max_gap, "start": start, "end": end})
+        for suffix, seconds in coarser:
+            conn.execute(f"""
+                INSERT INTO {self.table_for(suffix)} ({columns})
+                SELECT spacecraft, antenna_id, bucket - bucket % {seconds},
+                       SUM(samples), SUM(signal_count), SUM(signal_sum), MIN(signal_min), MAX(signal_max),
+                       SUM(rate_count), SUM(rate_sum), MIN(rate_min), MAX(rate_max),
+                       SUM(contact_seconds), MIN(first_ts), MAX(last_ts)
+                FROM {self.table_for(finest)}
+                WHERE bucket >= ? AND bucket < ?
+                GROUP BY spacecraft, antenna_id, bucket - bucket % {seconds}
+            """, (start, end))
+
+        for spacecraft, antenna_id, last_ts in conn.execute(
+                f"SELECT spacecraft, antenna_id, MAX(last_ts) FROM {self.table_for(finest)} "
+                f"GROUP BY spacecraft, antenna_id"):
+            pair = (spacecraft, antenna_id)
+            self._last_seen[pair] = max(last_ts, self._last_seen.get(pair, last_ts))
+
+    def write(self, conn, rows):
+        """Fold history rows into every resolution; the caller owns the transaction."""
+        buckets = [{} for _ in RESOLUTIONS]
+        for row in sorted(rows, key=lambda r: r[_TS]):
+            ts = row[_TS]
+            pair = (row[_SPACECRAFT], row[_ANTENNA])
+            if pair[0] is None or pair[1] is None:
+                continue
+            last = self._last_seen.get(pair)
+            contact = ts - last if last is not None and 0 < ts - last <= self.max_gap else 0
+            if last is None or ts > last:
+                self._last_seen[pair] = ts
+            signal, rate = row[_SIGNAL], row[_DATA_RATE]
+
+            for (_, seconds), aggregates in zip(RESOLUTIONS, buckets):
+                key = pair + (ts - ts % seconds,)
+                agg = aggregates.get(key)
+                if agg is None:
+                    agg = aggregates[key] = [0, 0, 0.0, None, None, 0, 0.0, None, None, 0, ts, ts]
+                agg[0] += 1
+                if signal is not None:
+                    agg[1] += 1
+                    agg[2] += signal
+                    agg[3] = _merge_min(agg[3], signal)
+                    agg[4] = _merge_max(agg[4], signal)
+                if rate is not None:
+                    agg[5] += 1
+                    agg[6] += rate
+                    agg[7] = _merge_min(agg[7], rate)
+                    agg[8] = _merge_max(agg[8], rate)
+                agg[9] += contact
+                agg[10] = min(agg[10], ts)
+                agg[11] = max(agg[11], ts)
+
+        columns = ", ".join(("spacecraft", "antenna_id", "bucket") + _AGGREGATE_COLUMNS)
+        placeholders = ", ".join("?" for _ in range(3 + len(_AGGREGATE_COLUMNS)))
+        updates = ", ".join(f"{column} = {_MERGE[column]}" for column in _AGGREGATE_COLUMNS)
+        for (suffix, _), aggregates in zip(RESOLUTIONS, buckets):
+            if not aggregates:
+                continue
+            conn.executemany(
+                f"INSERT INTO {self.table_for(suffix)} ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (spacecraft, antenna_id, bucket) DO UPDATE SET {updates}",
+                [key + tuple(agg) for key, agg in aggregates.items()],
+            )
+
+    def series(self, start_ts, end_ts, spacecraft=None, antenna_id=None, resolution=None):
+        """
+        Return (resolution, points) for buckets in [start_ts, end_ts].
+
+        Pairs matching the optional spacecraft/antenna filters are merged per
+        bucket. Without an explicit resolution the finest one that keeps the
+        series within max_points buckets is used.
+        """
+        if resolution is None:
+            resolution = resolution_for(start_ts, end_ts, self.max_points)
+        seconds = dict(RESOLUTIONS).get(resolution)
+        if seconds is None:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+
+        where = ["bucket BETWEEN ? AND ?"]
+        params = [start_ts - start_ts % seconds, end_ts]
+        if spacecraft:
+            where.append("spacecraft = ?")
+            params.append(spacecraft)
+        if antenna_id:
+            where.append("antenna_id = ?")
+            params.append(antenna_id)
+        query = f"""
+            SELECT bucket, SUM(samples), COUNT(*),
+                   SUM(signal_sum) / NULLIF(SUM(signal_count), 0), MIN(signal_min), MAX(signal_max),
+                   SUM(rate_sum) / NULLIF(SUM(rate_count), 0), MIN(rate_min), MAX(rate_max),
+                   SUM(contact_seconds)
+            FROM {self.table_for(resolution)}
+            WHERE {" AND ".join(where)}
+            GROUP BY bucket
+            ORDER BY bucket
+        """
+
+        try:
+            conn = connect_reader(self.db_file)
+        except sqlite3.Error as e:
+            print(f"Rollups unavailable: {e}")
+            return resolution, []
+        try:
+            rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Rollup query failed: {e}")
+            return resolution, []
+        finally:
+            conn.close()
+
+        points = [{
+            "bucket": bucket,
+            "samples": samples,
+            "tracks": tracks,
+            "signal_strength": {"min": signal_min, "avg": signal_avg, "max": signal_max},
+            "data_rate": {"min": rate_min, "avg": rate_avg, "max": rate_max},
+            "contact_seconds": contact,
+        } for (bucket, samples, tracks, signal_avg, signal_min, signal_max,
+               rate_avg, rate_min, rate_max, contact) in rows]
+        return resolution, points
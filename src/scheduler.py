@@ -0,0 +1,65 @@
+import random
+
+
+class AdaptiveScheduler:
+    """
+    Picks the delay before the next scrape from what the last one saw.
+
+    A contact starting or ending, or a signal moving by signal_change dB or
+    more, drops the delay to min_interval. An unchanged feed stretches it
+    by `growth` per scrape up to max_interval. Small changes drift back
+    towards base_interval. An empty feed is observed like any other, so
+    the last contacts ending counts as a change. Only a failed scrape (a
+    fetch or parse error, reported through failure()) backs off
+    exponentially from min_interval up to max_backoff, and every delay is
+    jittered so several scrapers never poll in lockstep.
+    """
+
+    def __init__(self, base_interval=300, min_interval=None, max_interval=None, signal_change=3.0,
+                 growth=1.5, max_backoff=1800, jitter=0.1):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval or base_interval, base_interval)
+        self.max_interval = max(max_interval or base_interval, base_interval)
+        self.signal_change = signal_change
+        self.growth = growth
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.interval = base_interval
+        self.failures = 0
+        self.mode = "steady"
+        self._previous = None
+
+    def _jittered(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def observe(self, records):
+        """Record a scrape's records and return the delay before the next one."""
+        self.failures = 0
+        current = {(r.spacecraft, r.antenna_id): r.signal_strength for r in records}
+        previous, self._previous = self._previous, current
+
+        if previous is None:
+            self.interval, self.mode = self.base_interval, "steady"
+        elif current.keys() != previous.keys() or self._largest_swing(previous, current) >= self.signal_change:
+            self.interval, self.mode = self.min_interval, "busy"
+        elif current == previous:
+            self.interval, self.mode = min(self.max_interval, self.interval * self.growth), "static"
+        elif self.interval < self.base_interval:
+            self.interval, self.mode = min(self.base_interval, self.interval * self.growth), "steady"
+        else:
+            self.interval, self.mode = max(self.base_interval, self.interval / self.growth), "steady"
+        return self._jittered(self.interval)
+
+    def failure(self):
+        """Count a failed scrape and return the backoff delay before retrying."""
+        self.failures += 1
+        self.mode = "backoff"
+        delay = min(self.max_backoff, self.min_interval * 2 ** (self.failures - 1))
+        # Equal jitter: never less than half the backoff, never in lockstep.
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _largest_swing(previous, current):
+        swings = [abs(current[key] - previous[key]) for key in current
+                  if current[key] is not None and previous.get(key) is not None]
+        return max(swings, default=0.0)
@@ -2,6 +2,17 @@ import sqlite3
 import yaml
 import os
 
+try:
+    from .history import open_history
+    from .passes import Sessionizer
+    from .rollups import RollupStore
+    from .storage import WRITER_PRAGMAS
+except ImportError:  # Running as a script from src/
+    from history import open_history
+    from passes import Sessionizer
+    from rollups import RollupStore
+    from storage import WRITER_PRAGMAS
+
 def load_config(config_path="config/settings.yaml"):
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
@@ -9,33 +20,40 @@ def load_config(config_path="config/settings.yaml"):
 def setup_database():
     config = load_config()
     db_file = config["database"]["file"]
+    table = config["database"]["table"]
 
     os.makedirs(os.path.dirname(db_file), exist_ok=True)
 
+    conn = None
     try:
         conn = sqlite3.connect(db_file)
         print(f"Connected to SQLite database at '{db_file}'.")
+        for pragma in WRITER_PRAGMAS:
+            conn.execute(pragma)
+
+        # Creates the indexed history schema and migrates any legacy
+        # ISO-timestamp table in place.
+        history = open_history(config["database"])
+        history.ensure_schema(conn)
+        print(f"Table '{table}' created or already exists.")
+
+        # Builds the rollup tables from existing history on first run.
+        rollups = RollupStore(db_file, table, prefix=config["database"].get("rollup_prefix", "rollup"),
+                              max_gap=config["database"].get("contact_max_gap", 900))
+        rollups.ensure_schema(conn)
+        print(f"Rollup tables '{rollups.prefix}_*' created or already exist.")
 
-        cursor = conn.cursor()
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS communication_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            spacecraft TEXT,
-            antenna_id TEXT,
-            signal_strength REAL,
-            communication_duration REAL
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        print("Table 'communication_logs' created or already exists.")
+        # Replays existing history into completed passes and labels its durations.
+        sessionizer = Sessionizer(history, table=config["database"].get("passes_table", "communication_passes"),
+                                  max_gap=config["database"].get("contact_max_gap", 900))
+        sessionizer.ensure_schema(conn)
+        print(f"Table '{sessionizer.table}' created or already exists.")
 
     except sqlite3.Error as e:
         print(f"Error setting up database: {e}")
     finally:
-        cursor.close()
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    setup_database()
@@ -0,0 +1,230 @@
+import queue
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not locked against each other
+    fcntl = None
+
+try:
+    from .metrics import DB_ERRORS, ROWS_WRITTEN, STAGE_SECONDS
+except ImportError:  # Running as a script from src/
+    from metrics import DB_ERRORS, ROWS_WRITTEN, STAGE_SECONDS
+
+# Applied to every connection the writer opens. WAL lets dashboard and
+# training readers run alongside the writer without "database is locked".
+WRITER_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
+
+_STOP = object()
+_FLUSH = object()
+
+
+def connect_reader(db_file, timeout=5.0):
+    """Open a read-only connection that can run alongside the writer."""
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, timeout=timeout,
+                           check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+class SQLiteWriter:
+    """
+    Single long-lived writer that batches queued rows into SQLite.
+
+    Each sink owns its schema: it must provide ensure_schema(conn), called
+    once when the writer starts, and write(conn, rows), called per batch.
+    A sink that keeps state in memory may provide rollback(conn), called
+    after a failed batch is rolled back, to reload it from its tables.
+    Sinks run in order inside one transaction the writer commits, so
+    derived tables never disagree with the rows they were built from.
+
+    A batch that fails is rolled back and logged; the writer carries on
+    with the next one. If schema setup fails, start() raises the error.
+    If the writer thread dies, put() and flush() raise instead of
+    blocking on a queue nobody drains.
+
+    Sinks keep in-memory state (open runs and passes) that only matches
+    the database while they are its sole writer, so from start() until
+    stop() the writer holds an exclusive lock on {db_file}.lock, and a
+    second writer's start() raises RuntimeError.
+    """
+
+    def __init__(self, db_file, sinks, batch_size=500, flush_interval=1.0, max_queue=10000):
+        self.db_file = db_file
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None  # Why the writer thread is not running, if it failed
+        self._lock_file = None
+        self.rows_written = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file)
+        for pragma in WRITER_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def start(self):
+        """Start the writer thread, or restart one that died; schema setup happens here and its errors are raised."""
+        if self._thread is not None:
+            if self._thread.is_alive() and self._error is None:
+                return
+            # A failed thread may still be closing its connection.
+            self._thread.join()
+        self._lock()
+        self._error = None
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            # Leave the writer stopped so a later start() retries the setup.
+            self._thread.join()
+            self._thread = None
+            self._unlock()
+            raise self._error
+
+    def _lock(self):
+        if fcntl is None or self._lock_file is not None:
+            return
+        lock_file = open(f"{self.db_file}.lock", "a")
+        try:
+            # Released by the OS if this process dies, so it never goes stale.
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Another writer is active on {self.db_file}") from None
+        self._lock_file = lock_file
+
+    def _unlock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _check_running(self):
+        if self._error is not None:
+            raise RuntimeError(f"SQLite writer stopped: {self._error}") from self._error
+
+    def put(self, rows):
+        """Queue rows for writing. Blocks when the queue is full."""
+        self._check_running()
+        for row in rows:
+            self._queue.put(row)
+
+    def flush(self):
+        """Commit queued rows now, without waiting for the batch deadline, and block until done."""
+        self._check_running()
+        if self._thread is not None:
+            self._queue.put(_FLUSH)
+        self._queue.join()
+        self._check_running()
+
+    def stop(self):
+        """Flush outstanding rows, close the connection and release the database lock."""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._unlock()
+
+    def _write_batch(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            for sink in self.sinks:
+                sink.write(conn, batch)
+            conn.commit()
+            self.rows_written += len(batch)
+            ROWS_WRITTEN.inc(len(batch))
+        except sqlite3.Error as e:
+            DB_ERRORS.inc()
+            print(f"Database error: {e}")
+            self._rollback(conn)
+        except Exception as e:
+            # A failing sink must not take the writer thread down with it.
+            DB_ERRORS.inc()
+            print(f"Writer sink failed: {e!r}")
+            self._rollback(conn)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="store")
+
+    def _rollback(self, conn):
+        conn.rollback()
+        for sink in self.sinks:
+            # Sinks that keep state across batches reload it from the tables.
+            if hasattr(sink, "rollback"):
+                sink.rollback(conn)
+
+    def _run(self):
+        conn = None
+        try:
+            conn = self._connect()
+            for sink in self.sinks:
+                sink.ensure_schema(conn)
+        except Exception as e:
+            self._error = e
+            if conn is not None:
+                conn.close()
+            return
+        finally:
+            self._ready.set()
+
+        batch = []
+        deadline = None
+        stopping = False
+        try:
+            while not stopping:
+                forced = False
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                elif item is _FLUSH:
+                    forced = True
+                    self._queue.task_done()
+                elif item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                due = deadline is not None and time.monotonic() >= deadline
+                if batch and (stopping or forced or due or len(batch) >= self.batch_size):
+                    self._write_batch(conn, batch)
+                    for _ in batch:
+                        self._queue.task_done()
+                    batch = []
+                    deadline = None
+        except Exception as e:
+            self._error = e
+            print(f"SQLite writer stopped: {e!r}")
+            # Release anyone blocked in flush(); the unwritten rows are dropped.
+            for _ in batch:
+                self._queue.task_done()
+            self._drain()
+        finally:
+            conn.close()
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._queue.task_done()
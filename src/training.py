@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .features import TIME_FEATURES, FeatureEncoder
+    from .passes import oldest_open_contact
+    from .predict import model_configs
+    from .registry import ModelRegistry
+    from .storage import connect_reader
+except ImportError:  # Running as a script from src/
+    from features import TIME_FEATURES, FeatureEncoder
+    from passes import oldest_open_contact
+    from predict import model_configs
+    from registry import ModelRegistry
+    from storage import connect_reader
+
+
+def load_rows_since(db_file, table, columns, since_ts, until_ts):
+    """Read only history rows with since_ts < ts <= until_ts, oldest first."""
+    import pandas as pd
+
+    select = ", ".join("ts AS timestamp" if c == "timestamp" else c for c in columns)
+    conn = connect_reader(db_file)
+    try:
+        return pd.read_sql_query(
+            f"SELECT {select} FROM {table} WHERE ts > ? AND ts <= ? ORDER BY ts",
+            conn,
+            params=(since_ts, until_ts),
+        )
+    finally:
+        conn.close()
+
+
+def train_increment(options):
+    """
+    One incremental training round; runs in a worker process.
+
+    Grows trees_per_round new trees (warm start) on the rows added since
+    the checkpoint stored in the artifact, dropping the oldest trees past
+    max_trees so the forest size and each round's cost stay bounded.
+    """
+    # Imported here so the scraper process that owns TrainingEngine never loads them.
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    features = options["features"]
+    target = options["target"]
+    registry = ModelRegistry(options["model_path"], keep=options["keep_versions"], compress=options["compress"])
+    _, artifact = registry.load()
+    checkpoint = artifact.get("checkpoint", 0) if artifact else 0
+
+    # Leave rows from the last few seconds alone; the writer may still be
+    # committing the rest of that scrape. Rows of passes that are still
+    # open have no measured duration yet, so stop short of those too.
+    until_ts = int(time.time()) - options["settle_seconds"]
+    open_since = oldest_open_contact(options["db_file"], options["passes_table"])
+    if open_since is not None:
+        until_ts = min(until_ts, open_since - 1)
+    columns = list(dict.fromkeys(["timestamp"] + features + [target]))
+    try:
+        df = load_rows_since(options["db_file"], options["table"], columns, checkpoint, until_ts)
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        return {"status": "failed", "error": f"history unavailable: {e}"}
+    df = df.dropna(subset=[target])
+    if len(df) < options["min_rows"]:
+        return {"status": "skipped", "rows": len(df)}
+
+    if artifact:
+        model, encoder = artifact["model"], artifact["encoder"]
+    else:
+        model = RandomForestRegressor(n_estimators=0, warm_start=True, random_state=42)
+        encoder = FeatureEncoder(features, options["time_resolution"])
+    encoder.partial_fit(df)
+    X = encoder.transform(df)
+    y = df[target].to_numpy(dtype=np.float64)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model.set_params(warm_start=True, n_jobs=options["n_jobs"])
+    existing = len(getattr(model, "estimators_", []))
+    model.set_params(n_estimators=existing + options["trees_per_round"])
+    model.fit(X_train, y_train)
+    if len(model.estimators_) > options["max_trees"]:
+        model.estimators_ = model.estimators_[-options["max_trees"]:]
+        model.set_params(n_estimators=options["max_trees"])
+    score = model.score(X_test, y_test) if len(y_test) > 1 else float("nan")
+
+    new_checkpoint = int(df["timestamp"].max()) if "timestamp" in df else until_ts
+    version = registry.save({
+        "model": model,
+        "encoder": encoder,
+        "checkpoint": new_checkpoint,
+    })
+    return {"status": "trained", "rows": len(df), "trees": len(model.estimators_),
+            "score": score, "checkpoint": new_checkpoint, "version": version}
+
+
+def train_models(options_list):
+    """
+    One incremental round for each configured model, in turn; runs in a
+    worker process. The summary counts as trained if any model was.
+    """
+    results = [dict(train_increment(options), target=options["target"]) for options in options_list]
+    statuses = [result["status"] for result in results]
+    status = next((s for s in ("trained", "failed") if s in statuses), "skipped")
+    return {"status": status, "results": results}
+
+
+def training_options(ml_config, db_config):
+    """Picklable settings for train_increment, resolved from the config sections."""
+    features = [f if f not in TIME_FEATURES else "timestamp" for f in ml_config["features"]]
+    return {
+        "model_path": ml_config["model_path"],
+        "keep_versions": ml_config.get("keep_versions", 3),
+        "compress": ml_config.get("compress", 0),
+        "db_file": db_config["file"],
+        "table": db_config["table"],
+        "passes_table": db_config.get("passes_table", "communication_passes"),
+        "features": features,
+        "target": ml_config["target"],
+        "time_resolution": ml_config.get("time_resolution", 3600),
+        "trees_per_round": ml_config.get("trees_per_round", 10),
+        "max_trees": ml_config.get("max_trees", 100),
+        "min_rows": ml_config.get("min_training_rows", 50),
+        "n_jobs": ml_config.get("n_jobs", -1),
+        "settle_seconds": ml_config.get("settle_seconds", 30),
+    }
+
+
+def report(result):
+    """Print a one-line summary of a training round's result, one per model for train_models()."""
+    for model_result in result.get("results", [result]):
+        prefix = f"{model_result['target']}: " if "target" in model_result else ""
+        if model_result["status"] == "trained":
+            print(f"{prefix}Model version {model_result['version']} trained on {model_result['rows']} new rows "
+                  f"({model_result['trees']} trees, R^2 {model_result['score']:.2f}).")
+        elif model_result["status"] == "skipped":
+            print(f"{prefix}Retrain skipped: only {model_result['rows']} new rows.")
+        else:
+            print(f"{prefix}Training failed: {model_result['error']}")
+
+
+class TrainingEngine:
+    """
+    Runs incremental training rounds in a separate process.
+
+    submit() returns immediately; the scraper never waits on a fit. When a
+    round finishes, on_complete is called (in a helper thread) with the
+    round's result so the predictor can pick up the new artifact.
+    """
+
+    def __init__(self, ml_config, db_config, on_complete=None):
+        self.options = [training_options(config, db_config) for config in model_configs(ml_config).values()]
+        self.on_complete = on_complete
+        # spawn, not fork: the parent has writer and fetch threads running.
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self._future = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._future is not None and not self._future.done()
+
+    def submit(self):
+        """Start a training round unless one is already running. Returns True if started."""
+        with self._lock:
+            if self.is_running():
+                return False
+            self._future = self._executor.submit(train_models, self.options)
+            self._future.add_done_callback(self._finished)
+            return True
+
+    def _finished(self, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        report(result)
+        if self.on_complete is not None:
+            self.on_complete(result)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,50 @@
+import threading
+
+
+class UpdateStream:
+    """
+    Versioned dashboard state for the websocket update protocol.
+
+    Items are keyed by spacecraft, antenna and the signal's position among
+    that pair's signals. Every apply() bumps the sequence number and
+    returns a delta containing only the items that changed. Clients
+    apply a delta when its base matches the last sequence they saw and
+    request a full snapshot otherwise.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self._items = {}
+        self._meta = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keyed(data):
+        items = {}
+        counts = {}
+        for d in data:
+            pair = (d["spacecraft"], d["antenna_id"])
+            n = counts.get(pair, 0)
+            counts[pair] = n + 1
+            # The snapshot timestamp travels once in the envelope, so a
+            # refreshed but otherwise unchanged row is not a change.
+            item = {k: v for k, v in d.items() if k != "timestamp"}
+            items[f"{pair[0]}|{pair[1]}|{n}"] = item
+        return items
+
+    def apply(self, data, **meta):
+        """Replace the state with data and return the delta from the previous version."""
+        items = self._keyed(data)
+        with self._lock:
+            upserts = {key: item for key, item in items.items() if self._items.get(key) != item}
+            removes = [key for key in self._items if key not in items]
+            base = self.seq
+            self.seq += 1
+            self._items = items
+            self._meta = meta
+            return {"seq": self.seq, "base": base, "upserts": upserts, "removes": removes, **meta}
+
+    def snapshot(self):
+        """Full state for a newly connected or resyncing client."""
+        with self._lock:
+            return {"seq": self.seq, "items": dict(self._items), **self._meta}
@@ -1,21 +1,54 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from flask_socketio import SocketIO
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
-import base64
+from concurrent.futures import TimeoutError as FutureTimeout
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
 import re
 import logging
+import time
 
-def create_app(web_config, monitor, predictor):
+try:
+    from .forecast import COMPLEXES
+    from .lookup import SnapshotIndex
+    from . import metrics
+    from .passes import passes_closed_after
+    from .plotting import PlotRenderer
+    from .updates import UpdateStream
+except ImportError:  # Running as a script from src/
+    from forecast import COMPLEXES
+    from lookup import SnapshotIndex
+    import metrics
+    from passes import passes_closed_after
+    from plotting import PlotRenderer
+    from updates import UpdateStream
+
+logger = logging.getLogger(__name__)
+
+def create_app(web_config, monitor, inference, forecaster=None):
     app = Flask(__name__)
     socketio = SocketIO(app, cors_allowed_origins="*")
-    
-    logging.basicConfig(level=logging.DEBUG)
-    logger = logging.getLogger(__name__)
+    renderer = PlotRenderer(
+        max_workers=web_config.get("plot_workers", 2),
+        cache_size=web_config.get("plot_cache_size", 32),
+    )
+    stream = UpdateStream()
+    # Query endpoints answer from memory; seed it with the stored recent past.
+    snapshot_index = SnapshotIndex(window=web_config.get("index_window", 21600))
+    since = time.time() - snapshot_index.window
+    snapshot_index.seed(monitor.history.records_between(since, since + snapshot_index.window + 1), since)
+    last_pass_id = 0
+
+    def label_closed_passes(min_end_ts=0):
+        """Copy durations of passes the Sessionizer closed since the last call into the index."""
+        nonlocal last_pass_id
+        for pass_id, spacecraft, antenna_id, start_ts, end_ts, duration in passes_closed_after(
+                monitor.db_file, monitor.sessionizer.table, last_pass_id, min_end_ts):
+            snapshot_index.label(spacecraft, antenna_id, start_ts, end_ts, duration)
+            last_pass_id = pass_id
+
+    # Passes closing while the index was seeded; earlier ones are already in the stored rows.
+    label_closed_passes(since)
 
     @app.template_filter('strftime')
     def _jinja2_filter_datetime(date, fmt=None):
@@ -29,67 +62,114 @@ def create_app(web_config, monitor, predictor):
         return date.strftime(fmt)
 
     def generate_plot(data):
-        timestamps = [d["timestamp"] for d in data]
-        strengths = [d["signal_strength"] for d in data]
-        plt.figure(figsize=(10, 5))
-        plt.plot(timestamps, strengths, marker="o")
-        plt.title("DSN Signal Strength Over Time")
-        plt.xlabel("Timestamp")
-        plt.ylabel("Signal Strength")
-        plt.xticks(rotation=45)
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        plot_url = base64.b64encode(buf.getvalue()).decode("utf8")
-        plt.close()
-        return plot_url
+        """Queue a render and return the URL the PNG will be served from."""
+        # A plain path: emit_update runs outside any request context.
+        return f"/plot/{renderer.submit(data)}.png"
 
-    @app.route("/")
-    def index():
-        data = monitor.fetch_dsn_data()
+    @app.route("/plot/<key>.png")
+    def plot_image(key):
+        # Keys are content hashes, so a matching ETag never needs a re-send.
+        if key in request.if_none_match:
+            return Response(status=304, headers={"ETag": f'"{key}"'})
+        try:
+            png = renderer.get(key, timeout=web_config.get("plot_timeout", 10))
+        except FutureTimeout:
+            # Still rendering; the browser retries instead of seeing a 500.
+            return Response(status=503, headers={"Retry-After": "1", "Cache-Control": "no-store"})
+        if png is None:
+            return jsonify({"error": "Unknown plot"}), 404
+        response = Response(png, mimetype="image/png")
+        response.set_etag(key)
+        response.headers["Cache-Control"] = "public, max-age=86400, immutable"
+        return response
+
+    def snapshot_rows(records):
+        """Display dicts for one scrape's records, with every model's predictions filled in."""
+        data = [record.to_dict() for record in records]
         if data:
-            predictions = predictor.predict([d for d in data])
-            if predictions is not None:
+            # Every caller for the same snapshot shares one batch.
+            predictions = inference.predict(records)
+            for field in inference.fields:
+                values = predictions.get(field)
                 for i, d in enumerate(data):
-                    d["communication_duration"] = float(predictions[i])
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
-            else:
-                for d in data:
-                    d["communication_duration"] = 0.0
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
+                    d[field] = float(values[i]) if values is not None else 0.0
+            for d in data:
+                d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
+        return data
+
+    @app.route("/")
+    def index():
+        records = monitor.get_snapshot()
+        data = snapshot_rows(records)
         plot_url = generate_plot(data) if data else None
-        return render_template("index.html", data=data, plot_url=plot_url, title=web_config["title"])
+        return render_template("index.html", data=data, plot_url=plot_url, title=web_config["title"],
+                               stale=monitor.is_snapshot_stale(), ts=records[0].ts if records else None)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus text exposition of this process's pipeline metrics."""
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
     @socketio.on('connect')
     def handle_connect():
-        print('Client connected')
-        data = monitor.fetch_dsn_data()
-        if data:
-            predictions = predictor.predict([d for d in data])
-            if predictions is not None:
-                for i, d in enumerate(data):
-                    d["communication_duration"] = float(predictions[i])
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
-            else:
-                for d in data:
-                    d["communication_duration"] = 0.0
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
-        plot_url = generate_plot(data) if data else None
-        socketio.emit('update_data', {'data': data, 'plot_url': plot_url})
+        metrics.SOCKET_CLIENTS.inc()
+        if stream.seq == 0:
+            records = monitor.get_snapshot()
+            if records:
+                # Nothing published since startup; seed the stream without broadcasting.
+                publish(records)
+        socketio.emit('snapshot', stream.snapshot(), to=request.sid)
 
-    def emit_update(data):
-        if data:
-            predictions = predictor.predict([d for d in data])
-            if predictions is not None:
-                for i, d in enumerate(data):
-                    d["communication_duration"] = float(predictions[i])
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
-            else:
-                for d in data:
-                    d["communication_duration"] = 0.0
-                    d["timestamp"] = _jinja2_filter_datetime(d["timestamp"])
+    @socketio.on('disconnect')
+    def handle_disconnect(*_):
+        metrics.SOCKET_CLIENTS.dec()
+
+    @socketio.on('resync')
+    def handle_resync():
+        # Client saw a sequence gap; send it the full state again.
+        socketio.emit('snapshot', stream.snapshot(), to=request.sid)
+
+    def publish(records):
+        snapshot_index.add(records)
+        # Same labels as SQLite, so index and store answers agree.
+        label_closed_passes()
+        data = snapshot_rows(records)
         plot_url = generate_plot(data) if data else None
-        socketio.emit('update_data', {'data': data, 'plot_url': plot_url})
+        return stream.apply(
+            data,
+            timestamp=data[0]["timestamp"] if data else None,
+            # Display timestamps carry no year; clients query history by ts.
+            ts=records[0].ts if records else None,
+            plot_url=plot_url,
+            stale=monitor.is_snapshot_stale(),
+        )
+
+    def emit_update(records):
+        delta = publish(records)
+        with metrics.STAGE_SECONDS.time(stage="emit"):
+            socketio.emit('delta', delta)
+
+    def pair_history(spacecraft, antenna_id, start_ts, end_ts):
+        """A pair's records in [start_ts, end_ts]: from the index, or SQLite if older."""
+        if snapshot_index.covers(start_ts):
+            return snapshot_index.history(spacecraft, antenna_id, start_ts, end_ts)
+        return monitor.history.query(spacecraft, antenna_id, start_ts, end_ts)
+
+    def cached_json(version, build):
+        """
+        JSON response with an ETag derived from the request and version;
+        build() only runs when the client's copy is out of date.
+        """
+        etag = hashlib.sha1(f"{request.full_path}|{version}".encode()).hexdigest()[:20]
+        if etag in request.if_none_match:
+            return Response(status=304, headers={"ETag": f'"{etag}"'})
+        response = jsonify(build())
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def record_json(record):
+        return {**record.to_dict(), "ts": record.ts}
 
     @app.route("/spacecraft_details")
     def spacecraft_details():
@@ -98,10 +178,7 @@ def create_app(web_config, monitor, predictor):
             antenna = request.args.get("antenna")
             start_time = request.args.get("start")
             end_time = request.args.get("end")
-            
-            logger.debug(f"Received request with parameters: spacecraft_name={spacecraft_name}, antenna={antenna}")
-            logger.debug(f"start_time={start_time}, end_time={end_time}")
-            
+
             if not all([spacecraft_name, antenna, start_time, end_time]):
                 return jsonify({"error": "Missing required parameters"}), 400
             
@@ -109,43 +186,33 @@ def create_app(web_config, monitor, predictor):
             try:
                 start_timestamp = datetime.strptime(start_time, "%a, %d %b %Y %H:%M:%S GMT")
                 end_timestamp = datetime.strptime(end_time, "%a, %d %b %Y %H:%M:%S GMT")
-                logger.debug(f"Parsed start_timestamp: {start_timestamp}, end_timestamp: {end_timestamp}")
             except ValueError as e:
-                logger.error(f"Error parsing timestamp: {e}")
                 return jsonify({"error": f"Invalid timestamp format: {str(e)}"}), 400
             
-            data = monitor.fetch_dsn_data()
-            if not data:
-                logger.warning("No data available from monitor")
-                return jsonify({"error": "No data available"}), 404
-            
-            logger.debug(f"Fetched {len(data)} records from monitor")
-            
-            if data:
-                logger.debug(f"Sample monitor timestamp: {data[0].get('timestamp')}")
-            
-            filtered_data = [d for d in data if 
-                           d.get("spacecraft") == spacecraft_name and 
-                           d.get("antenna_id") == antenna]
-            
-            logger.debug(f"Filtered to {len(filtered_data)} matching records (before timestamp filter)")
-            
-            if not filtered_data:
-                logger.warning(f"No matching data found for spacecraft={spacecraft_name}, antenna={antenna}")
+            # Request times are GMT; history stores epoch seconds.
+            start_ts = int(start_timestamp.replace(tzinfo=timezone.utc).timestamp())
+            end_ts = int(end_timestamp.replace(tzinfo=timezone.utc).timestamp())
+            history = pair_history(spacecraft_name, antenna, start_ts, end_ts)
+
+            if not history:
+                # The live record may not be stored yet; it still answers a window it falls in.
+                history = [record for record in monitor.get_snapshot()
+                           if record.spacecraft == spacecraft_name and record.antenna_id == antenna
+                           and start_ts <= record.ts <= end_ts]
+            if not history:
                 return jsonify({"error": "No data found for specified parameters"}), 404
             
-            spacecraft_data = filtered_data[0]
-            logger.debug(f"Selected spacecraft data: {spacecraft_data}")
-            
+            spacecraft_data = history[-1].to_dict()
+
             try:
                 response = {
                     "spacecraft": spacecraft_data.get("spacecraft", "N/A"),
                     "data_rate": f"{spacecraft_data.get('data_rate', 'N/A')} bps",
                     "power": f"{float(spacecraft_data.get('signal_strength', 0)):.1f} dBm",
                     "frequency": f"{float(spacecraft_data.get('frequency', 0))/1e9:.2f} GHz",
-                    "range": f"{spacecraft_data.get('spacecraft_range', 'N/A')} km"
+                    "range": f"{spacecraft_data.get('spacecraft_range', 'N/A')} km",
+                    "samples": len(history)
                 }
-                logger.debug(f"Formatted response: {response}")
                 return jsonify(response)
             except (ValueError, TypeError) as e:
                 logger.error(f"Error formatting response: {e}")
@@ -155,4 +222,121 @@ def create_app(web_config, monitor, predictor):
             logger.error(f"Unexpected error in spacecraft_details: {str(e)}", exc_info=True)
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+    def _parse_time(value, default):
+        """Accept epoch seconds or an ISO 8601 time (UTC if no offset is given)."""
+        if not value:
+            return default
+        if value.isdigit():
+            return int(value)
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+    @app.route("/api/rollups")
+    def rollups():
+        """Aggregated signal, data rate and contact series for charts."""
+        try:
+            end_ts = _parse_time(request.args.get("end"), int(datetime.now(timezone.utc).timestamp()))
+            start_ts = _parse_time(request.args.get("start"), end_ts - 86400)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid timestamp format: {str(e)}"}), 400
+        if start_ts > end_ts:
+            return jsonify({"error": "start must not be after end"}), 400
+
+        try:
+            resolution, points = monitor.rollups.series(
+                start_ts,
+                end_ts,
+                spacecraft=request.args.get("spacecraft"),
+                antenna_id=request.args.get("antenna"),
+                resolution=request.args.get("resolution"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"resolution": resolution, "start": start_ts, "end": end_ts, "points": points})
+
+    def _complex_arg():
+        site = request.args.get("complex")
+        if site and site not in COMPLEXES:
+            raise ValueError(f"Unknown complex: {site}")
+        return site
+
+    @app.route("/api/spacecraft")
+    def active_spacecraft():
+        """Spacecraft in the current snapshot and the antennas tracking each."""
+        try:
+            site = _complex_arg()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        ts = snapshot_index.ts
+        return cached_json(ts, lambda: {"ts": ts, "spacecraft": snapshot_index.active_spacecraft(site)})
+
+    @app.route("/api/spacecraft/<name>/antennas")
+    def antennas_tracking(name):
+        """Current downlinks of every antenna tracking one spacecraft."""
+        records = snapshot_index.tracking(name)
+        if not records:
+            return jsonify({"error": f"{name} is not being tracked"}), 404
+        ts = records[0].ts
+        return cached_json(ts, lambda: {"ts": ts, "spacecraft": name, "antennas": [record_json(r) for r in records]})
+
+    @app.route("/api/antennas")
+    def antennas():
+        """Antennas in the current snapshot and the spacecraft each is tracking."""
+        try:
+            site = _complex_arg()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        ts = snapshot_index.ts
+        return cached_json(ts, lambda: {"ts": ts, "antennas": snapshot_index.antennas(site)})
+
+    @app.route("/api/history")
+    def pair_history_api():
+        """Raw samples of one spacecraft/antenna pair; the last hour by default."""
+        spacecraft, antenna = request.args.get("spacecraft"), request.args.get("antenna")
+        if not spacecraft or not antenna:
+            return jsonify({"error": "spacecraft and antenna are required"}), 400
+        try:
+            end_ts = _parse_time(request.args.get("end"), int(time.time()))
+            start_ts = _parse_time(request.args.get("start"), end_ts - 3600)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid timestamp format: {str(e)}"}), 400
+        if start_ts > end_ts:
+            return jsonify({"error": "start must not be after end"}), 400
+
+        records = pair_history(spacecraft, antenna, start_ts, end_ts)
+        # Samples are only appended, and later labelled with their pass duration.
+        version = (len(records), records[-1].ts if records else None,
+                   sum(r.communication_duration is not None for r in records))
+        return cached_json(version, lambda: {"spacecraft": spacecraft, "antenna": antenna, "start": start_ts,
+                                             "end": end_ts, "samples": [record_json(r) for r in records]})
+
+    @app.route("/api/forecast")
+    def forecast():
+        """Upcoming view windows per spacecraft and DSN complex."""
+        if forecaster is None:
+            return jsonify({"error": "Forecasting is not configured"}), 503
+        try:
+            hours = float(request.args.get("hours", forecaster.horizon_hours))
+        except ValueError:
+            return jsonify({"error": "hours must be a number"}), 400
+        if not 0 < hours <= forecaster.max_hours:
+            return jsonify({"error": f"hours must be in (0, {forecaster.max_hours}]"}), 400
+        site = request.args.get("complex")
+        if site and site not in COMPLEXES:
+            return jsonify({"error": f"Unknown complex: {site}"}), 400
+
+        snapshot = monitor.get_snapshot()
+        results = forecaster.cached(snapshot, monitor.history, hours=hours)
+        spacecraft = request.args.get("spacecraft")
+        results = [r for r in results
+                   if (not spacecraft or r["spacecraft"] == spacecraft) and (not site or r["complex"] == site)]
+        return jsonify({
+            "generated_at": snapshot[0].ts if snapshot else None,
+            "hours": hours,
+            "min_elevation": forecaster.min_elevation,
+            "forecasts": results,
+        })
+
     return app, socketio, emit_update
\ No newline at end of file
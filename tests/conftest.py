@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+# Modules import each other as scripts run from src/ do.
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from inference import InferenceService  # noqa: E402
+from monitor import DSNMonitor  # noqa: E402
+from webapp import create_app  # noqa: E402
+
+
+@pytest.fixture
+def dashboard(tmp_path):
+    """(app, socketio, emit_update, monitor) over a temporary database and untrained models."""
+    with open(os.path.join(ROOT, "config", "settings.yaml")) as f:
+        config = yaml.safe_load(f)
+    config["database"]["file"] = str(tmp_path / "dsn.db")
+    for model in [config["ml"]] + config["ml"].get("models", []):
+        model["model_path"] = str(tmp_path / os.path.basename(model["model_path"]))
+    config["webapp"]["plot_timeout"] = 0.1
+    monitor = DSNMonitor(config["data"], config["database"])
+    inference = InferenceService.from_config(config["ml"])
+    app, socketio, emit_update = create_app(config["webapp"], monitor, inference)
+    yield app, socketio, emit_update, monitor
+    inference.close()
+    monitor.close()
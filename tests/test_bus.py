@@ -0,0 +1,61 @@
+import multiprocessing
+import time
+
+from bus import ProcessBus
+from deploy import follow_bus
+from records import DSNRecord
+
+
+def _collect(subscription, results):
+    """A stand-in web worker: hand back every message up to and including stop."""
+    while True:
+        message = subscription.get()
+        results.put(message)
+        if message["type"] == "stop":
+            return
+
+
+def test_every_worker_process_gets_every_message_in_order():
+    context = multiprocessing.get_context("spawn")
+    bus = ProcessBus(context)
+    results = [context.Queue() for _ in range(2)]
+    workers = [context.Process(target=_collect, args=(bus.subscribe(), result)) for result in results]
+    for worker in workers:
+        worker.start()
+
+    messages = [{"type": "snapshot", "ts": 100}, {"type": "model"}, {"type": "snapshot", "ts": 160},
+                {"type": "stop"}]
+    for message in messages:
+        bus.publish(message)
+    for worker, result in zip(workers, results):
+        assert [result.get(timeout=30) for _ in messages] == messages
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+
+
+def test_announced_snapshots_reach_websocket_clients_as_deltas(dashboard):
+    app, socketio, emit_update, monitor = dashboard
+    start = int(time.time())
+    scrapes = [[DSNRecord(start, "VGR1", "DSS43", -150.0), DSNRecord(start, "MRO", "DSS14", -140.0)],
+               [DSNRecord(start + 60, "MRO", "DSS14", -141.0)]]
+    for records in scrapes:
+        monitor.store_data(records)
+    monitor.writer.flush()  # The scraper commits before it announces
+    client = socketio.test_client(app)
+    assert [event["name"] for event in client.get_received()] == ["snapshot"]
+
+    bus = ProcessBus(multiprocessing.get_context("spawn"))
+    subscription = bus.subscribe()
+    for records in scrapes:
+        bus.publish({"type": "snapshot", "ts": records[0].ts})
+    bus.publish({"type": "snapshot", "ts": start - 60})  # Nothing stored: skipped
+    bus.publish({"type": "stop"})
+    follow_bus(subscription, monitor, None, emit_update)
+
+    first, second = [event["args"][0] for event in client.get_received()]
+    assert (first["base"], first["seq"], first["ts"]) == (0, 1, start)
+    assert sorted(first["upserts"]) == ["MRO|DSS14|0", "VGR1|DSS43|0"]
+    assert (second["base"], second["seq"], second["ts"]) == (1, 2, start + 60)
+    assert list(second["upserts"]) == ["MRO|DSS14|0"] and second["removes"] == ["VGR1|DSS43|0"]
+    assert [r.ts for r in monitor.get_snapshot()] == [start + 60]
+    client.disconnect()
@@ -0,0 +1,67 @@
+import sqlite3
+
+from compact import VALUE_COLUMNS, CompactHistoryStore
+from history import HISTORY_COLUMNS, HistoryStore
+
+TABLE = "communication_logs"
+START = 1718841600
+
+
+def _rows():
+    """Two pairs over ten scrapes: a steady track and one whose signal keeps changing."""
+    rows = []
+    for i in range(10):
+        ts = START + 60 * i
+        rows.append((ts, "VGR1", "DSS43", -150.0, None, 160.0, 8.4e9 + 10 * i, 120.0 + 0.25 * i, 30.0, 2.4e13))
+        rows.append((ts, "MRO", "DSS14", -140.0 - i % 3, 600.0, 2.0e6, 8.43e9, 200.0, 45.0 - i, 3.0e11))
+    return rows
+
+
+def _close(got, want):
+    if got == want:
+        return True
+    return isinstance(got, float) and isinstance(want, float) and abs(got - want) <= 1e-9 * abs(want)
+
+
+def _view(conn):
+    columns = ", ".join(HISTORY_COLUMNS)
+    return conn.execute(f"SELECT {columns} FROM {TABLE} ORDER BY ts, spacecraft").fetchall()
+
+
+def test_row_layout_migrates_to_the_same_rows_in_the_compact_view(tmp_path):
+    db = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute(f"CREATE TABLE {TABLE}_legacy (id INTEGER PRIMARY KEY, timestamp TEXT, spacecraft TEXT, "
+                 f"antenna_id TEXT, signal_strength REAL)")
+    conn.commit()
+    rows_store = HistoryStore(db, TABLE)
+    rows_store.ensure_schema(conn)  # Leaves a migrated row table, as an upgraded install has
+    rows_store.write(conn, _rows())
+    conn.commit()
+    expected = _view(conn)
+
+    CompactHistoryStore(db, TABLE, tolerances=dict.fromkeys(VALUE_COLUMNS, 0.0)).ensure_schema(conn)
+    assert conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (TABLE,)).fetchone() == ("view",)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE ?", (f"{TABLE}_legacy%",)).fetchone() == (0,)
+    actual = _view(conn)
+    assert len(actual) == len(expected) == 20
+    # Linear columns are rebuilt as start + rate * elapsed, exact up to float rounding.
+    assert all(_close(got, want) for got_row, want_row in zip(actual, expected)
+               for got, want in zip(got_row, want_row))
+    conn.close()
+
+
+def test_leftover_legacy_table_is_folded_into_runs(tmp_path):
+    db = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db)
+    rows_store = HistoryStore(db, f"{TABLE}_legacy")
+    rows_store.ensure_schema(conn)
+    rows_store.write(conn, _rows())
+    conn.commit()
+
+    store = CompactHistoryStore(db, TABLE, tolerances=dict.fromkeys(VALUE_COLUMNS, 0.0))
+    store.ensure_schema(conn)
+    assert len(_view(conn)) == 20
+    store.ensure_schema(conn)  # Nothing left to migrate on the next start
+    assert len(_view(conn)) == 20
+    conn.close()
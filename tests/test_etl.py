@@ -0,0 +1,98 @@
+import csv
+import sqlite3
+
+import pytest
+
+from etl import import_archive
+from history import HISTORY_COLUMNS
+from monitor import DSNMonitor
+from records import DSNRecord
+
+START = 1718841600  # 2024-06-20 00:00 UTC
+
+
+def _archive(path, scrapes):
+    """A CSV archive of one row per (ts offset, spacecraft, antenna)."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_COLUMNS)
+        for offset, spacecraft, antenna_id in scrapes:
+            writer.writerow([START + offset, spacecraft, antenna_id, -150.0] + [""] * (len(HISTORY_COLUMNS) - 4))
+    return str(path)
+
+
+def _db_config(tmp_path):
+    return {"file": str(tmp_path / "dsn.db"), "table": "dsn_data"}
+
+
+def _passes(db_config):
+    conn = sqlite3.connect(db_config["file"])
+    try:
+        return conn.execute("SELECT spacecraft, antenna_id, start_ts, end_ts FROM communication_passes "
+                            "ORDER BY start_ts").fetchall()
+    finally:
+        conn.close()
+
+
+def test_import_feeds_the_rollup_and_pass_sinks(tmp_path):
+    db_config = _db_config(tmp_path)
+    path = _archive(tmp_path / "a.csv", [(0, "VGR1", "DSS43"), (60, "VGR1", "DSS43"),
+                                         (120, "MRO", "DSS14"), (180, "MRO", "DSS14")])
+    assert import_archive(db_config, path) == (4, 0)
+
+    assert _passes(db_config) == [("VGR1", "DSS43", START, START + 60)]
+    conn = sqlite3.connect(db_config["file"])
+    durations = conn.execute("SELECT communication_duration FROM dsn_data WHERE spacecraft = 'VGR1'").fetchall()
+    samples = conn.execute("SELECT SUM(samples) FROM rollup_1m").fetchone()[0]
+    conn.close()
+    assert durations == [(60.0,), (60.0,)]
+    assert samples == 4
+
+
+def test_import_is_refused_while_a_scraper_writes_the_database(tmp_path):
+    db_config = _db_config(tmp_path)
+    data_config = {"dsnnow_url": "http://127.0.0.1:9/dsn.xml", "backup_source": "http://127.0.0.1:9/backup.html"}
+    monitor = DSNMonitor(data_config, db_config)
+    monitor.store_data([DSNRecord(START + 600, "VGR1", "DSS43", -150.0)])
+    try:
+        with pytest.raises(RuntimeError, match="Another writer"):
+            import_archive(db_config, _archive(tmp_path / "a.csv", [(0, "MRO", "DSS14")]))
+    finally:
+        monitor.close()
+
+    # Once the scraper stops, the same file imports.
+    assert import_archive(db_config, str(tmp_path / "a.csv")) == (1, 0)
+
+
+def test_rows_imported_behind_the_live_edge_are_sessionized_in_order(tmp_path):
+    db_config = _db_config(tmp_path)
+    import_archive(db_config, _archive(tmp_path / "live.csv", [(600, "VGR1", "DSS43"), (660, "VGR1", "DSS43"),
+                                                               (720, "MRO", "DSS14"), (780, "MRO", "DSS14")]))
+    import_archive(db_config, _archive(tmp_path / "old.csv", [(0, "JUNO", "DSS25"), (60, "JUNO", "DSS25"),
+                                                              (120, "MRO", "DSS14")]))
+
+    assert _passes(db_config) == [("JUNO", "DSS25", START, START + 60),
+                                  ("MRO", "DSS14", START + 120, START + 120),
+                                  ("VGR1", "DSS43", START + 600, START + 660)]
+
+
+def _rollups(db_config):
+    conn = sqlite3.connect(db_config["file"])
+    try:
+        return conn.execute("SELECT * FROM rollup_1m ORDER BY spacecraft, antenna_id, bucket").fetchall()
+    finally:
+        conn.close()
+
+
+def test_unsorted_archive_into_an_empty_database_matches_a_sorted_one(tmp_path):
+    scrapes = [(offset, "VGR1", "DSS43") for offset in range(0, 600, 60)]
+    scrapes += [(offset, "MRO", "DSS14") for offset in range(300, 900, 60)]
+    shuffled = scrapes[7:] + scrapes[3:7] + scrapes[:3]
+    in_order = {"file": str(tmp_path / "sorted.db"), "table": "dsn_data"}
+    out_of_order = {"file": str(tmp_path / "unsorted.db"), "table": "dsn_data"}
+    import_archive(in_order, _archive(tmp_path / "sorted.csv", sorted(scrapes)), chunk_rows=4)
+    # Small chunks, so later chunks go back behind rows an earlier one stored.
+    import_archive(out_of_order, _archive(tmp_path / "unsorted.csv", shuffled), chunk_rows=4)
+
+    assert _passes(out_of_order) == _passes(in_order) == [("VGR1", "DSS43", START, START + 540)]
+    assert _rollups(out_of_order) == _rollups(in_order)
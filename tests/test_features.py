@@ -0,0 +1,30 @@
+import math
+
+import numpy as np
+
+from features import FeatureEncoder, _to_epoch_seconds
+from records import DSNRecord
+
+TS = 1718899200  # 2024-06-20 16:00 UTC
+
+
+def test_iso_and_numeric_times_give_the_same_epoch_seconds():
+    assert _to_epoch_seconds([TS, TS + 90]).tolist() == [TS, TS + 90]
+    assert _to_epoch_seconds(["2024-06-20T16:00:00", "2024-06-20T16:01:30"]).tolist() == [TS, TS + 90]
+    assert _to_epoch_seconds(["2024-06-20T18:00:00+02:00"]).tolist() == [TS]
+
+
+def test_unparseable_times_are_nan():
+    seconds = _to_epoch_seconds(["2024-06-20T16:00:00", "garbage", None])
+    assert seconds[0] == TS and math.isnan(seconds[1]) and math.isnan(seconds[2])
+
+
+def test_training_on_iso_rows_encodes_like_inference_on_ts():
+    encoder = FeatureEncoder(["antenna_id", "timestamp"]).fit(
+        {"antenna_id": ["DSS43", "DSS14"], "timestamp": ["2024-06-20T16:00:00", "2024-06-21T04:00:00"]})
+    assert encoder.epoch == TS
+
+    trained = encoder.transform({"antenna_id": ["DSS14"], "timestamp": ["2024-06-21T04:00:00"]})
+    served = encoder.transform_records([DSNRecord(TS + 12 * 3600, "VGR1", "DSS14", -150.0)])
+    np.testing.assert_allclose(trained, served)
+    assert served[0, -1] == 0.5  # Days since the first training sample
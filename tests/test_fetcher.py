@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from fetcher import FeedFetcher
+from stub_server import StubFeedServer
+
+
+@pytest.fixture
+def serve():
+    """Start a stub feed server and a fetcher pointed at it; both are closed after the test."""
+    opened = []
+
+    def start(fetcher_options=None, **server_options):
+        server = StubFeedServer(**server_options).__enter__()
+        fetcher = FeedFetcher(server.primary_url, server.backup_url, timeout=5, **(fetcher_options or {}))
+        opened.append((server, fetcher))
+        return server, fetcher
+
+    yield start
+    for server, fetcher in opened:
+        fetcher.close()
+        server.__exit__(None, None, None)
+
+
+def _settle(fetcher):
+    """Let the hedge's losing request finish, so its response has been handled."""
+    fetcher._executor.shutdown(wait=True)
+    fetcher._executor = ThreadPoolExecutor(max_workers=4)
+
+
+def test_unchanged_feed_is_fetched_once_then_not_modified(serve):
+    server, fetcher = serve()
+    first = fetcher.fetch(params={"r": 1})
+    second = fetcher.fetch(params={"r": 2})
+
+    assert (first.source, first.not_modified) == ("primary", False)
+    assert first.body.startswith("<?xml")
+    assert (second.source, second.not_modified, second.body) == ("primary", True, None)
+    assert server.hits["not_modified"] == 1
+
+
+def test_forget_makes_the_next_request_unconditional(serve):
+    server, fetcher = serve()
+    fetcher.fetch()
+    fetcher.forget(server.primary_url)
+
+    assert fetcher.fetch().not_modified is False
+    assert server.hits["not_modified"] == 0
+
+
+def test_slow_primary_is_hedged_to_the_backup(serve):
+    server, fetcher = serve(dict(hedge_delay=0.1), primary_delay=1.0, conditional=False)
+    start = time.perf_counter()
+    result = fetcher.fetch()
+
+    assert result.source == "backup"
+    assert "<html" in result.body.lower()
+    assert time.perf_counter() - start < 1.0
+
+
+def test_failing_primary_falls_back_without_waiting_for_the_hedge(serve):
+    server, fetcher = serve(dict(hedge_delay=2.0), primary_status=503)
+    start = time.perf_counter()
+    result = fetcher.fetch()
+
+    assert result.source == "backup"
+    assert time.perf_counter() - start < 2.0
+
+
+def test_primary_that_lost_the_hedge_is_fetched_in_full_next_time(serve):
+    server, fetcher = serve(dict(hedge_delay=0.05), primary_delay=0.5)
+    assert fetcher.fetch().source == "backup"
+    _settle(fetcher)  # The primary's response arrives after the backup's won
+
+    server.primary_delay = 0.0
+    result = fetcher.fetch()
+    # A 304 here would make the monitor re-stamp records it parsed before the hedge.
+    assert (result.source, result.not_modified) == ("primary", False)
+    assert result.body is not None
+
+
+def test_backup_that_lost_the_hedge_is_fetched_in_full_next_time(serve):
+    server, fetcher = serve(dict(hedge_delay=0.05), primary_delay=0.2, backup_delay=0.6)
+    assert fetcher.fetch().source == "primary"
+    _settle(fetcher)
+
+    server.backup_delay = 0.0
+    result = fetcher.fetch_backup()
+    assert (result.source, result.not_modified) == ("backup", False)
@@ -0,0 +1,58 @@
+import os
+from dataclasses import replace
+
+import pytest
+
+from conftest import FIXTURES
+from bench_forecast import loop_forecast
+from bench_parse import FixedClockMonitor
+from forecast import COMPLEXES, PassForecaster, complex_for
+
+
+def _records(scale=1):
+    with open(os.path.join(FIXTURES, "dsn.xml"), "rb") as f:
+        records = FixedClockMonitor()._parse_xml_data(f.read())
+    # Extra spacecraft at shifted azimuths, as in bench_forecast.
+    return records + [
+        replace(r, spacecraft=f"{r.spacecraft}-{k}", azimuth=(r.azimuth + 7 * k) % 360)
+        for k in range(1, scale) for r in records if r.azimuth is not None
+    ]
+
+
+@pytest.mark.parametrize("scale, hours, step", [(1, 24, 60), (4, 72, 300)])
+def test_vectorized_forecast_matches_a_per_step_loop(scale, hours, step):
+    records = _records(scale)
+    now = records[0].ts
+    forecaster = PassForecaster(step_seconds=step, max_hours=72)
+    forecast = forecaster.forecast(records, now=now, hours=hours)
+    names, right_ascension, declination = forecaster.fit(records)
+    looped = loop_forecast(forecaster, names, right_ascension.tolist(), declination.tolist(), now, hours)
+
+    assert len(names) > scale
+    assert len(forecast) == len(names) * len(COMPLEXES)
+    assert sum(len(r["windows"]) for r in forecast) > 0
+    assert [(r["spacecraft"], r["complex"], [(w["rise"], w["set"], w["max_elevation"]) for w in r["windows"]])
+            for r in forecast] == looped
+    for result, (_, _, windows) in zip(forecast, looped):
+        # In view now exactly when the first window starts at now.
+        assert result["in_view"] == bool(windows and windows[0][0] == now)
+
+
+def test_forecast_is_cached_per_scrape_and_horizon():
+    class NoHistory:
+        def records_between(self, start_ts, end_ts):
+            return []
+
+    snapshot = _records()
+    forecaster = PassForecaster()
+    first = forecaster.cached(snapshot, NoHistory())
+    assert forecaster.cached(snapshot, NoHistory()) is first
+    assert forecaster.cached(snapshot, NoHistory(), hours=12) is not first
+    assert forecaster.cached([], NoHistory()) == []
+
+
+def test_antennas_map_to_their_complex():
+    assert [complex_for(a) for a in ("DSS14", "DSS26", "DSS43", "DSS36", "DSS63", "DSS55")] == \
+        ["gdscc", "gdscc", "cdscc", "cdscc", "mdscc", "mdscc"]
+    assert complex_for("Unknown") is None
+    assert complex_for(None) is None
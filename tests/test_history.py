@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+from history import HistoryStore
+
+TABLE = "communication_logs"
+# 2024-06-30 23:00, 2024-07-01 01:00 and 2024-07-01 02:00 UTC
+ROWS = [("2024-06-30T23:00:00+00:00", "VGR1", "DSS43", -150.0, None),
+        ("2024-07-01T01:00:00+00:00", "MRO", "DSS14", -140.0, 600.0),
+        ("2024-07-01T02:00:00+00:00", "JUNO", "DSS25", -145.0, None)]
+EPOCHS = [1719788400, 1719795600, 1719799200]
+
+
+def _legacy_db(path):
+    """A database as the original setup_db.py left it: ISO text timestamps."""
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, spacecraft TEXT, "
+                 f"antenna_id TEXT, signal_strength REAL, communication_duration REAL)")
+    conn.executemany(f"INSERT INTO {TABLE} (timestamp, spacecraft, antenna_id, signal_strength, "
+                     f"communication_duration) VALUES (?, ?, ?, ?, ?)", ROWS)
+    conn.commit()
+    return conn
+
+
+def _tables(conn):
+    return sorted(name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"))
+
+
+def _stored(conn):
+    return conn.execute(f"SELECT ts, spacecraft, antenna_id, signal_strength FROM {TABLE} ORDER BY ts").fetchall()
+
+
+def test_iso_table_migrates_to_rows_then_to_monthly_partitions(tmp_path):
+    conn = _legacy_db(str(tmp_path / "db.sqlite"))
+    expected = [(ts, row[1], row[2], row[3]) for ts, row in zip(EPOCHS, ROWS)]
+
+    HistoryStore(str(tmp_path / "db.sqlite"), TABLE).ensure_schema(conn)
+    assert _tables(conn) == [TABLE]
+    assert _stored(conn) == expected
+
+    monthly = HistoryStore(str(tmp_path / "db.sqlite"), TABLE, partition="monthly")
+    monthly.ensure_schema(conn)
+    assert _tables(conn) == [f"{TABLE}_202406", f"{TABLE}_202407"]
+    assert _stored(conn) == expected
+    assert [r.ts for r in monthly.query("MRO", "DSS14", EPOCHS[0], EPOCHS[2])] == [EPOCHS[1]]
+    conn.close()
+
+
+def test_failed_migration_leaves_the_legacy_table_in_place(tmp_path, monkeypatch):
+    conn = _legacy_db(str(tmp_path / "db.sqlite"))
+    store = HistoryStore(str(tmp_path / "db.sqlite"), TABLE)
+    monkeypatch.setattr(store, "write", lambda conn, rows: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        store.ensure_schema(conn)
+
+    assert _tables(conn) == [TABLE]
+    assert conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE timestamp IS NOT NULL").fetchone()[0] == 3
+    conn.close()
+
+
+def test_leftover_legacy_table_is_copied_without_duplicates(tmp_path):
+    conn = _legacy_db(str(tmp_path / "db.sqlite"))
+    # What a crash mid-copy, or an older version that never dropped it, leaves behind.
+    conn.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy")
+    store = HistoryStore(str(tmp_path / "db.sqlite"), TABLE)
+    store._create_table(conn, TABLE)
+    store.write(conn, [(EPOCHS[0], "VGR1", "DSS43", -150.0) + (None,) * 6])
+    conn.commit()
+
+    store.ensure_schema(conn)
+    assert _tables(conn) == [TABLE]
+    assert [row[0] for row in _stored(conn)] == EPOCHS
+    conn.close()
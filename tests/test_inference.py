@@ -0,0 +1,92 @@
+import threading
+import time
+
+from inference import InferenceService
+from records import DSNRecord
+
+
+class GatedPredictor:
+    """Returns each record's signal; calls wait for the gate to open."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def predict(self, records):
+        self.calls += 1
+        self.gate.wait(5)
+        return [record.signal_strength for record in records]
+
+    def reload(self):
+        pass
+
+
+def _snapshot(ts, signal):
+    return (DSNRecord(ts, "VGR1", "DSS43", signal),)
+
+
+def _in_threads(count, request):
+    results = [None] * count
+
+    def run(i):
+        results[i] = request()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_requests_for_one_snapshot_share_a_batch():
+    predictor = GatedPredictor()
+    service = InferenceService({"duration": predictor}, timeout=5)
+    snapshot = _snapshot(100, -150.0)
+    threads, results = _in_threads(8, lambda: service.predict(snapshot))
+    time.sleep(0.05)
+    predictor.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [{"duration": [-150.0]}] * 8
+    assert predictor.calls == 1
+    # Finished batches answer at once; a different snapshot from the same
+    # second is a new batch, not the cached one.
+    assert service.predict(snapshot) == {"duration": [-150.0]}
+    assert service.predict(_snapshot(100, -140.0)) == {"duration": [-140.0]}
+    assert predictor.calls == 2
+    # After a reload the cached answers are stale.
+    service.reload()
+    assert service.predict(snapshot) == {"duration": [-150.0]}
+    assert predictor.calls == 3
+    service.close()
+
+
+def test_requests_past_max_pending_are_shed():
+    predictor = GatedPredictor()
+    service = InferenceService({"duration": predictor}, max_pending=1, timeout=5)
+    threads, results = _in_threads(1, lambda: service.predict(_snapshot(100, -150.0)))
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+    assert service.predict(_snapshot(160, -150.0)) == {}
+    assert time.perf_counter() - start < 1
+    predictor.gate.set()
+    threads[0].join(5)
+    assert results == [{"duration": [-150.0]}]
+    assert predictor.calls == 1
+    # Capacity is back once the batch finished.
+    assert service.predict(_snapshot(220, -150.0)) == {"duration": [-150.0]}
+    service.close()
+
+
+def test_a_slow_batch_times_out_and_is_reused_once_done():
+    predictor = GatedPredictor()
+    service = InferenceService({"duration": predictor}, timeout=0.05)
+    snapshot = _snapshot(100, -150.0)
+
+    assert service.predict(snapshot) == {}
+    predictor.gate.set()
+    time.sleep(0.1)
+    assert service.predict(snapshot) == {"duration": [-150.0]}
+    assert predictor.calls == 1
+    service.close()
@@ -0,0 +1,85 @@
+import math
+import re
+
+import metrics
+from metrics import Registry
+
+# name{labels} value, with label values that may hold escaped quotes.
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+_LABEL = re.compile(r'([a-zA-Z_]\w*)="((?:[^"\\]|\\.)*)"')
+
+
+def _parse(text):
+    """{metric family: {"type": ..., "samples": [(name, {label: value}, float)]}}, checking every line."""
+    families, current = {}, None
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            current = families.setdefault(line.split()[2], {"samples": []})
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert families[name] is current
+            current["type"] = kind
+        else:
+            match = _SAMPLE.match(line)
+            assert match, line
+            labels = {k: re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), v)
+                      for k, v in _LABEL.findall(match.group(2) or "")}
+            current["samples"].append((match.group(1), labels, float(match.group(3))))
+    return families
+
+
+def _check_histogram(family, name):
+    """Every label set's buckets ascend to +Inf, are cumulative and end at _count."""
+    series = {}
+    for sample, labels, value in family["samples"]:
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        series.setdefault(key, {"bucket": [], "sum": None, "count": None})
+        suffix = sample[len(name) + 1:]
+        if suffix == "bucket":
+            series[key]["bucket"].append((labels["le"], value))
+        else:
+            series[key][suffix] = value
+    for parts in series.values():
+        bounds = [float(le) for le, _ in parts["bucket"]]
+        counts = [count for _, count in parts["bucket"]]
+        assert parts["bucket"][-1][0] == "+Inf"
+        assert bounds == sorted(bounds) and len(set(bounds)) == len(bounds)
+        assert counts == sorted(counts)
+        assert counts[-1] == parts["count"]
+    return series
+
+
+def test_histogram_buckets_are_ordered_cumulative_and_end_at_inf():
+    registry = Registry()
+    histogram = registry.histogram("t_seconds", "Test latencies.", ["stage"], buckets=(1.0, 0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0, 3.0):
+        histogram.observe(value, stage="fetch")
+    histogram.observe(0.2, stage='odd "stage"\n')
+
+    families = _parse(registry.render())
+    assert families["t_seconds"]["type"] == "histogram"
+    series = _check_histogram(families["t_seconds"], "t_seconds")
+    fetch = series[(("stage", "fetch"),)]
+    # An observation equal to a bound counts in that bucket (le is inclusive).
+    assert fetch["bucket"] == [("0.1", 2), ("0.5", 3), ("1", 4), ("+Inf", 6)]
+    assert math.isclose(fetch["sum"], 6.15)
+    assert series[(("stage", 'odd "stage"\n'),)]["count"] == 1
+
+
+def test_metrics_endpoint_serves_parseable_exposition(dashboard):
+    app = dashboard[0]
+    metrics.STAGE_SECONDS.observe(0.003, stage="parse")
+    metrics.FETCH_ERRORS.inc(source="primary")
+
+    response = app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+    families = _parse(response.get_data(as_text=True))
+
+    assert families["dsn_fetch_errors_total"]["type"] == "counter"
+    assert families["dsn_socket_clients"]["type"] == "gauge"
+    series = _check_histogram(families["dsn_stage_seconds"], "dsn_stage_seconds")
+    parse = series[(("stage", "parse"),)]
+    assert [le for le, _ in parse["bucket"]] == [f"{b:g}" for b in metrics.DEFAULT_BUCKETS] + ["+Inf"]
+    assert parse["count"] >= 1
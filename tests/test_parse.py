@@ -0,0 +1,35 @@
+import json
+import os
+
+from conftest import FIXTURES
+from bench_parse import FixedClockMonitor, golden_path, record_fields
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _golden(name):
+    with open(golden_path(os.path.join(FIXTURES, name)), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_xml_feed_matches_golden_records():
+    assert record_fields(FixedClockMonitor()._parse_xml_data(_fixture("dsn.xml"))) == _golden("dsn.xml")
+
+
+def test_bytes_and_text_parse_alike():
+    monitor = FixedClockMonitor()
+    xml = _fixture("dsn.xml")
+    assert monitor._parse_xml_data(xml.encode("utf-8")) == monitor._parse_xml_data(xml)
+
+
+def test_truncated_feed_yields_no_records():
+    xml = _fixture("dsn.xml")
+    second_dish_end = xml.index("</dish>", xml.index("</dish>") + 1) + len("</dish>")
+    monitor = FixedClockMonitor()
+    # Dishes before the cut parse fine, but a partial snapshot must not be installed.
+    assert monitor._parse_xml_data(xml[:second_dish_end] + "<dish name=") == []
+    # A failure for the scheduler to back off on, unlike an empty feed.
+    assert monitor.last_fetch_failed
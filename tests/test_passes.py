@@ -0,0 +1,149 @@
+import sqlite3
+
+from history import HistoryStore
+from passes import Sessionizer
+from storage import SQLiteWriter
+
+TABLE = "communication_logs"
+T0 = 1718841600
+
+
+def _row(offset, spacecraft, antenna_id="DSS43", signal=-150.0):
+    return (T0 + offset, spacecraft, antenna_id, signal) + (None,) * 6
+
+
+def _open_db(path):
+    conn = sqlite3.connect(path)
+    history = HistoryStore(path, TABLE)
+    history.ensure_schema(conn)
+    return conn, history
+
+
+def _sessionizer(conn, history):
+    sessionizer = Sessionizer(history, max_gap=900)
+    sessionizer.ensure_schema(conn)
+    return sessionizer
+
+
+def _write(conn, history, sessionizer, rows):
+    history.write(conn, rows)
+    sessionizer.write(conn, rows)
+    conn.commit()
+
+
+def _passes(conn):
+    return conn.execute("SELECT spacecraft, start_ts - ?, end_ts - ?, duration, samples FROM communication_passes "
+                        "ORDER BY start_ts, spacecraft", (T0, T0)).fetchall()
+
+
+def _labels(conn, spacecraft):
+    return [d for (d,) in conn.execute(f"SELECT communication_duration FROM {TABLE} WHERE spacecraft = ? "
+                                       f"ORDER BY ts", (spacecraft,))]
+
+
+SCRAPES = [[_row(0, "VGR1"), _row(0, "MRO", "DSS14")],
+           [_row(60, "VGR1"), _row(60, "MRO", "DSS14")],
+           [_row(120, "MRO", "DSS14")],  # VGR1's contact has ended
+           [_row(180, "MRO", "DSS14")]]
+
+
+def test_contact_missing_from_a_scrape_closes_and_labels_its_rows(tmp_path):
+    conn, history = _open_db(str(tmp_path / "db.sqlite"))
+    sessionizer = _sessionizer(conn, history)
+    for rows in SCRAPES:
+        _write(conn, history, sessionizer, rows)
+
+    assert _passes(conn) == [("VGR1", 0, 60, 60.0, 2)]
+    assert _labels(conn, "VGR1") == [60.0, 60.0]
+    # MRO is still being tracked: no pass, no labels yet.
+    assert _labels(conn, "MRO") == [None] * 4
+    assert conn.execute("SELECT spacecraft, start_ts - ?, last_ts - ? FROM communication_passes_open",
+                        (T0, T0)).fetchall() == [("MRO", 0, 180)]
+
+
+def test_feed_gap_longer_than_max_gap_closes_every_contact(tmp_path):
+    conn, history = _open_db(str(tmp_path / "db.sqlite"))
+    sessionizer = _sessionizer(conn, history)
+    for offset in (0, 60, 1060, 1120):
+        _write(conn, history, sessionizer, [_row(offset, "VGR1")])
+
+    assert _passes(conn) == [("VGR1", 0, 60, 60.0, 2)]
+    assert _labels(conn, "VGR1") == [60.0, 60.0, None, None]
+
+
+def test_open_contacts_resume_after_a_restart(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    conn, history = _open_db(path)
+    sessionizer = _sessionizer(conn, history)
+    for rows in SCRAPES[:2]:
+        _write(conn, history, sessionizer, rows)
+    conn.close()
+
+    conn, history = _open_db(path)
+    sessionizer = _sessionizer(conn, history)
+    for rows in SCRAPES[2:]:
+        _write(conn, history, sessionizer, rows)
+    assert _passes(conn) == [("VGR1", 0, 60, 60.0, 2)]
+
+
+def test_backfill_finds_the_passes_incremental_writes_do(tmp_path):
+    incremental, history = _open_db(str(tmp_path / "incremental.sqlite"))
+    sessionizer = _sessionizer(incremental, history)
+    scrapes = SCRAPES + [[_row(1200, "VGR1")], [_row(1260, "VGR1"), _row(1260, "JUNO", "DSS25")], []]
+    for rows in scrapes:
+        _write(incremental, history, sessionizer, rows)
+
+    replayed, history = _open_db(str(tmp_path / "replayed.sqlite"))
+    history.write(replayed, [row for rows in scrapes for row in rows])
+    replayed.commit()
+    _sessionizer(replayed, history)  # New pass tables: history is replayed
+
+    assert _passes(replayed) == _passes(incremental)
+    for spacecraft in ("VGR1", "MRO", "JUNO"):
+        assert _labels(replayed, spacecraft) == _labels(incremental, spacecraft)
+
+
+def test_samples_count_scrapes_not_signals(tmp_path):
+    conn, history = _open_db(str(tmp_path / "db.sqlite"))
+    sessionizer = _sessionizer(conn, history)
+    # Two downlink signals from the same dish in every scrape.
+    for offset in (0, 60):
+        _write(conn, history, sessionizer, [_row(offset, "VGR1", signal=-150.0), _row(offset, "VGR1", signal=-148.0)])
+    _write(conn, history, sessionizer, [_row(120, "MRO")])
+    _write(conn, history, sessionizer, [_row(180, "MRO")])
+
+    assert _passes(conn) == [("VGR1", 0, 60, 60.0, 2)]
+    assert conn.execute("SELECT peak_signal FROM communication_passes").fetchone() == (-148.0,)
+
+
+class FailOn:
+    """A sink after the Sessionizer that rejects batches containing one spacecraft."""
+
+    def __init__(self, spacecraft):
+        self.spacecraft = spacecraft
+
+    def ensure_schema(self, conn):
+        pass
+
+    def write(self, conn, rows):
+        if any(row[1] == self.spacecraft for row in rows):
+            raise ValueError("rejected batch")
+
+
+def test_rolled_back_batch_leaves_open_contacts_as_committed(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    history = HistoryStore(path, TABLE)
+    sessionizer = Sessionizer(history, max_gap=900)
+    writer = SQLiteWriter(path, [history, sessionizer, FailOn("BAD")])
+    writer.start()
+    batches = [[_row(0, "VGR1")], [_row(60, "VGR1")],
+               [_row(120, "MRO"), _row(120, "BAD")],  # Would close VGR1, but is rolled back
+               [_row(180, "VGR1")], [_row(240, "MRO")], [_row(300, "MRO")]]
+    for rows in batches:
+        writer.put(rows)
+        writer.flush()
+    writer.stop()
+
+    conn = sqlite3.connect(path)
+    assert _passes(conn) == [("VGR1", 0, 180, 180.0, 3)]
+    conn.close()
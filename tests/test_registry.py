@@ -0,0 +1,131 @@
+import os
+import pickle
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import registry as registry_module
+from features import FeatureEncoder
+from predict import DSNPredictor
+from registry import ModelRegistry
+
+
+class ConstantModel:
+    """Predicts one value; predict() can be held to keep a call in flight."""
+
+    gate = threading.Event()
+    entered = threading.Event()
+
+    def __init__(self, value):
+        self.value = value
+        self.estimators_ = []
+
+    def predict(self, X):
+        ConstantModel.entered.set()
+        ConstantModel.gate.wait(5)
+        return np.full(len(X), self.value)
+
+
+def _artifact(value):
+    encoder = FeatureEncoder(["signal_strength"]).fit({"signal_strength": [-150.0]})
+    return {"model": ConstantModel(value), "encoder": encoder}
+
+
+def test_save_replaces_atomically_and_keeps_the_old_version_on_failure(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path / "model.joblib"))
+    assert registry.save({"weights": np.arange(4)}) == 1
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(registry_module.os, "replace", fail)
+    with pytest.raises(OSError):
+        registry.save({"weights": np.arange(8)})
+    monkeypatch.undo()
+
+    assert registry.versions() == [1]
+    assert os.listdir(tmp_path) == [os.path.basename(registry.path_for(1))]
+    version, artifact = registry.load()
+    assert version == 1
+    assert list(artifact["weights"]) == [0, 1, 2, 3]
+
+
+def test_save_keeps_only_the_newest_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "model.joblib"), keep=2)
+    for value in range(4):
+        registry.save({"value": value})
+
+    assert registry.versions() == [3, 4]
+    assert registry.load() == (4, {"value": 3})
+    assert registry.load(3) == (3, {"value": 2})
+
+
+def test_uncompressed_arrays_load_memory_mapped(tmp_path):
+    weights = np.linspace(0.0, 1.0, 1000)
+    mapped = ModelRegistry(str(tmp_path / "mapped.joblib"))
+    mapped.save({"weights": weights})
+    packed = ModelRegistry(str(tmp_path / "packed.joblib"), compress=3)
+    packed.save({"weights": weights})
+
+    _, artifact = mapped.load()
+    assert isinstance(artifact["weights"], np.memmap)
+    assert np.array_equal(artifact["weights"], weights)
+    _, artifact = packed.load()
+    assert not isinstance(artifact["weights"], np.memmap)
+    assert np.array_equal(artifact["weights"], weights)
+
+
+def test_legacy_pickle_is_imported_as_the_first_version(tmp_path):
+    legacy_path = tmp_path / "model.pkl"
+    with open(legacy_path, "wb") as f:
+        pickle.dump({"model": "forest", "encoder": "encoder"}, f)
+    registry = ModelRegistry(str(legacy_path))
+
+    assert registry.load() == (1, {"model": "forest", "encoder": "encoder"})
+    assert registry.versions() == [1]
+    # Later loads read the versioned file, not the pickle.
+    os.remove(legacy_path)
+    assert registry.load() == (1, {"model": "forest", "encoder": "encoder"})
+
+
+def test_legacy_pickle_without_encoder_is_not_imported(tmp_path):
+    legacy_path = tmp_path / "model.pkl"
+    with open(legacy_path, "wb") as f:
+        pickle.dump({"model": "forest"}, f)
+    registry = ModelRegistry(str(legacy_path))
+
+    assert registry.load() == (None, None)
+    assert registry.versions() == []
+
+
+def test_reload_swaps_models_without_disturbing_a_prediction_in_flight(tmp_path):
+    predictor = DSNPredictor({
+        "model_path": str(tmp_path / "model.joblib"),
+        "training_data": None,
+        "features": ["signal_strength"],
+        "target": "communication_duration",
+    })
+    predictor.registry.save(_artifact(1.0))
+    records = [SimpleNamespace(signal_strength=-150.0)]
+    ConstantModel.gate.set()
+    assert list(predictor.predict(records)) == [1.0]
+
+    ConstantModel.gate.clear()
+    ConstantModel.entered.clear()
+    in_flight = {}
+    worker = threading.Thread(target=lambda: in_flight.setdefault("result", predictor.predict(
+        [SimpleNamespace(signal_strength=-140.0)])))
+    worker.start()
+    assert ConstantModel.entered.wait(5)
+
+    predictor.registry.save(_artifact(2.0))
+    predictor.reload()
+    ConstantModel.gate.set()
+    worker.join(5)
+
+    # The call that started on version 1 finishes on it; new calls use version 2.
+    assert list(in_flight["result"]) == [1.0]
+    assert predictor._active.version == 2
+    assert list(predictor.predict(records)) == [2.0]
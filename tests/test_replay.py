@@ -0,0 +1,102 @@
+import os
+
+import pytest
+import requests
+
+import replay
+from conftest import FIXTURES
+from bench_parse import FixedClockMonitor
+from fetcher import FetchResult
+from replay import RecordingFetcher, ReplayFetcher, list_captures
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class ScriptedFetcher:
+    """Answers fetch() and fetch_backup() from fixed result lists."""
+
+    def __init__(self, primary, backup=()):
+        self.primary = list(primary)
+        self.backup = list(backup)
+
+    def fetch(self, params=None):
+        return self.primary.pop(0)
+
+    def fetch_backup(self):
+        return self.backup.pop(0)
+
+
+def _primary(body):
+    return FetchResult("primary", body, "text/xml", False)
+
+
+NOT_MODIFIED = FetchResult("primary", None, None, True)
+
+
+def _record(directory):
+    xml = _fixture("dsn.xml")
+    changed = xml.replace('name="DSS', 'name="DSX', 1)
+    recorder = RecordingFetcher(ScriptedFetcher(
+        [_primary(xml), NOT_MODIFIED, _primary(changed), _primary(xml)],
+        [FetchResult("backup", _fixture("backup.html"), "text/html", False)],
+    ), directory)
+    answers = [recorder.fetch(), recorder.fetch(), recorder.fetch(), recorder.fetch_backup(), recorder.fetch()]
+    return answers
+
+
+def test_replay_serves_the_recorded_responses_in_order(tmp_path):
+    answers = _record(str(tmp_path))
+    # Every full body is captured, in order, even within one millisecond; 304s are not.
+    assert [source for _, source, _ in list_captures(str(tmp_path))] == ["primary", "primary", "backup", "primary"]
+
+    player = ReplayFetcher(str(tmp_path), speed=0, loop=False)
+    recorded = [answer for answer in answers if not answer.not_modified]
+    assert [(r.source, r.body) for r in (player.fetch(), player.fetch())] == \
+        [(r.source, r.body) for r in recorded[:2]]
+    # The backup capture at the replay position is the recorded one.
+    assert player.fetch_backup().body == recorded[2].body
+    assert [(r.source, r.body) for r in (player.fetch(), player.fetch())] == \
+        [(r.source, r.body) for r in recorded[2:]]
+    # Past the end without looping, the feed simply stops changing.
+    assert player.fetch().not_modified
+
+
+def test_replayed_bodies_parse_like_the_originals(tmp_path):
+    _record(str(tmp_path))
+    monitor = FixedClockMonitor()
+    original = monitor._parse_xml_data(_fixture("dsn.xml"))
+
+    assert monitor._parse_xml_data(ReplayFetcher(str(tmp_path), speed=0).fetch().body) == original
+    scaled = monitor._parse_xml_data(ReplayFetcher(str(tmp_path), speed=0, scale=3).fetch().body)
+    assert len(scaled) == 3 * len(original)
+    assert len({(r.spacecraft, r.antenna_id) for r in scaled}) == 3 * len({(r.spacecraft, r.antenna_id)
+                                                                          for r in original})
+
+
+def test_timed_replay_answers_not_modified_between_captures(tmp_path, monkeypatch):
+    for name, body in (("0000000001000-primary.xml", "<dsn>a</dsn>"), ("0000000011000-primary.xml", "<dsn>b</dsn>")):
+        (tmp_path / name).write_text(body, encoding="utf-8")
+    clock = [100.0]
+    monkeypatch.setattr(replay.time, "monotonic", lambda: clock[0])
+    player = ReplayFetcher(str(tmp_path), speed=2.0)
+
+    assert player.fetch().body == "<dsn>a</dsn>"
+    clock[0] += 4.0  # 8 s of recording
+    assert player.fetch().not_modified
+    player.forget("primary")
+    assert player.fetch().body == "<dsn>a</dsn>"
+    clock[0] += 1.0
+    assert player.fetch().body == "<dsn>b</dsn>"
+    clock[0] += 5.0  # 20 s: one average gap after the last capture, it loops
+    assert player.fetch().body == "<dsn>a</dsn>"
+
+
+def test_replay_without_backup_capture_fails_like_a_fetch(tmp_path):
+    (tmp_path / "0000000001000-primary.xml").write_text("<dsn/>", encoding="utf-8")
+    with pytest.raises(requests.RequestException):
+        ReplayFetcher(str(tmp_path)).fetch_backup()
+    with pytest.raises(ValueError):
+        ReplayFetcher(str(tmp_path / "empty"))
@@ -0,0 +1,108 @@
+import math
+import sqlite3
+
+import pytest
+
+from history import HistoryStore
+from rollups import RESOLUTIONS, RollupStore, resolution_for
+
+TABLE = "communication_logs"
+MIDNIGHT = 1718841600
+START = MIDNIGHT - 2 * 3600
+
+
+def _history_rows():
+    rows = []
+    ts = START
+    for i in range(400):
+        # Uneven spacing, and one gap longer than max_gap to break the contact.
+        ts += 45 if i != 200 else 2000
+        signal = None if i % 5 == 0 else -150.0 - i % 13
+        rows.append((ts, "VGR1", "DSS43", signal, None, 160.0 + i % 3, None, None, None, None))
+        if i % 2:
+            rows.append((ts, "MRO", "DSS14", -120.0, None, None, None, None, None, None))
+    return rows
+
+
+def _open(path):
+    conn = sqlite3.connect(path)
+    history = HistoryStore(path, TABLE)
+    history.ensure_schema(conn)
+    rollups = RollupStore(path, TABLE, max_gap=900, max_points=100)
+    rollups.ensure_schema(conn)
+    return conn, history, rollups
+
+
+def _tables(conn, rollups):
+    return {suffix: conn.execute(f"SELECT * FROM {rollups.table_for(suffix)} "
+                                 f"ORDER BY spacecraft, antenna_id, bucket").fetchall()
+            for suffix, _ in RESOLUTIONS}
+
+
+def _assert_same(left, right):
+    assert left.keys() == right.keys()
+    for suffix in left:
+        assert len(left[suffix]) == len(right[suffix]), suffix
+        for a, b in zip(left[suffix], right[suffix]):
+            assert all(x == y or math.isclose(x, y) for x, y in zip(a, b)), (suffix, a, b)
+
+
+def test_incremental_writes_match_a_rebuild(tmp_path):
+    conn, history, rollups = _open(str(tmp_path / "db.sqlite"))
+    rows = _history_rows()
+    # Batches of uneven size; the one from 200 to 260 crosses midnight, so
+    # it upserts into existing minute, hour and day buckets and opens new ones.
+    bounds = [0, 7, 200, 260, 261, 450, len(rows)]
+    assert rows[200][0] < MIDNIGHT <= rows[259][0]
+    for lo, hi in zip(bounds, bounds[1:]):
+        history.write(conn, rows[lo:hi])
+        rollups.write(conn, rows[lo:hi])
+        conn.commit()
+    incremental = _tables(conn, rollups)
+    assert all(incremental.values())
+
+    rollups.rebuild(conn, rows[0][0], rows[-1][0])
+    conn.commit()
+    _assert_same(incremental, _tables(conn, rollups))
+
+    # A store created over the same history backfills to the same buckets.
+    path = str(tmp_path / "copy.sqlite")
+    copy = sqlite3.connect(path)
+    copy_history = HistoryStore(path, TABLE)
+    copy_history.ensure_schema(copy)
+    copy_history.write(copy, rows)
+    copy.commit()
+    backfilled = RollupStore(path, TABLE, max_gap=900, max_points=100)
+    backfilled.ensure_schema(copy)
+    _assert_same(incremental, _tables(copy, backfilled))
+
+
+def test_series_picks_the_finest_resolution_within_max_points(tmp_path):
+    conn, history, rollups = _open(str(tmp_path / "db.sqlite"))
+    rows = _history_rows()
+    history.write(conn, rows)
+    rollups.write(conn, rows)
+    conn.commit()
+
+    assert resolution_for(START, START + 100 * 60, 100) == "1m"
+    assert resolution_for(START, START + 101 * 60, 100) == "1h"
+    assert resolution_for(START, START + 100 * 86400, 100) == "1d"
+    assert resolution_for(START, START + 1000 * 86400, 100) == "1d"
+
+    end = rows[-1][0]
+    resolution, points = rollups.series(START, START + 90 * 60)
+    assert resolution == "1m"
+    assert all(p["bucket"] % 60 == 0 for p in points)
+    resolution, points = rollups.series(START, end)
+    assert resolution == "1h"
+    assert [p["bucket"] for p in points] == sorted({ts - ts % 3600 for ts, *_ in rows})
+    assert sum(p["samples"] for p in points) == len(rows)
+    resolution, points = rollups.series(START - 200 * 3600, end)
+    assert resolution == "1d"
+    assert [p["bucket"] for p in points] == [MIDNIGHT - 86400, MIDNIGHT]
+
+    _, points = rollups.series(START, end, spacecraft="MRO", resolution="1d")
+    assert sum(p["samples"] for p in points) == 200
+    assert {p["signal_strength"]["avg"] for p in points} == {-120.0}
+    with pytest.raises(ValueError):
+        rollups.series(START, end, resolution="5m")
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from records import DSNRecord
+from scheduler import AdaptiveScheduler
+
+
+def _scrape(**signals):
+    return [DSNRecord(0, spacecraft, "DSS43", signal) for spacecraft, signal in signals.items()]
+
+
+@pytest.fixture
+def scheduler():
+    return AdaptiveScheduler(base_interval=300, min_interval=60, max_interval=900,
+                             signal_change=3.0, growth=1.5, max_backoff=1800, jitter=0.0)
+
+
+def test_first_scrape_uses_the_base_interval(scheduler):
+    assert scheduler.observe(_scrape(VGR1=-150.0)) == 300
+    assert scheduler.mode == "steady"
+
+
+def test_contacts_changing_drop_to_the_minimum(scheduler):
+    scheduler.observe(_scrape(VGR1=-150.0))
+    assert scheduler.observe(_scrape(VGR1=-150.0, MRO=-120.0)) == 60
+    assert scheduler.mode == "busy"
+    assert scheduler.observe(_scrape(VGR1=-150.0, MRO=-124.0)) == 60
+    assert scheduler.observe(_scrape(MRO=-124.0)) == 60
+
+
+def test_unchanged_feed_stretches_to_the_maximum(scheduler):
+    scheduler.observe(_scrape(VGR1=-150.0))
+    delays = [scheduler.observe(_scrape(VGR1=-150.0)) for _ in range(4)]
+    assert delays == [450, 675, 900, 900]
+    assert scheduler.mode == "static"
+
+
+def test_small_changes_drift_back_to_the_base_interval(scheduler):
+    scheduler.observe(_scrape(VGR1=-150.0))
+    scheduler.observe(_scrape(VGR1=-150.0, MRO=-120.0))
+    assert [scheduler.observe(_scrape(VGR1=-150.0 - i, MRO=-120.0)) for i in (1, 2, 3, 4)] == [90, 135, 202.5, 300]
+    assert scheduler.mode == "steady"
+
+    for _ in range(3):
+        scheduler.observe(_scrape(VGR1=-154.0, MRO=-120.0))
+    assert scheduler.interval == 900
+    assert [scheduler.observe(_scrape(VGR1=-155.0 - i, MRO=-120.0)) for i in (0, 1, 2)] == [600, 400, 300]
+
+
+def test_an_empty_feed_is_a_change_not_a_failure(scheduler):
+    scheduler.observe(_scrape(VGR1=-150.0))
+    # The last contact ended: poll soon, without backing off.
+    assert scheduler.observe([]) == 60
+    assert (scheduler.mode, scheduler.failures) == ("busy", 0)
+    # Staying empty is simply an unchanged feed.
+    assert scheduler.observe([]) == 90
+    assert scheduler.mode == "static"
+
+
+def test_failures_back_off_exponentially_until_a_scrape_succeeds(scheduler, monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    assert [scheduler.failure() for _ in range(7)] == [60, 120, 240, 480, 960, 1800, 1800]
+    assert scheduler.mode == "backoff"
+
+    scheduler.observe(_scrape(VGR1=-150.0))
+    assert (scheduler.failures, scheduler.mode) == (0, "steady")
+    assert scheduler.failure() == 60
+
+
+def test_backoff_jitter_keeps_at_least_half_the_delay(scheduler):
+    for failures in range(1, 8):
+        delay = min(1800, 60 * 2 ** (failures - 1))
+        assert delay / 2 <= scheduler.failure() <= delay
+
+
+def test_delays_are_jittered_around_the_interval():
+    scheduler = AdaptiveScheduler(base_interval=300, jitter=0.1)
+    delays = {scheduler.observe(_scrape(VGR1=-150.0)) for _ in range(20)}
+    assert len(delays) > 1
+    assert all(270 <= delay <= 330 for delay in delays)
@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+
+import pytest
+
+from storage import SQLiteWriter
+
+
+class ListSink:
+    """Keeps every committed batch in memory; fails on demand."""
+
+    def __init__(self, fail_schema=None, fail_rows=()):
+        self.fail_schema = fail_schema
+        self.fail_rows = set(fail_rows)
+        self.batches = []
+
+    def ensure_schema(self, conn):
+        if self.fail_schema is not None:
+            raise self.fail_schema
+
+    def write(self, conn, rows):
+        if self.fail_rows.intersection(rows):
+            raise ValueError("bad row")
+        self.batches.append(list(rows))
+
+
+def _flush_within(writer, seconds=5):
+    """Run flush() in a thread; returns (finished in time, exception raised or None)."""
+    done = threading.Event()
+    raised = []
+
+    def flush():
+        try:
+            writer.flush()
+        except Exception as e:
+            raised.append(e)
+        finally:
+            done.set()
+    threading.Thread(target=flush, daemon=True).start()
+    finished = done.wait(seconds)
+    return finished, raised[0] if raised else None
+
+
+def test_schema_error_is_raised_from_start_and_retried(tmp_path):
+    sink = ListSink(fail_schema=sqlite3.OperationalError("database is locked"))
+    writer = SQLiteWriter(str(tmp_path / "db.sqlite"), [sink])
+    with pytest.raises(sqlite3.OperationalError):
+        writer.start()
+
+    sink.fail_schema = None
+    writer.start()
+    writer.put([1, 2])
+    writer.flush()
+    writer.stop()
+    assert sink.batches == [[1, 2]]
+
+
+def test_failing_sink_is_rolled_back_without_stalling_the_writer(tmp_path):
+    sink = ListSink(fail_rows={"bad"})
+    writer = SQLiteWriter(str(tmp_path / "db.sqlite"), [sink])
+    writer.start()
+    writer.put(["bad"])
+    assert _flush_within(writer) == (True, None)
+    writer.put(["good"])
+    assert _flush_within(writer) == (True, None)
+    writer.stop()
+    assert sink.batches == [["good"]]
+
+
+def test_dead_writer_thread_raises_instead_of_blocking(tmp_path, monkeypatch):
+    writer = SQLiteWriter(str(tmp_path / "db.sqlite"), [ListSink()])
+    writer.start()
+    monkeypatch.setattr(writer, "_write_batch", lambda conn, batch: 1 / 0)
+    writer.put([1])
+    finished, error = _flush_within(writer)
+    assert finished and isinstance(error, RuntimeError)  # Released, not hung
+    with pytest.raises(RuntimeError):
+        writer.put([2])
+
+    monkeypatch.undo()
+    writer.start()  # A dead thread is replaced
+    writer.put([3])
+    writer.flush()
+    writer.stop()
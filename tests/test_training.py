@@ -0,0 +1,78 @@
+import sqlite3
+import time
+
+from history import HistoryStore
+from passes import Sessionizer
+from registry import ModelRegistry
+from training import train_increment, training_options
+
+TABLE = "communication_logs"
+# Far enough back that every scrape is past the settle window.
+T0 = (int(time.time()) - 30 * 86400) // 3600 * 3600
+
+
+def _scrape(i):
+    # A new DSS43 contact every five scrapes, so all but the latest close.
+    rows = [(T0 + 60 * i, f"SC{i // 5}", "DSS43", -150.0 - i % 7) + (None,) * 6]
+    if i >= 120:
+        # A long contact on DSS14 that is still open at the end.
+        rows.append((T0 + 60 * i, "VGR1", "DSS14", -160.0) + (None,) * 6)
+    return rows
+
+
+def _grow(conn, history, sessionizer, scrapes):
+    for i in scrapes:
+        rows = _scrape(i)
+        history.write(conn, rows)
+        sessionizer.write(conn, rows)
+        conn.commit()
+
+
+def _options(tmp_path, db_file):
+    ml_config = {
+        "model_path": str(tmp_path / "models" / "model.joblib"),
+        "features": ["signal_strength", "antenna_id", "timestamp"],
+        "target": "communication_duration",
+        "trees_per_round": 3,
+        "max_trees": 4,
+        "min_training_rows": 10,
+        "n_jobs": 1,
+        "settle_seconds": 0,
+    }
+    return training_options(ml_config, {"file": db_file, "table": TABLE})
+
+
+def test_rounds_train_only_on_new_settled_rows_and_cap_the_forest(tmp_path):
+    db_file = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db_file)
+    history = HistoryStore(db_file, TABLE)
+    history.ensure_schema(conn)
+    sessionizer = Sessionizer(history)
+    sessionizer.ensure_schema(conn)
+    options = _options(tmp_path, db_file)
+
+    # Scrapes 95..99 belong to the contact that is still open.
+    _grow(conn, history, sessionizer, range(100))
+    first = train_increment(options)
+    assert first["status"] == "trained"
+    assert first["rows"] == 95
+    assert first["checkpoint"] == T0 + 60 * 94
+    assert first["trees"] == 3
+
+    # VGR1 has been open since scrape 120: rows from there on wait, even
+    # the DSS43 rows that are labelled already.
+    _grow(conn, history, sessionizer, range(100, 150))
+    second = train_increment(options)
+    assert second["status"] == "trained"
+    assert second["rows"] == 25
+    assert second["checkpoint"] == T0 + 60 * 119
+    assert second["trees"] == 4
+
+    _, artifact = ModelRegistry(options["model_path"]).load()
+    assert artifact["checkpoint"] == second["checkpoint"]
+    assert len(artifact["model"].estimators_) == 4
+    assert artifact["model"].n_estimators == 4
+
+    # Nothing new and settled: the next round has nothing to read.
+    assert train_increment(options) == {"status": "skipped", "rows": 0}
+    conn.close()
@@ -0,0 +1,54 @@
+import re
+import time
+
+import plotting
+from records import DSNRecord
+
+
+def test_plot_still_rendering_answers_503_with_retry_after(dashboard, monkeypatch):
+    app, _, _, monitor = dashboard
+    monkeypatch.setattr(plotting.PlotRenderer, "_render", lambda self, points: time.sleep(1) or b"png")
+    monitor.install_snapshot([DSNRecord(int(time.time()), "VGR1", "DSS43", -150.0)])
+    page = app.test_client().get("/").get_data(as_text=True)
+    plot_url = re.search(r'src="(/plot/[^"]+)"', page).group(1)
+
+    response = app.test_client().get(plot_url)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_history_from_the_index_carries_the_stored_pass_durations(dashboard):
+    app, _, emit_update, monitor = dashboard
+    start = int(time.time()) - 600
+    scrapes = [[DSNRecord(start, "VGR1", "DSS43", -150.0)],
+               [DSNRecord(start + 60, "VGR1", "DSS43", -151.0)],
+               [DSNRecord(start + 120, "MRO", "DSS14", -140.0)],  # VGR1's pass has ended...
+               [DSNRecord(start + 180, "MRO", "DSS14", -141.0)]]  # ...which is known once this scrape arrives
+    for records in scrapes:
+        monitor.store_data(records)
+        monitor.writer.flush()
+        emit_update(records)
+
+    query = f"/api/history?spacecraft=VGR1&antenna=DSS43&start={start}&end={start + 120}"
+    served = app.test_client().get(query).get_json()["samples"]
+    stored = monitor.history.query("VGR1", "DSS43", start, start + 120)
+    assert [s["communication_duration"] for s in served] == [60.0, 60.0]
+    assert [r.communication_duration for r in stored] == [60.0, 60.0]
+
+
+def _details(app, start_ts, end_ts):
+    gmt = "%a, %d %b %Y %H:%M:%S GMT"
+    return app.test_client().get("/spacecraft_details", query_string={
+        "spacecraft_name": "VGR1", "antenna": "DSS43",
+        "start": time.strftime(gmt, time.gmtime(start_ts)), "end": time.strftime(gmt, time.gmtime(end_ts))})
+
+
+def test_spacecraft_details_answers_only_for_the_requested_window(dashboard):
+    app, _, _, monitor = dashboard
+    now = int(time.time())
+    live = DSNRecord(now, "VGR1", "DSS43", -150.0, data_rate=160.0, frequency=8.42e9, spacecraft_range=2.4e13)
+    monitor.install_snapshot([live])  # Not stored yet
+
+    assert _details(app, now - 60, now + 60).get_json()["samples"] == 1
+    assert _details(app, now - 7200, now - 3600).status_code == 404
+    assert _details(app, now + 3600, now + 7200).status_code == 404